@@ -1,12 +1,34 @@
 from enum import Enum
+from typing import List, Optional
 
 from typer import Option, Typer, echo
 
 from data_population.data_config import data_configs
-from data_population.tasks import populate_all, upload_only
+from data_population.tasks import (
+    TaskOptions,
+    benchmark_copy,
+    benchmark_generation,
+    grow,
+    plan,
+    populate_all,
+    prewarm,
+    reset,
+    snapshot,
+    upload_only,
+)
 
 cli = Typer(name="Pyxis", help="performance sandbox test tool", no_args_is_help=True, add_completion=False)
-tasks = {"populate-db": populate_all, "upload-only": upload_only}
+tasks = {
+    "populate-db": populate_all,
+    "upload-only": upload_only,
+    "grow": grow,
+    "plan": plan,
+    "benchmark-generation": benchmark_generation,
+    "benchmark-copy": benchmark_copy,
+    "snapshot": snapshot,
+    "reset": reset,
+    "prewarm": prewarm,
+}
 
 
 TaskNameOptions = Enum("TaskNameOptions", {k.replace("-", "_"): k for k in tasks})  # type: ignore [misc]
@@ -14,16 +36,60 @@ DataConfigOptions = Enum("DataConfigOptions", {k.replace("-", "_"): k for k in d
 
 
 @cli.command(no_args_is_help=True)
-def main(
+def main(  # pylint: disable=too-many-arguments
+    *,
     task_name: TaskNameOptions = Option(..., "--task-name", "-t", help="Task you wish to perform."),
     data_configuration: DataConfigOptions = Option(
         ..., "--data-configuration", "-d", help="Task's data configuration."
     ),
+    seed: Optional[int] = Option(
+        None, "--seed", "-s", help="Seed for data generation (default GENERATION_SEED), reproducible across runs."
+    ),
+    direct: bool = Option(
+        False, "--direct", help="populate-db only: copy generated rows straight into the databases, without tsvs."
+    ),
+    bulk_load: bool = Option(
+        False, "--bulk-load", help="Drop and rebuild indexes and foreign keys around each table's upload."
+    ),
+    binary: bool = Option(
+        False, "--binary", help="populate-db and plan: write and upload binary COPY files (typed from the databases)."
+    ),
+    regenerate: bool = Option(
+        False, "--regenerate", help="populate-db only: regenerate tsvs even if the dataset is already cached."
+    ),
+    databases: Optional[List[str]] = Option(
+        None, "--db", help="populate-db and upload-only: only this database's tables (repeatable)."
+    ),
+    scale: float = Option(
+        1.0, "--scale", help="Scale the data configuration's row counts (not retailers or campaigns) by this factor."
+    ),
+    overrides: Optional[List[str]] = Option(
+        None, "--set", help="Override a data configuration field (after scaling), as <field>=<value> (repeatable)."
+    ),
+    tables: Optional[List[str]] = Option(
+        None,
+        "--table",
+        help="populate-db and upload-only: only this table, as <table> or <db>.<table>, and those referencing it "
+        "(repeatable).",
+    ),
 ) -> None:
     """Runs the provided task with the provided configuration"""
 
     echo("Starting...")
-    tasks[task_name.value](data_configuration.value)
+    tasks[task_name.value](
+        data_configuration.value,
+        TaskOptions(
+            seed=seed,
+            direct=direct,
+            bulk_load=bulk_load,
+            binary=binary,
+            regenerate=regenerate,
+            databases=tuple(databases or ()),
+            tables=tuple(tables or ()),
+            scale=scale,
+            overrides=tuple(overrides or ()),
+        ),
+    )
     echo("Finished.")
 
 
@@ -0,0 +1,83 @@
+import gzip
+import io
+import lzma
+
+from typing import BinaryIO
+
+try:
+    import zstandard
+except ImportError:  # zstandard is only required for (opt-in) zstd compression
+    zstandard = None
+
+GZIP_LEVEL = 6
+LZMA_PRESET = 6
+ZSTD_LEVEL = 3
+
+# Supported compressions, by name, and the extension each adds to file names
+extensions = {"gzip": ".gz", "lzma": ".xz", "zstd": ".zst"}
+
+
+def _check(compression: str) -> None:
+    if compression not in extensions:
+        raise ValueError(f"Unknown compression {compression}, allowed compressions {list(extensions)}")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstd compression requires zstandard to be installed (pip install zstandard)")
+
+
+def split_compression(file_name: str) -> tuple[str, str | None]:
+    """
+    Splits a file name into the name of the uncompressed file and the compression used (None if uncompressed), by
+    extension: e.g. "table.tsv.gz" into "table.tsv" and "gzip".
+    """
+
+    for compression, extension in extensions.items():
+        if file_name.endswith(extension):
+            return file_name[: -len(extension)], compression
+
+    return file_name, None
+
+
+def open_compressed(file_name: str, mode: str, compression: str | None, buffering: int = -1) -> BinaryIO:
+    """
+    Opens a file for binary reading ("rb") or writing ("wb"), compressing or decompressing it as a stream. Compressed
+    files may be concatenated (e.g. from files compressed in parallel) and are read back as a single stream.
+
+    :param file_name: file to open
+    :param mode: "rb" or "wb"
+    :param compression: one of extensions, or None for an uncompressed file
+    :param buffering: buffer size of uncompressed (or zstd compressed) files (-1 for the default)
+    """
+
+    if compression is None:
+        # (binary mode, so there is no encoding)
+        return open(  # type: ignore[return-value]  # pylint: disable=consider-using-with,unspecified-encoding
+            file_name, mode, buffering=buffering
+        )
+
+    _check(compression)
+    if compression == "gzip":
+        return gzip.open(file_name, mode, compresslevel=GZIP_LEVEL)  # type: ignore[return-value]
+    if compression == "lzma":
+        return lzma.open(file_name, mode, preset=LZMA_PRESET if mode == "wb" else None)  # type: ignore[return-value]
+
+    file = open(file_name, mode, buffering=buffering)  # pylint: disable=consider-using-with,unspecified-encoding
+    if mode == "wb":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(file, closefd=True)
+
+    # (buffered, for readline)
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True, closefd=True))
+
+
+def compress(data: bytes, compression: str | None) -> bytes:
+    """Compresses data as a complete compressed stream (which may be concatenated with others, see open_compressed)."""
+
+    if compression is None:
+        return data
+
+    _check(compression)
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    if compression == "lzma":
+        return lzma.compress(data, preset=LZMA_PRESET)
+
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
@@ -0,0 +1,141 @@
+import logging
+import threading
+
+from contextlib import contextmanager
+from typing import Generator
+
+import psycopg2
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extensions import connection as connection_type
+
+from settings import DB_CONNECTION_URI, DB_POOL_MAX_SIZE, DB_POOL_SIZE, DB_POOL_TIMEOUT
+
+logger = logging.getLogger("ConnectionPool")
+
+
+# Session options of every connection: naive datetimes (generated with datetime.utcnow) are read as UTC by text COPY, as
+# they are written by binary COPY (see pgcopy_encoder), whichever the server's default TimeZone
+CONNECTION_OPTIONS = "-c TimeZone=UTC"
+
+
+def db_uri(db_name: str) -> str:
+    return DB_CONNECTION_URI.replace("/postgres?", f"/{db_name}?")
+
+
+class ConnectionPool:
+    """
+    Connections to a database, reused once returned. Connections are opened on demand, up to max_size borrowed at once
+    (getconn waits for one to be returned beyond that), and up to max_idle returned connections are kept open for
+    reuse, so that no more than max_size connections are ever open. Safe to use from several threads (or greenlets).
+    """
+
+    def __init__(self, db_name: str, max_idle: int = DB_POOL_SIZE, max_size: int = DB_POOL_MAX_SIZE) -> None:
+        self.db_name = db_name
+        self.max_idle = max_idle
+        self.max_size = max_size
+        self.idle: list[connection_type] = []
+        self.lock = threading.Lock()
+        self.borrowed = threading.BoundedSemaphore(max_size)  # acquired by getconn, released by putconn
+
+    def getconn(self, timeout: float | None = DB_POOL_TIMEOUT) -> connection_type:
+        """
+        Borrows a connection (to be returned with putconn), waiting up to timeout seconds (None: forever) for one to be
+        returned if max_size are already borrowed. Raises RuntimeError if none is.
+        """
+
+        if not self.borrowed.acquire(timeout=timeout):  # (released by putconn) pylint: disable=consider-using-with
+            raise RuntimeError(
+                f"{self.db_name.upper()}: No connection returned within {timeout} seconds, with all {self.max_size} "
+                "borrowed (see DB_POOL_MAX_SIZE)"
+            )
+
+        try:
+            with self.lock:
+                while self.idle:
+                    connection = self.idle.pop()
+                    if not connection.closed:
+                        return connection
+
+            logger.debug(f"{self.db_name.upper()}: Opening new connection")
+            return psycopg2.connect(db_uri(self.db_name), options=CONNECTION_OPTIONS)
+        except BaseException:
+            self.borrowed.release()
+            raise
+
+    def putconn(self, connection: connection_type) -> None:
+        """Returns a connection to the pool (closing it if it is broken, or if enough connections are kept open)."""
+
+        try:
+            self._keep_or_close(connection)
+        finally:
+            self.borrowed.release()
+
+    def _keep_or_close(self, connection: connection_type) -> None:
+        if connection.closed:
+            return
+
+        try:
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except psycopg2.Error:
+            connection.close()
+            return
+
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(connection)
+                return
+
+        connection.close()
+
+    def closeall(self) -> None:
+        with self.lock:
+            idle, self.idle = self.idle, []
+
+        for connection in idle:
+            connection.close()
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name: str) -> ConnectionPool:
+    """The (process wide) connection pool of a database, created on first use."""
+
+    with _pools_lock:
+        if db_name not in _pools:
+            _pools[db_name] = ConnectionPool(db_name)
+        return _pools[db_name]
+
+
+@contextmanager
+def pooled_connection(db_name: str, autocommit: bool = False) -> Generator[connection_type, None, None]:
+    """
+    Borrows a connection to db_name from its pool for the duration of the context. Unless autocommit, the transaction is
+    committed when the context exits normally, and rolled back if it raises.
+
+    :param db_name: database to connect to
+    :param autocommit: whether statements should run immediately, rather than in a transaction (e.g. for VACUUM)
+    """
+
+    pool = get_pool(db_name)
+    connection = pool.getconn()
+    try:
+        connection.autocommit = autocommit
+        yield connection
+        if not autocommit:
+            connection.commit()
+    finally:
+        pool.putconn(connection)  # (rolling back any transaction left open)
+
+
+def close_all_pools() -> None:
+    """Closes all idle pooled connections (e.g. before dropping databases they are connected to)."""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.closeall()
@@ -0,0 +1,59 @@
+import logging
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Mapping
+
+logger = logging.getLogger("TaskGraph")
+
+
+def _waiting_on(tasks: Mapping[str, Callable], prerequisites: Mapping[str, Iterable[str]]) -> dict[str, set[str]]:
+    waiting_on = {name: set(prerequisites.get(name, ())) for name in tasks}
+    if unknown := set().union(*waiting_on.values()) - set(tasks):
+        raise ValueError(f"Unknown prerequisite tasks: {sorted(unknown)}")
+    return waiting_on
+
+
+def _pop_ready(waiting_on: dict[str, set[str]], limit: int) -> list[str]:
+    ready = [name for name, waiting in waiting_on.items() if not waiting][:limit]
+    for name in ready:
+        del waiting_on[name]
+    return ready
+
+
+def _complete(name: str, future: Future, waiting_on: dict[str, set[str]]) -> None:
+    future.result()  # re-raises any exception raised by the task
+    logger.debug(f"Task [{name}] completed")
+    for waiting in waiting_on.values():
+        waiting.discard(name)
+
+
+def run_task_graph(
+    tasks: Mapping[str, Callable[[], Any]], prerequisites: Mapping[str, Iterable[str]], max_workers: int
+) -> None:
+    """
+    Runs a graph of tasks on a pool of threads, starting each task as soon as all of its prerequisites have completed
+    (ready tasks are started in the order they appear in `tasks`). Total run time is therefore that of the critical path
+    through the graph, rather than the sum of all tasks.
+
+    Tasks are only submitted to the pool when a thread is free for them, so that if a task raises, no further tasks are
+    started and the exception is re-raised once running tasks have finished.
+
+    :param tasks: callables to run, by task name.
+    :param prerequisites: names of the tasks that must complete before a task can start, by task name.
+    :param max_workers: maximum number of tasks to run at once.
+    """
+
+    waiting_on = _waiting_on(tasks, prerequisites)
+    running: dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while waiting_on or running:
+            for name in _pop_ready(waiting_on, max_workers - len(running)):
+                running[executor.submit(tasks[name])] = name
+
+            if not running:
+                raise ValueError(f"Tasks have circular prerequisites: {sorted(waiting_on)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                _complete(running.pop(future), future, waiting_on)
@@ -1,9 +1,11 @@
+import hashlib
 import logging
 import random
 import string
 import time
 
 from typing import Any, Callable, Generator
+from uuid import UUID
 
 
 def id_generator(starting_num: int = 0) -> Generator[int, None, None]:
@@ -33,3 +35,19 @@ def timed_function(func: Callable) -> Callable:
 def random_ascii(length: int = 10) -> str:
     """Generate a random ascii string of n length"""
     return "".join(random.choice(string.ascii_lowercase) for i in range(length))
+
+
+def derive_seed(seed: int, *keys: Any) -> int:
+    """Deterministically derives a new seed from a base seed and any number of keys (e.g. database, table, shard)"""
+    digest = hashlib.sha256("-".join(str(key) for key in (seed, *keys)).encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def seeded_random(seed: int, *keys: Any) -> random.Random:
+    """Returns a Random instance seeded from a base seed and any number of keys (see derive_seed)"""
+    return random.Random(derive_seed(seed, *keys))
+
+
+def random_uuid(rng: random.Random) -> UUID:
+    """Equivalent of uuid4, but drawn from the provided Random instance so that generated uuids are reproducible."""
+    return UUID(int=rng.getrandbits(128), version=4)
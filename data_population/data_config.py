@@ -1,4 +1,15 @@
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Iterable
+
+# Data config fields describing the retailers and their campaigns (rather than numbers of rows), which are not scaled
+# (see scale_data_config) or grown (see growth)
+STRUCTURAL_FIELDS = ("retailers", "campaigns_per_retailer", "earn_rule_per_campaign")
+
+# Account holders per retailer below which a retailer may be left without account holders to assign its rewards to
+MIN_ACCOUNT_HOLDERS_PER_RETAILER = 100
+# Allocated and pending rewards per account holder above which a data config is taken to be a mistake (well beyond any
+# of data_configs, which have about one at most)
+MAX_REWARDS_PER_ACCOUNT_HOLDER = 10
 
 
 @dataclass
@@ -60,3 +71,82 @@ data_configs = {
         reward_updates=0,
     ),
 }
+
+
+def data_config_problems(data_config: DataConfig) -> list[str]:
+    """Reasons data_config cannot be generated (or is inconsistent, see MAX_REWARDS_PER_ACCOUNT_HOLDER), if any."""
+
+    config = data_config
+    negative = [name for name, value in asdict(config).items() if value < 0]
+    assigned_rewards = config.allocated_rewards + config.pending_rewards
+    checks = [
+        (not negative, f"{', '.join(negative)} must not be negative"),
+        (
+            min(getattr(config, name) for name in STRUCTURAL_FIELDS) >= 1,
+            f"{', '.join(STRUCTURAL_FIELDS)} must be at least 1 (rewards and transactions belong to campaigns)",
+        ),
+        (
+            not config.transactions or config.account_holders,
+            f"{config.transactions} transactions need account holders to belong to",
+        ),
+        (
+            not assigned_rewards or config.account_holders >= config.retailers * MIN_ACCOUNT_HOLDERS_PER_RETAILER,
+            f"{assigned_rewards} allocated and pending rewards need at least {MIN_ACCOUNT_HOLDERS_PER_RETAILER} "
+            f"account holders per retailer (got {config.account_holders} for {config.retailers} retailers), so that "
+            "every retailer has account holders to assign rewards to",
+        ),
+        (
+            assigned_rewards <= config.account_holders * MAX_REWARDS_PER_ACCOUNT_HOLDER,
+            f"{assigned_rewards} allocated and pending rewards are more than {MAX_REWARDS_PER_ACCOUNT_HOLDER} per "
+            f"account holder ({config.account_holders} account holders)",
+        ),
+        (
+            not config.reward_updates or config.allocated_rewards,
+            f"{config.reward_updates} reward updates need allocated rewards to update",
+        ),
+    ]
+
+    return [problem for ok, problem in checks if not ok]
+
+
+def parse_overrides(overrides: Iterable[str]) -> dict[str, int]:
+    """
+    Parses data config field overrides given as "<field>=<value>" (see scale_data_config). Raises ValueError for unknown
+    fields or values that are not integers.
+    """
+
+    names = [config_field.name for config_field in fields(DataConfig)]
+    parsed = {}
+    for override in overrides:
+        name, _, value = override.partition("=")
+        if name.strip() not in names or not value.strip().lstrip("-").isdigit():
+            raise ValueError(
+                f"Invalid data config override {override!r}: expected <field>=<integer>, fields: {', '.join(names)}"
+            )
+        parsed[name.strip()] = int(value)
+
+    return parsed
+
+
+def scale_data_config(base: DataConfig, scale: float = 1, overrides: dict[str, int] | None = None) -> DataConfig:
+    """
+    Derives a data config from base, e.g. to run the same profile at 2x, 5x and 10x its size: base's counts of rows are
+    multiplied by scale (rounded), keeping its retailers and campaigns (see STRUCTURAL_FIELDS), then any overrides
+    (values by field name) replace the fields they name.
+
+    Raises ValueError if scale is not positive or the derived data config has problems (see data_config_problems).
+    """
+
+    if scale <= 0:
+        raise ValueError(f"Data config scale must be positive, got {scale}")
+
+    scaled = DataConfig(
+        **{name: value if name in STRUCTURAL_FIELDS else round(value * scale) for name, value in asdict(base).items()}
+    )
+    scaled = replace(scaled, **(overrides or {}))
+
+    problems = data_config_problems(scaled)
+    if problems:
+        raise ValueError(f"Inconsistent data config {asdict(scaled)}: {'; '.join(problems)}")
+
+    return scaled
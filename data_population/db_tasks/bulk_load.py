@@ -0,0 +1,238 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, ContextManager, Generator
+
+import psycopg2
+
+from psycopg2.extensions import connection as connection_type
+from psycopg2.extensions import cursor as cursor_type
+
+from data_population.common.task_graph import run_task_graph
+from data_population.db_tasks.upload_slots import spare_upload_slots
+from settings import BULK_LOAD_REPLICA_ROLE, BULK_LOAD_UNLOGGED, LOAD_TIMINGS_FILE
+
+logger = logging.getLogger("BulkLoad")
+
+_load_timings_lock = threading.Lock()
+
+
+@dataclass
+class TableDefinitions:
+    """A table's secondary indexes and foreign keys, as dropped for a bulk load and recreated afterwards."""
+
+    indexes: dict[str, str] = field(default_factory=dict)  # CREATE INDEX statements, by index name
+    foreign_keys: dict[str, str] = field(default_factory=dict)  # constraint definitions, by constraint name
+
+
+def capture_definitions(cursor: cursor_type, table_name: str) -> TableDefinitions:
+    """
+    Reads the definitions of table_name's indexes (other than those backing primary key, unique or exclusion
+    constraints, which other tables' foreign keys may rely on) and foreign keys from the catalog.
+    """
+
+    cursor.execute(
+        """
+        SELECT pg_indexes.indexname, pg_indexes.indexdef
+        FROM pg_indexes
+        WHERE pg_indexes.schemaname = current_schema() AND pg_indexes.tablename = %(table)s AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint JOIN pg_class ON pg_class.oid = pg_constraint.conindid
+            WHERE pg_constraint.conrelid = %(table)s::regclass AND pg_constraint.contype IN ('p', 'u', 'x')
+            AND pg_class.relname = pg_indexes.indexname
+        )
+        """,
+        {"table": table_name},
+    )
+    definitions = TableDefinitions(indexes=dict(cursor.fetchall()))
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+        (table_name,),
+    )
+    definitions.foreign_keys = dict(cursor.fetchall())
+
+    return definitions
+
+
+def _execute_on_new_connection(connect: Callable[[], ContextManager[connection_type]], statement: str) -> None:
+    with connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(statement)
+
+
+def recreate_definitions(
+    cursor: cursor_type,
+    connect: Callable[[], ContextManager[connection_type]],
+    table_name: str,
+    definitions: TableDefinitions,
+) -> None:
+    """
+    Recreates dropped indexes and then foreign keys, which are added NOT VALID and then validated (checking existing
+    rows without blocking writes). Indexes are recreated one at a time, or in parallel (each over its own connection)
+    using whichever upload slots are spare (see upload_slots), so that uploads stay within UPLOAD_CONCURRENCY.
+    """
+
+    start_time = time.time()
+    with spare_upload_slots(len(definitions.indexes) - 1) as spare:
+        run_task_graph(
+            {
+                name: partial(_execute_on_new_connection, connect, statement)
+                for name, statement in definitions.indexes.items()
+            },
+            prerequisites={},
+            max_workers=1 + spare,
+        )
+    logger.info(f"{table_name}: Recreated {len(definitions.indexes)} indexes in {time.time() - start_time:.2f} seconds")
+
+    start_time = time.time()
+    for name, definition in definitions.foreign_keys.items():
+        if definition.endswith("NOT VALID"):  # was never validated, so should not be now
+            cursor.execute(f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{name}" {definition}')
+        else:
+            cursor.execute(f'ALTER TABLE "{table_name}" ADD CONSTRAINT "{name}" {definition} NOT VALID')
+            cursor.execute(f'ALTER TABLE "{table_name}" VALIDATE CONSTRAINT "{name}"')
+    logger.info(
+        f"{table_name}: Re-validated {len(definitions.foreign_keys)} foreign keys in "
+        f"{time.time() - start_time:.2f} seconds"
+    )
+
+
+def _set_unlogged(cursor: cursor_type, table_name: str) -> bool:
+    try:
+        cursor.execute(f'ALTER TABLE "{table_name}" SET UNLOGGED')
+    except psycopg2.Error as ex:
+        # e.g. if the table is still referenced by a (logged) table's foreign key
+        logger.warning(f"{table_name}: Could not make table unlogged, loading it logged: {ex}".strip())
+        return False
+
+    return True
+
+
+def _drop_definitions(cursor: cursor_type, table_name: str, definitions: TableDefinitions) -> None:
+    for name in definitions.foreign_keys:
+        cursor.execute(f'ALTER TABLE "{table_name}" DROP CONSTRAINT IF EXISTS "{name}"')
+    for name in definitions.indexes:
+        cursor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+def _restore(table_name: str, step: str, action: Callable[[], None]) -> bool:
+    """Runs a step restoring a bulk loaded table, logging (rather than raising) any error. Returns whether it ran."""
+
+    try:
+        action()
+    except psycopg2.Error as ex:
+        logger.error(f"{table_name}: Could not {step} after bulk load: {ex}".strip())
+        return False
+
+    return True
+
+
+def _recreate_on_new_connection(
+    connect: Callable[[], ContextManager[connection_type]], table_name: str, definitions: TableDefinitions
+) -> None:
+    with connect() as connection:
+        with connection.cursor() as cursor:
+            recreate_definitions(cursor, connect, table_name, definitions)
+
+
+def restore_definitions(
+    connect: Callable[[], ContextManager[connection_type]], table_name: str, definitions: TableDefinitions
+) -> None:
+    """
+    Restores definitions saved by an interrupted bulk load, which may have dropped some or all of them (e.g. before a
+    regular load of the rest of the table): any that remain are dropped and all are recreated.
+    """
+
+    with connect() as connection:
+        with connection.cursor() as cursor:
+            _drop_definitions(cursor, table_name, definitions)
+            recreate_definitions(cursor, connect, table_name, definitions)
+
+
+@contextmanager
+def bulk_loading(
+    connection: connection_type,
+    connect: Callable[[], ContextManager[connection_type]],
+    table_name: str,
+    definitions: TableDefinitions | None = None,
+) -> Generator[None, None, None]:
+    """
+    Context manager for bulk loading a table: its secondary indexes and foreign keys are dropped for the duration of the
+    context (and the table made UNLOGGED with BULK_LOAD_UNLOGGED, and triggers disabled with BULK_LOAD_REPLICA_ROLE). On
+    exit, each of these is restored, even if the load or another step fails, raising RuntimeError afterwards if any step
+    failed.
+
+    :param connection: autocommit connection the table is loaded over
+    :param connect: callable returning a context managed autocommit connection to the same database (see
+     db_tasks.connect)
+    :param table_name: table being loaded
+    :param definitions: definitions to drop and recreate, rather than those read from the catalog (e.g. as saved by an
+     interrupted load)
+    """
+
+    cursor = connection.cursor()
+    if definitions is None:
+        definitions = capture_definitions(cursor, table_name)
+
+    _drop_definitions(cursor, table_name, definitions)
+    logger.info(
+        f"{table_name}: Dropped {len(definitions.indexes)} indexes and {len(definitions.foreign_keys)} foreign keys "
+        "for bulk load"
+    )
+
+    unlogged = BULK_LOAD_UNLOGGED and _set_unlogged(cursor, table_name)
+    if BULK_LOAD_REPLICA_ROLE:
+        cursor.execute("SET session_replication_role = replica")
+
+    try:
+        yield
+    finally:
+        restored = _restore(
+            table_name,
+            "recreate indexes and foreign keys",
+            partial(_recreate_on_new_connection, connect, table_name, definitions),
+        )
+        if unlogged:
+            restored &= _restore(
+                table_name,
+                "make table logged",
+                partial(_execute_on_new_connection, connect, f'ALTER TABLE "{table_name}" SET LOGGED'),
+            )
+        if BULK_LOAD_REPLICA_ROLE and not connection.closed:  # (a closed connection's session, and role, are gone)
+            restored &= _restore(
+                table_name, "reset session_replication_role", partial(cursor.execute, "RESET session_replication_role")
+            )
+        if not restored:
+            raise RuntimeError(f"{table_name}: Bulk load could not be fully restored (see errors above)")
+
+
+def report_load_time(name: str, seconds: float, bulk: bool) -> None:
+    """
+    Records how long loading a table took (in LOAD_TIMINGS_FILE, by load mode) and logs the time saved by bulk loading
+    it, compared to the last regular load of the table.
+
+    :param name: name of the table loaded (including database)
+    :param seconds: load time, including dropping and recreating indexes and foreign keys for bulk loads
+    :param bulk: whether the table was bulk loaded
+    """
+
+    with _load_timings_lock:
+        timings: dict = {}
+        if os.path.isfile(LOAD_TIMINGS_FILE):
+            with open(LOAD_TIMINGS_FILE, encoding="utf-8") as file:
+                timings = json.load(file)
+
+        timings.setdefault(name, {})["bulk" if bulk else "regular"] = seconds
+        with open(LOAD_TIMINGS_FILE, "w", encoding="utf-8") as file:
+            json.dump(timings, file, indent=2)
+
+    if bulk and (regular := timings[name].get("regular")) is not None:
+        logger.info(f"{name}: Bulk loaded in {seconds:.2f} seconds, {regular - seconds:.2f} seconds saved")
+    elif bulk:
+        logger.info(f"{name}: Bulk loaded in {seconds:.2f} seconds (no regular load recorded to compare with)")
@@ -0,0 +1,122 @@
+import logging
+import os
+import tempfile
+import time
+
+from contextlib import ExitStack
+from typing import Any, Iterable
+
+from psycopg2.extensions import cursor as cursor_type
+
+from data_population.common.compression import open_compressed
+from data_population.common.connection_pool import pooled_connection
+from data_population.db_tasks.db_tasks import copy_into_table
+from data_population.tsv_creation.manifest import Manifest
+from data_population.tsv_creation.pgcopy_encoder import PGCOPY_HEADER, PGCOPY_TRAILER, PGCopyEncoder, fetch_column_types
+from data_population.tsv_creation.tsv_encoder import TSVEncoder
+
+logger = logging.getLogger("CopyBenchmark")
+
+
+def _temporary_copy(cursor: cursor_type, table_name: str) -> str:
+    """
+    Creates a temporary copy of table_name with its defaults, constraints and indexes (but not its foreign keys), so
+    that loads can be benchmarked without touching the table itself. Returns the temporary table's name.
+    """
+
+    temporary_table = f"benchmark_{table_name}"
+    cursor.execute(f'CREATE TEMPORARY TABLE "{temporary_table}" (LIKE "{table_name}" INCLUDING ALL)')
+    return temporary_table
+
+
+def _time_copy(cursor: cursor_type, table_name: str, file: Any, binary: bool) -> float:
+    """Empties table and copies file into it. Returns seconds taken by the copy."""
+
+    cursor.execute(f'TRUNCATE "{table_name}"')
+    file.seek(0)
+
+    start_time = time.perf_counter()
+    copy_into_table(cursor, table_name, file, binary=binary)
+
+    return time.perf_counter() - start_time
+
+
+def _encode_files(rows: Iterable[list], text_file: Any, binary_file: Any, column_types: list[str]) -> None:
+    """Writes rows to text_file as tsv and to binary_file as binary COPY data (encoded according to column_types)."""
+
+    text_encoder, binary_encoder = TSVEncoder(), PGCopyEncoder(column_types)
+    binary_file.write(PGCOPY_HEADER)
+    for row in rows:
+        text_file.write(text_encoder.encode_row(row).encode("utf-8"))
+        binary_file.write(binary_encoder.encode_row(row))
+    binary_file.write(PGCOPY_TRAILER)
+
+
+def benchmark_copy_formats(tables: Iterable[tuple[str, str, Iterable[list]]]) -> dict[str, dict[str, float]]:
+    """
+    Times loading each table with text COPY and with binary COPY (from files encoded beforehand), into temporary copies
+    of the tables (see _temporary_copy).
+
+    :param tables: (database name, table name, rows) for each table, in the order they are generated (see
+     TSVHandler.table_rows)
+    :return: seconds taken to load each table (as "<database name>.<table name>") by format ("text" and "binary")
+    """
+
+    results: dict[str, dict[str, float]] = {}
+    connections: dict = {}
+
+    with ExitStack() as stack:
+        for db_name, table_name, rows in tables:
+            if db_name not in connections:
+                connections[db_name] = stack.enter_context(pooled_connection(db_name))
+            cursor = connections[db_name].cursor()
+            temporary_table = _temporary_copy(cursor, table_name)
+
+            with tempfile.TemporaryFile() as text_file, tempfile.TemporaryFile() as binary_file:
+                _encode_files(rows, text_file, binary_file, fetch_column_types(cursor, table_name))
+
+                name = f"{db_name}.{table_name}"
+                results[name] = {
+                    "text": _time_copy(cursor, temporary_table, text_file, binary=False),
+                    "binary": _time_copy(cursor, temporary_table, binary_file, binary=True),
+                }
+
+            logger.info(
+                f"{name}: text COPY {results[name]['text']:.2f} seconds, binary COPY {results[name]['binary']:.2f} "
+                "seconds"
+            )
+        for connection in connections.values():
+            connection.rollback()
+
+    return results
+
+
+def benchmark_copy_rates(manifest: Manifest, directory: str) -> dict[str, float]:
+    """
+    Times copying each file of a (small) dataset into a temporary copy of its table (see _temporary_copy).
+
+    :param manifest: manifest of the dataset
+    :param directory: directory of the dataset
+    :return: bytes (of file, as written) copied per second, by "<db>.<table>"
+    """
+
+    rates = {}
+
+    for db_name in dict.fromkeys(table.db for table in manifest.tables):
+        with pooled_connection(db_name) as connection:
+            with connection.cursor() as cursor:
+                for table in manifest.tables:
+                    if table.db != db_name:
+                        continue
+
+                    temporary_table = _temporary_copy(cursor, table.table)
+                    with open_compressed(os.path.join(directory, table.filename), "rb", table.compression) as file:
+                        start_time = time.perf_counter()
+                        copy_into_table(cursor, temporary_table, file, binary=table.binary)
+                        seconds = time.perf_counter() - start_time
+
+                    rates[f"{db_name}.{table.table}"] = table.bytes / seconds if seconds else 0.0
+                    logger.info(f"{db_name}.{table.table}: copied {table.bytes} bytes in {seconds:.3f} seconds")
+            connection.rollback()
+
+    return rates
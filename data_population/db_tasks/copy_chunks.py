@@ -0,0 +1,133 @@
+import struct
+
+from typing import Any, Iterator, NamedTuple
+
+from data_population.tsv_creation.pgcopy_encoder import PGCOPY_HEADER, PGCOPY_TRAILER
+from settings import UPLOAD_CHUNK_SIZE
+
+_PGCOPY_SIGNATURE = PGCOPY_HEADER[:11]
+_INT2 = struct.Struct(">h")
+_INT4 = struct.Struct(">i")
+_SKIP_SIZE = 1024 * 1024  # bytes read (and discarded) at a time when skipping to an offset in a stream
+
+
+class Chunk(NamedTuple):
+    data: bytes  # a complete COPY stream of the chunk's rows
+    rows: int  # number of rows in the chunk
+    end: int  # offset in the source data of the end of the chunk's rows
+
+
+def _skip(file: Any, offset: int) -> None:
+    if file.seekable():
+        file.seek(offset)
+        return
+
+    while offset > 0:
+        skipped = len(file.read(min(offset, _SKIP_SIZE)))
+        if not skipped:
+            raise ValueError("Cannot resume upload: data ends before the checkpointed offset")
+        offset -= skipped
+
+
+def _binary_tuple_end(buffer: bytes, start: int) -> int | None:
+    """End of the binary COPY tuple starting at start, None if it is not (wholly) in buffer, -1 for the trailer."""
+
+    if start + 2 > len(buffer):
+        return None
+
+    (field_count,) = _INT2.unpack_from(buffer, start)
+    if field_count == -1:
+        return -1
+
+    position = start + 2
+    for _ in range(field_count):
+        if position + 4 > len(buffer):
+            return None
+        (length,) = _INT4.unpack_from(buffer, position)
+        position += 4 + max(length, 0)  # (NULLs have a length of -1 and no data)
+
+    return position if position <= len(buffer) else None
+
+
+class CopyChunks:
+    """
+    Splits text or binary COPY data, read from a file-like object, into chunks of whole rows of about chunk_size bytes
+    (or a single row, for larger rows). Each chunk is a complete COPY stream of its own (binary chunks are given a
+    header and trailer), so that chunks can be copied into a table, and committed, one at a time.
+    """
+
+    def __init__(self, file: Any, binary: bool, offset: int = 0, chunk_size: int = UPLOAD_CHUNK_SIZE) -> None:
+        """
+        :param file: file-like object to read data from
+        :param binary: whether data is binary (rather than text) COPY data
+        :param offset: offset in the data to start from (the end of a previous chunk, see Chunk), 0 for the start
+        :param chunk_size: target size of chunks in bytes
+        """
+
+        self.file = file
+        self.binary = binary
+        self.chunk_size = chunk_size
+        self.buffer = b""
+        self.offset = offset  # offset in the data of the start of self.buffer
+        self.finished = False  # whether all data has been read from file (or the binary trailer has been reached)
+
+        if offset:
+            _skip(file, offset)
+        elif binary:
+            self._read_header()
+
+    def _read_header(self) -> None:
+        header = self.file.read(len(PGCOPY_HEADER))
+        if header[: len(_PGCOPY_SIGNATURE)] != _PGCOPY_SIGNATURE:
+            raise ValueError("Not binary COPY data: missing PGCOPY signature")
+
+        (extension_length,) = _INT4.unpack_from(header, len(PGCOPY_HEADER) - 4)
+        self.file.read(extension_length)
+        self.offset = len(PGCOPY_HEADER) + extension_length
+
+    def _fill(self, size: int) -> None:
+        while not self.finished and len(self.buffer) < size:
+            data = self.file.read(size - len(self.buffer))
+            if data:
+                self.buffer += data
+            else:
+                self.finished = True
+
+    def _text_rows_end(self) -> tuple[int, int]:
+        end = self.buffer.rfind(b"\n", 0, self.chunk_size) + 1 or self.buffer.find(b"\n") + 1
+        if not end and self.finished and self.buffer:
+            return len(self.buffer), 1  # last line, without a line terminator
+
+        return end, self.buffer.count(b"\n", 0, end)
+
+    def _binary_rows_end(self) -> tuple[int, int]:
+        end = rows = 0
+        while end < self.chunk_size or not rows:
+            tuple_end = _binary_tuple_end(self.buffer, end)
+            if tuple_end == -1:
+                self.finished = True  # (the trailer, and anything after it, is dropped)
+                self.buffer = self.buffer[:end]
+                break
+            if tuple_end is None:
+                break
+            end, rows = tuple_end, rows + 1
+
+        return end, rows
+
+    def __iter__(self) -> Iterator[Chunk]:
+        while True:
+            self._fill(self.chunk_size)
+            end, rows = self._binary_rows_end() if self.binary else self._text_rows_end()
+
+            if not rows and not self.finished:
+                self._fill(len(self.buffer) + self.chunk_size)  # a single row larger than the rest of the buffer
+                continue
+            if not rows:
+                if self.buffer:
+                    raise ValueError("Incomplete COPY data at the end of the file")
+                return
+
+            data = self.buffer[:end]
+            self.buffer = self.buffer[end:]
+            self.offset += end
+            yield Chunk(PGCOPY_HEADER + data + PGCOPY_TRAILER if self.binary else data, rows, self.offset)
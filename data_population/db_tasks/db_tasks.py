@@ -1,116 +1,611 @@
+import io
 import logging
 import os
+import time
+
+from contextlib import ExitStack, nullcontext
+from dataclasses import asdict, replace
+from functools import partial
+from typing import Any, Collection, ContextManager, Iterable, Iterator
 
 import psycopg2
 
+from psycopg2.extensions import connection as connection_type
+from psycopg2.extensions import cursor as cursor_type
+
 import settings
 
-from settings import CARINA_DB, DB_CONNECTION_URI, POLARIS_DB, TSV_BASE_DIR, VELA_DB
+from data_population.common.compression import open_compressed
+from data_population.common.connection_pool import pooled_connection
+from data_population.common.task_graph import run_task_graph
+from data_population.db_tasks.bulk_load import (
+    TableDefinitions,
+    bulk_loading,
+    capture_definitions,
+    report_load_time,
+    restore_definitions,
+)
+from data_population.db_tasks.copy_chunks import CopyChunks
+from data_population.db_tasks.post_load import post_load, verify_row_counts, write_load_report
+from data_population.db_tasks.upload_checkpoint import TableProgress, UploadCheckpoint, file_source
+from data_population.db_tasks.upload_slots import upload_slot
+from data_population.tsv_creation.manifest import Manifest, read_manifest, verify_files
+from data_population.tsv_creation.pgcopy_encoder import encode_binary_copy, fetch_column_types
+from data_population.tsv_creation.tsv_encoder import NULL_TEXT, RowReader
+from settings import CARINA_DB, POLARIS_DB, TSV_BASE_DIR, UPLOAD_CONCURRENCY, VELA_DB
 
 logger = logging.getLogger("DataTaskHandler")
 
+COPY_READ_SIZE = 1024 * 1024  # bytes read at a time from the file being copied into a table
+
+
+def connect(db_name: str) -> ContextManager[connection_type]:
+    """Borrows an autocommit connection to db_name from its connection pool, for use as a context manager."""
+
+    # All execute statements will run immediately, rather than in a larger transaction. This is because VACUUM
+    # cannot work in a transaction.
+    return pooled_connection(db_name, autocommit=True)
+
+
+def _foreign_key_parents(connection: connection_type) -> dict[str, set[str]]:
+    """Names of the tables each table references through foreign keys (excluding itself), by table name."""
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, parent.relname
+            FROM pg_constraint
+            JOIN pg_class child ON child.oid = pg_constraint.conrelid
+            JOIN pg_class parent ON parent.oid = pg_constraint.confrelid
+            WHERE pg_constraint.contype = 'f' AND pg_constraint.conrelid <> pg_constraint.confrelid
+            """
+        )
+        parents: dict[str, set[str]] = {}
+        for child, parent in cursor.fetchall():
+            parents.setdefault(child, set()).add(parent)
+
+    return parents
+
+
+def _dependents(parents: dict[str, set[str]], table_name: str) -> set[str]:
+    """Tables referencing table_name through foreign keys, directly or indirectly (i.e. emptied by its truncation)."""
+
+    dependents: set[str] = set()
+    new = {table_name}
+    while new:
+        new = {child for child, child_parents in parents.items() if child_parents & new} - dependents
+        dependents |= new
+
+    return dependents
+
+
+def _table_names(connection: connection_type) -> set[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind IN ('r', 'p') AND relnamespace = current_schema()::regnamespace"
+        )
+        return {table_name for (table_name,) in cursor.fetchall()}
+
+
+def _select_db_tables(db_name: str, select_all: bool, tables: Collection[str]) -> tuple[set[str], set[str]]:
+    """
+    Selects a database's tables (see select_tables). Returns the names ("<db>.<table>") of the tables selected, and
+    those in tables that name one of its tables.
+    """
+
+    with connect(db_name) as connection:
+        table_names = _table_names(connection)
+        parents = _foreign_key_parents(connection)
+
+    # tables as given, by "<db>.<table>" (those given as "<table>" being looked for in this database)
+    given = {name if "." in name else f"{db_name}.{name}": name for name in tables}
+    matched = given.keys() & {f"{db_name}.{table_name}" for table_name in table_names}
+    chosen = set(table_names) if select_all else {name.split(".", 1)[1] for name in matched}
+    for table_name in set(chosen):
+        chosen |= _dependents(parents, table_name)
+
+    return {f"{db_name}.{table_name}" for table_name in chosen}, {given[name] for name in matched}
+
+
+def select_tables(databases: Collection[str] = (), tables: Collection[str] = ()) -> set[str] | None:
+    """
+    Names ("<db>.<table>") of the selected tables, along with the tables referencing them through foreign keys (which
+    truncating them empties). Returns None (i.e. all tables) if nothing is selected, and raises ValueError for unknown
+    databases or tables.
+
+    :param databases: databases whose tables are all selected
+    :param tables: tables selected, as "<table>" (in whichever databases have it) or "<db>.<table>"
+    """
+
+    if not databases and not tables:
+        return None
+
+    all_databases = [VELA_DB, CARINA_DB, POLARIS_DB]
+    if unknown := set(databases) - set(all_databases):
+        raise ValueError(f"Unknown databases {sorted(unknown)}, allowed databases {all_databases}")
+
+    selected: set[str] = set()
+    found: set[str] = set()
+    for db_name in all_databases:
+        db_selected, db_found = _select_db_tables(db_name, db_name in databases, tables)
+        selected |= db_selected
+        found |= db_found
+
+    if unknown := set(tables) - found:
+        raise ValueError(f"Unknown tables {sorted(unknown)} (tables are named <table> or <database>.<table>)")
+
+    logger.info(f"Selected tables (and the tables referencing them): {', '.join(sorted(selected))}")
+    return selected
+
+
+def _share_workers(db_bytes: dict[str, int], table_counts: dict[str, int]) -> dict[str, int]:
+    """
+    Shares UPLOAD_CONCURRENCY upload workers between databases in proportion to the bytes each has to load (each
+    database getting at least one worker, and no more than it has tables). Workers only load a table while holding an
+    upload slot (see upload_slots), so no more than UPLOAD_CONCURRENCY tables are loaded at once in total.
+    """
+
+    total_bytes = sum(db_bytes.values()) or 1
+
+    return {
+        db_name: max(1, min(table_counts[db_name], round(UPLOAD_CONCURRENCY * size / total_bytes)))
+        for db_name, size in db_bytes.items()
+    }
+
+
+class _CountedRows:
+    """Rows iterated over once, counting them as they are (count is only complete once they have all been read)."""
+
+    def __init__(self, rows: Iterable[list]) -> None:
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[list]:
+        for self.count, row in enumerate(self.rows, start=1):
+            yield row
+
+
+def _repopulate_from_tsv(  # pylint: disable=too-many-arguments
+    db_name: str, tsv_info: dict, checkpoint: UploadCheckpoint, bulk: bool, dependents: set[str]
+) -> None:
+    with upload_slot(), connect(db_name) as connection:
+        load_tsv_in_chunks(connection, db_name, tsv_info, checkpoint, bulk=bulk, dependents=dependents)
+
+
+def copy_into_table(cursor: cursor_type, table_name: str, file: Any, binary: bool = False) -> None:
+    """Copies data from file (file-like object with read and readline methods) into table, in text or binary format."""
+
+    if binary:
+        cursor.copy_expert(f'COPY "{table_name}" FROM STDIN WITH (FORMAT binary)', file, size=COPY_READ_SIZE)
+    else:
+        cursor.copy_from(file, table_name, sep="\t", null=NULL_TEXT, size=COPY_READ_SIZE)
+
+
+def truncate_table(cursor: cursor_type, db_name: str, table_name: str) -> None:
+    """Truncates table (cascading to the tables referencing it) and vacuums it."""
+
+    # TRUNCATE
+    logger.info(f"{db_name.upper()}: {table_name}: Attempting to truncate table")
+    truncate_statement = f'TRUNCATE "{table_name}" CASCADE'
+    cursor.execute(truncate_statement)
+    logger.info(f"{db_name.upper()}: {table_name}: Successfully truncated table")
+
+    # VACUUM (Cannot be inside a transaction block)
+    cursor.execute(f"VACUUM FULL {table_name}")
+    logger.info(f"{db_name.upper()}: {table_name}: Successfully vacuumed table")
+
+
+def _resume_progress(
+    cursor: cursor_type, db_name: str, table_name: str, progress: TableProgress
+) -> TableProgress | None:
+    """
+    Checks the saved progress of a partially loaded table against the table's row count (the chunk being loaded when
+    the upload was interrupted may or may not have been committed). Returns the progress to resume from, or None if the
+    table does not match its progress (and must be loaded from scratch).
+    """
+
+    cursor.execute(f'SELECT count(*) FROM "{table_name}"')
+    (count,) = cursor.fetchone()
+
+    if progress.chunk_end is not None and count == progress.rows + progress.chunk_rows:
+        progress.offset, progress.rows = progress.chunk_end, count
+    elif count != progress.rows:
+        logger.warning(
+            f"{db_name.upper()}: {table_name}: Table has {count} rows, but {progress.rows} were checkpointed: "
+            "reloading it from scratch"
+        )
+        return None
+
+    progress.chunk_end, progress.chunk_rows = None, 0
+    return progress
+
+
+def _start_progress(  # pylint: disable=too-many-arguments
+    cursor: cursor_type,
+    db_name: str,
+    table_name: str,
+    *,
+    saved_progress: TableProgress | None,
+    source: dict,
+    dependents: set[str],
+    checkpoint: UploadCheckpoint,
+) -> TableProgress:
+    """Progress to load a table from: its saved progress if it can be resumed, otherwise that of the emptied table."""
+
+    progress = None if saved_progress is None else _resume_progress(cursor, db_name, table_name, saved_progress)
+    if progress is not None:
+        logger.info(f"{db_name.upper()}: {table_name}: Resuming upload after {progress.rows} rows")
+        return progress
+
+    truncate_table(cursor, db_name, table_name)
+    # the truncate cascaded to the tables referencing this one, so these must be loaded from scratch too
+    checkpoint.discard(f"{db_name}.{dependent}" for dependent in dependents)
+
+    # (bulk load definitions saved by an interrupted load are kept, even for another file or after a cascading
+    # truncate, as its indexes may not have been recreated)
+    return TableProgress(source=source, definitions=checkpoint.definitions(f"{db_name}.{table_name}"))
+
+
+def _copy_chunks(
+    cursor: cursor_type, name: str, chunks: CopyChunks, progress: TableProgress, checkpoint: UploadCheckpoint
+) -> None:
+    table_name = name.split(".", 1)[1]
+    for chunk in chunks:
+        # (the chunk is recorded before copying it, so that a resumed upload can tell whether it was committed)
+        progress.chunk_end, progress.chunk_rows = chunk.end, chunk.rows
+        checkpoint.save(name, progress)
+        copy_into_table(cursor, table_name, io.BytesIO(chunk.data), binary=chunks.binary)
+        progress.offset, progress.rows = chunk.end, progress.rows + chunk.rows
+        progress.chunk_end, progress.chunk_rows = None, 0
+        checkpoint.save(name, progress)
+
+
+def load_tsv_in_chunks(  # pylint: disable=too-many-arguments
+    connection: connection_type,
+    db_name: str,
+    tsv_info: dict,
+    checkpoint: UploadCheckpoint,
+    *,
+    bulk: bool = False,
+    dependents: set[str] | None = None,
+) -> None:
+    """
+    Truncates table and copies in new data from its tsv in chunks of about UPLOAD_CHUNK_SIZE bytes, each committed on
+    its own, saving progress to checkpoint after every step (so that an interrupted upload resumes from the last chunk).
+
+    :param connection: autocommit connection to db_name
+    :param db_name: name of database to act on.
+    :param tsv_info: tsv to load (see all_tsv_info)
+    :param checkpoint: upload progress to resume from and save to
+    :param bulk: whether to drop the table's indexes and foreign keys while copying (see bulk_loading)
+    :param dependents: tables referencing the table (see _dependents), whose progress is discarded if it is truncated
+    """
+
+    table_name, name = tsv_info["table"], f"{db_name}.{tsv_info['table']}"
+    path = tsv_info["path"]
+    cursor = connection.cursor()
+
+    saved_progress = checkpoint.progress(name, file_source(path))
+    if saved_progress is not None and saved_progress.complete:
+        logger.info(f"{db_name.upper()}: {table_name}: Already uploaded, skipping")
+        return
+
+    progress = _start_progress(
+        cursor,
+        db_name,
+        table_name,
+        saved_progress=saved_progress,
+        source=file_source(path),
+        dependents=dependents or set(),
+        checkpoint=checkpoint,
+    )
+    if bulk and progress.definitions is None:
+        # saved before anything is dropped, so that an interrupted bulk load can recreate them
+        progress.definitions = asdict(capture_definitions(cursor, table_name))
+    elif not bulk and progress.definitions is not None:
+        logger.warning(f"{db_name.upper()}: {table_name}: Restoring definitions dropped by an interrupted bulk load")
+        restore_definitions(partial(connect, db_name), table_name, TableDefinitions(**progress.definitions))
+        progress.definitions = None
+    checkpoint.save(name, progress)
+
+    # UPLOAD/COPY (decompressed as it is copied, if compressed)
+    logger.info(f"{db_name.upper()}: {table_name}: Attempting to copy data into table")
+    start_time = time.time()
+    with open_compressed(path, "rb", tsv_info["compression"]) as file:
+        with (
+            bulk_loading(connection, partial(connect, db_name), table_name, TableDefinitions(**progress.definitions))
+            if bulk and progress.definitions is not None
+            else nullcontext()
+        ):
+            _copy_chunks(
+                cursor, name, CopyChunks(file, tsv_info["binary"], offset=progress.offset), progress, checkpoint
+            )
+    report_load_time(name, time.time() - start_time, bulk)
+    logger.info(f"{db_name.upper()}: {table_name}: Successfully uploaded {progress.rows} rows")
+
+    progress.complete, progress.definitions = True, None
+    checkpoint.save(name, progress)
+
+
+def repopulate_table(  # pylint: disable=too-many-arguments
+    connection: connection_type, db_name: str, table_name: str, file: Any, *, bulk: bool = False, binary: bool = False
+) -> None:
+    """
+    Truncates table and copies in new data from file.
+
+    :param connection: autocommit connection to db_name
+    :param db_name: name of database to act on.
+    :param table_name: table to repopulate.
+    :param file: file-like object (with read and readline methods) to copy data from.
+    :param bulk: whether to drop the table's indexes and foreign keys while copying (see bulk_loading).
+    :param binary: whether file holds binary (rather than text) COPY data.
+    """
+
+    cursor = connection.cursor()
+    truncate_table(cursor, db_name, table_name)
+
+    # UPLOAD/COPY
+    logger.info(f"{db_name.upper()}: {table_name}: Attempting to copy data into table")
+    start_time = time.time()
+    with bulk_loading(connection, partial(connect, db_name), table_name) if bulk else nullcontext():
+        copy_into_table(cursor, table_name, file, binary=binary)
+    report_load_time(f"{db_name}.{table_name}", time.time() - start_time, bulk)
+    logger.info(f"{db_name.upper()}: {table_name}: Successfully uploaded data")
+
 
 class DataTaskHandler:
     """Handles whole Data Upload journey for all databases."""
 
-    def repopulate_all_databases(self) -> None:
-        """Sorts all_tsv_info per database and executes per-database truncation and copy tasks."""
+    def __init__(self, bulk_load: bool = False, binary: bool = False, directory: str = TSV_BASE_DIR) -> None:
+        self.bulk_load = bulk_load  # whether to drop and rebuild indexes and foreign keys around each copy
+        self.binary = binary  # whether to stream rows as binary (rather than text) COPY data (see stream_all_tables)
+        # directory of the dataset to upload (see dataset_cache.dataset_directory), relative to the project root
+        self.directory = os.path.join(settings.PROJECT_ROOT, directory)
+        self.load_report: dict[str, dict] = {}  # post-load report per database loaded (see post_load)
+        self.grown_databases: list[str] = []  # databases whose appended rows were committed (see append_all_tables)
 
-        polaris_tsvs = []
-        vela_tsvs = []
-        carina_tsvs = []
+    def repopulate_all_databases(self, tables: Collection[str] | None = None) -> None:
+        """
+        Sorts all_tsv_info per database and repopulates the databases in parallel (see
+        truncate_and_repopulate_all_tables), after checking the dataset's files against its manifest, resuming from
+        UPLOAD_CHECKPOINT_FILE if a previous upload was interrupted. A load report is then written to LOAD_REPORT_FILE.
 
-        #  Sort tables per db
-        for tsv in self.all_tsv_info:
-            if tsv["db"] == POLARIS_DB:
-                polaris_tsvs.append(tsv)
-            elif tsv["db"] == VELA_DB:
-                vela_tsvs.append(tsv)
-            elif tsv["db"] == CARINA_DB:
-                carina_tsvs.append(tsv)
+        :param tables: names ("<db>.<table>") of the tables to repopulate (see select_tables), None for all. Raises
+         ValueError if the dataset is missing any (see Manifest.missing).
+        """
+
+        manifest = self.selected_manifest(tables)
+        verify_files(manifest, self.directory, max_workers=UPLOAD_CONCURRENCY)
+        logger.info(f"Verified dataset checksums in {self.directory}")
+
+        checkpoint = UploadCheckpoint()
+        if checkpoint.tables:
+            logger.info(f"Resuming upload from checkpoint {checkpoint.path}")
+
+        tsvs_by_db: dict[str, list] = {VELA_DB: [], CARINA_DB: [], POLARIS_DB: []}
+
+        #  Sort (selected) tables per db, leaving out databases with none
+        for tsv in self._tsv_info(manifest):
+            if tsv["db"] in tsvs_by_db:
+                tsvs_by_db[tsv["db"]].append(tsv)
+        tsvs_by_db = {db_name: tsv_info_list for db_name, tsv_info_list in tsvs_by_db.items() if tsv_info_list}
+
+        workers = _share_workers(
+            {db_name: sum(tsv["bytes"] for tsv in tsv_info_list) for db_name, tsv_info_list in tsvs_by_db.items()},
+            {db_name: len(tsv_info_list) for db_name, tsv_info_list in tsvs_by_db.items()},
+        )
 
         #  Upload tables per db
-        self.truncate_and_repopulate_all_tables(tsv_info_list=vela_tsvs, db_name=VELA_DB)
-        self.truncate_and_repopulate_all_tables(tsv_info_list=carina_tsvs, db_name=CARINA_DB)
-        self.truncate_and_repopulate_all_tables(tsv_info_list=polaris_tsvs, db_name=POLARIS_DB)
+        run_task_graph(
+            {
+                db_name: partial(
+                    self.truncate_and_repopulate_all_tables,
+                    tsv_info_list=tsv_info_list,
+                    db_name=db_name,
+                    checkpoint=checkpoint,
+                    max_workers=workers[db_name],
+                )
+                for db_name, tsv_info_list in tsvs_by_db.items()
+            },
+            prerequisites={},
+            max_workers=max(len(tsvs_by_db), 1),
+        )
+        checkpoint.remove()
+
+        write_load_report(self.load_report)
+        verify_row_counts(self.load_report)
 
-    @staticmethod
-    def truncate_and_repopulate_all_tables(tsv_info_list: list, db_name: str) -> None:
+    def truncate_and_repopulate_all_tables(
+        self,
+        tsv_info_list: list,
+        db_name: str,
+        checkpoint: UploadCheckpoint | None = None,
+        max_workers: int = UPLOAD_CONCURRENCY,
+    ) -> None:
         """
-        (Per table/tsv): Truncates table and then copies in new data from tsv.
+        (Per table/tsv): Truncates table and then copies in new data from tsv, each table once the tables it references
+        have been repopulated (as truncating those cascades to it), largest first. The database's report (see post_load)
+        is then added to load_report.
 
         :param tsv_info_list: list of dictionaries containing information about which table and database each tsv should
          be loaded to, and in what order.
         :param db_name: name of database to act on.
+        :param checkpoint: upload progress to resume from and save to (see load_tsv_in_chunks)
+        :param max_workers: maximum number of tables repopulated at once
         """
 
         logger.info(f"{db_name.upper()}: Beginning database re-population ...")
+        checkpoint = checkpoint or UploadCheckpoint()
 
-        connection_string = DB_CONNECTION_URI.replace("/postgres?", f"/{db_name}?")
-        connection = psycopg2.connect(connection_string)
-        connection.autocommit = True
-        # All execute statements will run immediately, rather than in a larger transaction. This is because VACUUM
-        # cannot work in a transaction.
-
-        for tsv_info in tsv_info_list:
-
-            cursor = connection.cursor()
-            table_name = tsv_info["table"]
-            file_name = tsv_info["filename"]
-
-            # TRUNCATE
-            logger.info(f"{db_name.upper()}: {table_name}: Attempting to truncate table")
-            truncate_statement = f'TRUNCATE "{table_name}" CASCADE'
-            cursor.execute(truncate_statement)
-            logger.info(f"{db_name.upper()}: {table_name}: Successfully truncated table")
-
-            # VACUUM (Cannot be inside a transaction block)
-            cursor = connection.cursor()
-            cursor.execute(f"VACUUM FULL {table_name}")
-            logger.info(f"{db_name.upper()}: {table_name}: Successfully vacuumed table")
-
-            # UPLOAD/COPY
-            logger.info(f"{db_name.upper()}: {table_name}: Attempting to copy data into table")
-            with open(os.path.join(TSV_BASE_DIR, file_name), encoding="utf-8") as file:
-                cursor.copy_from(file, table_name, sep="\t", null="NULL")
-            logger.info(f"{db_name.upper()}: {table_name}: Successfully uploaded data")
-
-            # UPDATE SEQUENCES
-
-            column = {
-                "retry_task": "retry_task_id",
-                "task_type": "task_type_id",
-                "task_type_key": "task_type_key_id",
-            }.get(table_name, "id")
-
-            sequence_name = f"'{table_name}_{column}_seq'"
-            query_statement = f"SELECT * FROM pg_class where relname = {sequence_name}"
-            cursor.execute(query_statement)
-            if cursor.fetchone() is not None:
-                logger.info(f"{db_name.upper()}: {table_name}: Attempting to update table seq")
-                update_seq_statement = (
-                    f"select setval({sequence_name}, (select max({column})+1 from {table_name}), false)"
-                )
-                cursor.execute(update_seq_statement)
-                logger.info(f"{db_name.upper()}: {table_name}: Successfully update sequence")
+        with connect(db_name) as connection:
+            parents = _foreign_key_parents(connection)
 
-        connection.close()
+        tables = {
+            tsv_info["table"]: partial(
+                _repopulate_from_tsv,
+                db_name,
+                tsv_info,
+                checkpoint,
+                self.bulk_load,
+                _dependents(parents, tsv_info["table"]),
+            )
+            for tsv_info in sorted(tsv_info_list, key=lambda tsv_info: tsv_info["bytes"], reverse=True)
+        }
+        run_task_graph(
+            tables,
+            prerequisites={table: parents.get(table, set()) & tables.keys() for table in tables},
+            max_workers=max_workers,
+        )
         logger.info(f"{db_name.upper()}: All tables successfully repopulated")
 
-        # Vacuum must be done outside of a transaction and so must be called by an autocommit connection
+        with connect(db_name) as connection:
+            self.load_report[db_name] = post_load(
+                connection,
+                partial(connect, db_name),
+                {tsv_info["table"]: tsv_info["rows"] for tsv_info in tsv_info_list},
+                max_workers=max_workers,
+            )
+
+    def stream_all_tables(self, tables: Iterable[tuple[str, str, Iterable[list]]]) -> None:
+        """
+        (Per table): Truncates table and then copies in rows straight from their generator, without writing tsvs. Once
+        all tables are loaded, a load report (see post_load) is written and row counts are checked against the rows
+        streamed.
+
+        :param tables: (database name, table name, rows) for each table, in the order they should be loaded
+        """
+
+        connections: dict = {}
+        expected_rows: dict[str, dict[str, int | None]] = {}
+
+        with ExitStack() as stack:
+            for db_name, table_name, rows in tables:
+                if db_name not in connections:
+                    logger.info(f"{db_name.upper()}: Beginning database re-population ...")
+                    connections[db_name] = stack.enter_context(connect(db_name))
+                streamed = _CountedRows(rows)
+
+                encode = None
+                if self.binary:
+                    with connections[db_name].cursor() as cursor:
+                        encode = partial(encode_binary_copy, column_types=fetch_column_types(cursor, table_name))
+
+                with RowReader(streamed, encode=encode) as reader, upload_slot():
+                    repopulate_table(
+                        connections[db_name], db_name, table_name, reader, bulk=self.bulk_load, binary=self.binary
+                    )
+                expected_rows.setdefault(db_name, {})[table_name] = streamed.count
+            logger.info("All tables successfully repopulated")
+
+            for db_name, db_expected_rows in expected_rows.items():
+                self.load_report[db_name] = post_load(connections[db_name], partial(connect, db_name), db_expected_rows)
+
+        write_load_report(self.load_report)
+        verify_row_counts(self.load_report)
+
+    def append_all_tables(self, tables: Iterable[tuple[str, str, Iterable[list]]]) -> None:
+        """
+        (Per table): Copies rows straight from their generator onto the end of the table, without truncating it (see
+        tasks.grow), in a transaction per database. Databases are committed one after the other once all tables are
+        copied, so a failed commit leaves those committed before it grown (see grown_databases). A load report (see
+        post_load) is then written and row counts are checked.
+
+        :param tables: (database name, table name, rows) for each table, in the order they should be appended
+        """
+
+        connections: dict = {}
+        expected_rows: dict[str, dict[str, int | None]] = {}
+
+        with ExitStack() as stack:
+            for db_name, table_name, rows in tables:
+                if db_name not in connections:
+                    logger.info(f"{db_name.upper()}: Beginning database growth ...")
+                    # (committed by commit_growth once all tables of all databases are appended, rolled back otherwise)
+                    connections[db_name] = stack.enter_context(pooled_connection(db_name))
+                expected_rows.setdefault(db_name, {})[table_name] = self.append_table(
+                    connections[db_name], db_name, table_name, rows
+                )
+            logger.info("All tables successfully appended to")
+            self.commit_growth(connections)
+
+        for db_name, db_expected_rows in expected_rows.items():
+            with connect(db_name) as connection:
+                self.load_report[db_name] = post_load(connection, partial(connect, db_name), db_expected_rows)
+
+        write_load_report(self.load_report)
+        verify_row_counts(self.load_report)
+
+    def commit_growth(self, connections: dict[str, connection_type]) -> None:
+        """Commits the rows appended over each database's connection, recording the databases grown."""
+
+        for db_name, connection in connections.items():
+            try:
+                connection.commit()
+            except psycopg2.Error:
+                not_grown = [name for name in connections if name not in self.grown_databases]
+                logger.error(
+                    f"{db_name.upper()}: Could not commit appended rows. Databases grown: {self.grown_databases}, not "
+                    f"grown: {not_grown}"
+                )
+                raise
+            self.grown_databases.append(db_name)
+            logger.info(f"{db_name.upper()}: Appended rows committed")
+
+    def append_table(self, connection: connection_type, db_name: str, table_name: str, rows: Iterable[list]) -> int:
+        """
+        Copies rows onto the end of table (as binary COPY data if binary is set), within connection's transaction.
+        Returns the table's expected row count: its rows before, plus those appended.
+        """
+
+        appended = _CountedRows(rows)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM "{table_name}"')
+            (count,) = cursor.fetchone()
+
+            encode = None
+            if self.binary:
+                encode = partial(encode_binary_copy, column_types=fetch_column_types(cursor, table_name))
+
+            logger.info(f"{db_name.upper()}: {table_name}: Attempting to append data to table ({count} rows)")
+            start_time = time.time()
+            with RowReader(appended, encode=encode) as reader:
+                copy_into_table(cursor, table_name, reader, binary=self.binary)
+
+        logger.info(
+            f"{db_name.upper()}: {table_name}: Successfully appended {appended.count} rows in "
+            f"{time.time() - start_time:.2f} seconds"
+        )
+        return count + appended.count
 
     @property
     def all_tsv_info(self) -> list:
         """
-        :return: list of dictionaries containing information about which table and database each tsv should
-         be loaded to, and in what order.
+        :return: list of dictionaries (see manifest.TableFile) containing information about which table and database
+         each tsv (or binary COPY file, either possibly compressed) should be loaded to, and in what order, as read from
+         the dataset's manifest (with the path of each file added).
         """
-        tsv_data = []
 
-        for tsv in [f for f in os.listdir(settings.PROJECT_ROOT + "/" + TSV_BASE_DIR) if f[-4:] == ".tsv"]:
-            tsv_parts = tsv.replace(".tsv", "").split("-")
-            tsv_data.append({"filename": tsv, "db": tsv_parts[1], "table": tsv_parts[3], "order": int(tsv_parts[2])})
+        return self._tsv_info(read_manifest(self.directory))
+
+    def _tsv_info(self, manifest: Manifest) -> list:
+        return [
+            {**asdict(table), "path": os.path.join(self.directory, table.filename)}
+            for table in sorted(manifest.tables, key=lambda table: table.order)
+        ]
+
+    def selected_manifest(self, tables: Collection[str] | None = None) -> Manifest:
+        """
+        The dataset's manifest, restricted to tables (by "<db>.<table>", None for all). Raises ValueError if the
+        dataset is missing any of them (see Manifest.missing).
+        """
 
-        tsv_data.sort(key=lambda i: i["order"])  # tables sorted and populated in order they were created
+        manifest = read_manifest(self.directory)
+        if missing := set(manifest.missing) if tables is None else set(manifest.missing) & set(tables):
+            raise ValueError(
+                f"Dataset in {self.directory} is missing {', '.join(sorted(missing))}: generate them first"
+            )
 
-        return tsv_data
+        if tables is None:
+            return manifest
+        return replace(manifest, tables=[table for table in manifest.tables if f"{table.db}.{table.table}" in tables])
@@ -0,0 +1,130 @@
+import json
+import logging
+import time
+
+from functools import partial
+from typing import Callable, ContextManager
+
+from psycopg2.extensions import connection as connection_type
+from psycopg2.extensions import cursor as cursor_type
+
+from data_population.common.task_graph import run_task_graph
+from data_population.db_tasks.upload_slots import upload_slot
+from settings import LOAD_REPORT_FILE, UPLOAD_CONCURRENCY
+
+logger = logging.getLogger("PostLoad")
+
+
+def reset_sequences(cursor: cursor_type) -> int:
+    """
+    Resets every sequence owned by a column of a table in the current schema (i.e. serial and identity columns) to
+    follow on from the column's maximum value, in a single statement built from the catalog. Returns the number of
+    sequences reset.
+    """
+
+    cursor.execute(
+        """
+        SELECT sequence.relname, owner.relname, pg_attribute.attname
+        FROM pg_class sequence
+        JOIN pg_depend ON pg_depend.objid = sequence.oid AND pg_depend.classid = 'pg_class'::regclass
+            AND pg_depend.deptype IN ('a', 'i')
+        JOIN pg_class owner ON owner.oid = pg_depend.refobjid
+        JOIN pg_attribute ON pg_attribute.attrelid = owner.oid AND pg_attribute.attnum = pg_depend.refobjsubid
+        WHERE sequence.relkind = 'S' AND owner.relnamespace = current_schema()::regnamespace
+        ORDER BY sequence.relname
+        """
+    )
+    sequences = cursor.fetchall()
+    if not sequences:
+        return 0
+
+    setvals = ", ".join(
+        f"""setval('"{sequence}"', coalesce((SELECT max("{column}") FROM "{table}"), 0) + 1, false)"""
+        for sequence, table, column in sequences
+    )
+    cursor.execute(f"SELECT {setvals}")
+
+    return len(sequences)
+
+
+def _count_and_analyze(
+    connect: Callable[[], ContextManager[connection_type]], table_name: str, results: dict[str, dict]
+) -> None:
+    with upload_slot(), connect() as connection:
+        cursor = connection.cursor()
+        cursor.execute(f'SELECT count(*) FROM "{table_name}"')
+        (rows,) = cursor.fetchone()
+
+        start_time = time.time()
+        cursor.execute(f'ANALYZE "{table_name}"')
+        results[table_name] = {"rows": rows, "analyze_seconds": round(time.time() - start_time, 3)}
+
+
+def post_load(
+    connection: connection_type,
+    connect: Callable[[], ContextManager[connection_type]],
+    expected_rows: dict[str, int | None],
+    max_workers: int = UPLOAD_CONCURRENCY,
+) -> dict:
+    """
+    Runs after a database's tables have been loaded: resets all owned sequences (see reset_sequences), then counts and
+    ANALYZEs each loaded table.
+
+    :param connection: autocommit connection to the database
+    :param connect: callable returning a context managed autocommit connection to the same database (see
+     db_tasks.connect)
+    :param expected_rows: number of rows generated per loaded table (None where not known)
+    :param max_workers: maximum number of tables counted and analyzed at once
+    :return: the database's load report (see verify_row_counts)
+    """
+
+    start_time = time.time()
+    sequences_reset = reset_sequences(connection.cursor())
+
+    results: dict[str, dict] = {}
+    run_task_graph(
+        {table_name: partial(_count_and_analyze, connect, table_name, results) for table_name in expected_rows},
+        prerequisites={},
+        max_workers=max_workers,
+    )
+
+    return {
+        "tables": {
+            table_name: {"expected_rows": expected, **results[table_name]}
+            for table_name, expected in expected_rows.items()
+        },
+        "sequences_reset": sequences_reset,
+        "seconds": round(time.time() - start_time, 3),
+    }
+
+
+def verify_row_counts(report: dict[str, dict]) -> None:
+    """
+    Checks the row counts in a load report (by database, see post_load) against those generated, raising ValueError
+    listing any table whose count does not match.
+    """
+
+    mismatches = [
+        f"{db_name}.{table_name} ({table['rows']} rows, {table['expected_rows']} expected)"
+        for db_name, db_report in report.items()
+        for table_name, table in db_report["tables"].items()
+        if table["expected_rows"] is not None and table["rows"] != table["expected_rows"]
+    ]
+
+    if mismatches:
+        raise ValueError(f"Row counts do not match those generated: {', '.join(mismatches)}")
+
+
+def write_load_report(report: dict[str, dict]) -> None:
+    """Writes a load report (by database, see post_load) to LOAD_REPORT_FILE and logs a summary of it."""
+
+    with open(LOAD_REPORT_FILE, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for db_name, db_report in report.items():
+        logger.info(
+            f"{db_name.upper()}: {sum(table['rows'] for table in db_report['tables'].values())} rows in "
+            f"{len(db_report['tables'])} tables, {db_report['sequences_reset']} sequences reset, tables analyzed in "
+            f"{db_report['seconds']:.2f} seconds"
+        )
+    logger.info(f"Load report written to {LOAD_REPORT_FILE}")
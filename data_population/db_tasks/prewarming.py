@@ -0,0 +1,158 @@
+import logging
+
+import psycopg2
+
+from psycopg2.extensions import cursor as cursor_type
+
+from data_population.db_tasks.db_tasks import connect
+from settings import CARINA_DB, POLARIS_DB, VELA_DB
+
+logger = logging.getLogger("Prewarm")
+
+# Tables read or written by the requests of locust's UserTasks (enrolment, get by credentials, get account, marketing
+# unsubscribe, transactions and account deletion, and the retry tasks these enqueue), by database
+HOT_TABLES = {
+    POLARIS_DB: (
+        "account_holder",
+        "account_holder_profile",
+        "account_holder_marketing_preference",
+        "account_holder_campaign_balance",
+        "account_holder_reward",
+        "account_holder_pending_reward",
+        "retailer_config",
+        "retry_task",
+        "task_type_key_value",
+    ),
+    VELA_DB: (
+        "retailer_rewards",
+        "campaign",
+        "earn_rule",
+        "reward_rule",
+        "transaction",
+        "processed_transaction",
+        "retry_task",
+        "task_type_key_value",
+    ),
+    CARINA_DB: ("retailer", "reward_config", "reward", "retry_task", "task_type_key_value"),
+}
+
+
+def _has_pg_prewarm(cursor: cursor_type, db_name: str) -> bool:
+    """Whether pg_prewarm is installed in the database, installing it if it is available (and permissions allow)."""
+
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'")
+    if cursor.fetchone() is not None:
+        return True
+
+    try:
+        cursor.execute("CREATE EXTENSION pg_prewarm")
+    except psycopg2.Error as ex:
+        logger.warning(f"{db_name.upper()}: pg_prewarm unavailable ({str(ex).strip()}), falling back to scans")
+        return False
+
+    return True
+
+
+def _indexes(cursor: cursor_type, table_name: str) -> list[tuple[str, str]]:
+    """Names of a table's indexes, with the expression of each index's first key column."""
+
+    cursor.execute(
+        "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid, 1, true) FROM pg_index "
+        "WHERE indrelid = %s::regclass",
+        (table_name,),
+    )
+    return cursor.fetchall()
+
+
+def _relation_pages(cursor: cursor_type, relation: str) -> int:
+    cursor.execute("SELECT pg_relation_size(%s::regclass) / current_setting('block_size')::int", (relation,))
+    return cursor.fetchone()[0]
+
+
+def _scan(cursor: cursor_type, table_name: str, indexes: list[tuple[str, str]]) -> int:
+    """
+    Fallback for pg_prewarm: reads a table, and each of its (btree) indexes with a full index scan. Returns the pages of
+    the relations scanned (of which only some are left in shared buffers, for large tables).
+    """
+
+    cursor.execute(f'SELECT count(*) FROM "{table_name}"')
+    pages = _relation_pages(cursor, table_name)
+
+    cursor.execute("SET enable_seqscan = off; SET enable_bitmapscan = off")
+    try:
+        for index_name, first_key in indexes:
+            cursor.execute(
+                f'SELECT count(*) FROM (SELECT {first_key} FROM "{table_name}" ORDER BY {first_key}) AS scan'
+            )
+            pages += _relation_pages(cursor, index_name)
+    finally:
+        cursor.execute("RESET enable_seqscan; RESET enable_bitmapscan")
+
+    return pages
+
+
+def _prewarm_table(cursor: cursor_type, table_name: str, use_pg_prewarm: bool) -> int:
+    """Loads a table and its indexes into shared buffers. Returns the number of pages warmed."""
+
+    indexes = _indexes(cursor, table_name)
+    if not use_pg_prewarm:
+        return _scan(cursor, table_name, indexes)
+
+    pages = 0
+    for relation in [table_name, *(index_name for index_name, _ in indexes)]:
+        cursor.execute("SELECT pg_prewarm(%s::regclass)", (relation,))
+        pages += cursor.fetchone()[0]
+
+    return pages
+
+
+def _log_results(results: dict[str, dict[str, int]], scanned: set[str], shared_buffers: int) -> None:
+    """Logs the pages warmed (see prewarm_databases) per table and in total, with those of scanned databases apart."""
+
+    for db_name, db_results in results.items():
+        for table_name, pages in db_results.items():
+            logger.info(
+                f"{db_name.upper()}: {table_name}: {'Scanned' if db_name in scanned else 'Warmed'} {pages} pages"
+            )
+
+    total = sum(pages for db_results in results.values() for pages in db_results.values())
+    scanned_total = sum(pages for db_name in scanned for pages in results[db_name].values())
+    logger.info(
+        f"Warmed {total - scanned_total} pages and scanned {scanned_total} pages in total ({shared_buffers} pages of "
+        "shared buffers)"
+    )
+    if scanned_total:
+        logger.info("Scanned pages are those read: only some of those of large tables are left in shared buffers")
+    if total > shared_buffers:
+        logger.warning("More pages warmed (or scanned) than fit in shared buffers: some will have been evicted again")
+
+
+def prewarm_databases(tables: dict[str, tuple[str, ...]] | None = None) -> dict[str, dict[str, int]]:
+    """
+    Loads the tables hit by a load test, and their indexes, into shared buffers (with pg_prewarm if available, otherwise
+    by scanning them), so that a load test measures steady-state latency rather than disk reads.
+
+    :param tables: tables to warm by database (HOT_TABLES by default)
+    :return: pages warmed (or, where scanned, pages read, see _scan) per table by database
+    """
+
+    results: dict[str, dict[str, int]] = {}
+    scanned: set[str] = set()  # databases without pg_prewarm, whose pages are those read rather than those warmed
+    shared_buffers = 0
+
+    for db_name, table_names in (HOT_TABLES if tables is None else tables).items():
+        with connect(db_name) as connection:
+            cursor = connection.cursor()
+            use_pg_prewarm = _has_pg_prewarm(cursor, db_name)
+            if not use_pg_prewarm:
+                scanned.add(db_name)
+            results[db_name] = {
+                table_name: _prewarm_table(cursor, table_name, use_pg_prewarm) for table_name in table_names
+            }
+
+            cursor.execute("SELECT setting::bigint FROM pg_settings WHERE name = 'shared_buffers'")
+            (shared_buffers,) = cursor.fetchone()
+
+    _log_results(results, scanned, shared_buffers)
+
+    return results
@@ -0,0 +1,109 @@
+import logging
+
+from typing import Callable
+
+import psycopg2
+
+from psycopg2.extensions import cursor as cursor_type
+
+from data_population.common.connection_pool import close_all_pools
+from settings import CARINA_DB, DB_CONNECTION_URI, POLARIS_DB, SNAPSHOT_TEMPLATE_SUFFIX, VELA_DB
+
+logger = logging.getLogger("Snapshots")
+
+DATABASES = (POLARIS_DB, VELA_DB, CARINA_DB)
+
+
+def template_name(db_name: str) -> str:
+    return f"{db_name}{SNAPSHOT_TEMPLATE_SUFFIX}"
+
+
+def _database_owner(cursor: cursor_type, db_name: str) -> str | None:
+    cursor.execute("SELECT pg_get_userbyid(datdba) FROM pg_database WHERE datname = %s", (db_name,))
+    result = cursor.fetchone()
+    return None if result is None else result[0]
+
+
+def _drop_connections(cursor: cursor_type, db_name: str) -> None:
+    """Terminates all other sessions connected to db_name (which would otherwise block copying or dropping it)."""
+    cursor.execute(
+        "SELECT pg_terminate_backend(pid) FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid()",
+        (db_name,),
+    )
+    logger.info(f"{db_name.upper()}: Dropped {cursor.rowcount} connections")
+
+
+def _snapshot_database(cursor: cursor_type, db_name: str) -> None:
+    template = template_name(db_name)
+
+    if _database_owner(cursor, template) is not None:
+        cursor.execute(f'ALTER DATABASE "{template}" IS_TEMPLATE false')
+        cursor.execute(f'DROP DATABASE "{template}"')
+        logger.info(f"{db_name.upper()}: Dropped previous snapshot {template}")
+
+    # No new sessions may connect to the database while it is being copied
+    cursor.execute(f'ALTER DATABASE "{db_name}" ALLOW_CONNECTIONS false')
+    try:
+        _drop_connections(cursor, db_name)
+        cursor.execute(f'CREATE DATABASE "{template}" TEMPLATE "{db_name}" OWNER "{_database_owner(cursor, db_name)}"')
+    finally:
+        cursor.execute(f'ALTER DATABASE "{db_name}" ALLOW_CONNECTIONS true')
+
+    # Marked as a template, that nothing connects to (which would block resets)
+    cursor.execute(f'ALTER DATABASE "{template}" IS_TEMPLATE true ALLOW_CONNECTIONS false')
+    logger.info(f"{db_name.upper()}: Snapshot {template} created")
+
+
+def _reset_database(cursor: cursor_type, db_name: str) -> None:
+    template = template_name(db_name)
+
+    if _database_owner(cursor, template) is None:
+        raise ValueError(f"No snapshot of {db_name} to reset from ({template} does not exist), run the snapshot task")
+
+    owner = _database_owner(cursor, db_name)
+
+    if owner is not None:
+        cursor.execute(f'ALTER DATABASE "{db_name}" ALLOW_CONNECTIONS false')
+        dropped = False
+        try:
+            _drop_connections(cursor, db_name)
+            cursor.execute(f'DROP DATABASE "{db_name}"')
+            dropped = True
+        finally:
+            if not dropped:  # (left as it was, rather than locked out)
+                cursor.execute(f'ALTER DATABASE "{db_name}" ALLOW_CONNECTIONS true')
+
+    owner_clause = "" if owner is None else f' OWNER "{owner}"'
+    cursor.execute(f'CREATE DATABASE "{db_name}" TEMPLATE "{template}"{owner_clause}')
+    logger.info(f"{db_name.upper()}: Reset from snapshot {template}")
+
+
+def _run_on_all_databases(action: Callable[[cursor_type, str], None]) -> None:
+    # CREATE/DROP DATABASE cannot run in a transaction, nor while connected to the database acted on (so this process'
+    # own idle pooled connections are closed first)
+    close_all_pools()
+    connection = psycopg2.connect(DB_CONNECTION_URI)
+    connection.autocommit = True
+
+    try:
+        with connection.cursor() as cursor:
+            for db_name in DATABASES:
+                action(cursor, db_name)
+    finally:
+        connection.close()
+
+
+def snapshot_databases() -> None:
+    """
+    Creates template copies (snapshots) of the Polaris, Vela and Carina databases, replacing any previous snapshots.
+    Sessions connected to each database are dropped (and new ones refused) while it is copied.
+    """
+    _run_on_all_databases(_snapshot_database)
+
+
+def reset_databases() -> None:
+    """
+    Recreates the Polaris, Vela and Carina databases from their snapshots (see snapshot_databases), dropping any
+    sessions connected to them first.
+    """
+    _run_on_all_databases(_reset_database)
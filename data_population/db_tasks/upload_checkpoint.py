@@ -0,0 +1,91 @@
+import json
+import os
+import threading
+
+from dataclasses import asdict, dataclass
+from typing import Iterable
+
+from settings import UPLOAD_CHECKPOINT_FILE
+
+
+def file_source(path: str) -> dict:
+    """Identifies a file being uploaded (by name, size and modification time), so that progress is not resumed for a
+    file that has since been regenerated."""
+
+    stat = os.stat(path)
+    return {"filename": os.path.basename(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+@dataclass
+class TableProgress:
+    source: dict  # file being loaded into the table (see file_source)
+    offset: int = 0  # offset in the file's (uncompressed) data up to which rows have been loaded
+    rows: int = 0  # number of rows loaded
+    chunk_end: int | None = None  # offset of the end of the chunk being loaded (None between chunks)
+    chunk_rows: int = 0  # number of rows in the chunk being loaded
+    definitions: dict | None = None  # indexes and foreign keys dropped for a bulk load (see bulk_loading)
+    complete: bool = False  # whether the table has been fully loaded
+
+
+class UploadCheckpoint:
+    """
+    Upload progress per table (by "<database name>.<table name>"), saved to UPLOAD_CHECKPOINT_FILE after each step so
+    that an interrupted upload can be resumed where it stopped. Safe to use from several threads.
+    """
+
+    def __init__(self, path: str = UPLOAD_CHECKPOINT_FILE) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.tables: dict[str, TableProgress] = {}
+
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as file:
+                self.tables = {name: TableProgress(**progress) for name, progress in json.load(file).items()}
+
+    def progress(self, name: str, source: dict) -> TableProgress | None:
+        """Saved progress of a table, if any was saved while loading the same file (see file_source)."""
+
+        with self.lock:
+            progress = self.tables.get(name)
+
+        return progress if progress is not None and progress.source == source else None
+
+    def definitions(self, name: str) -> dict | None:
+        """Bulk load definitions saved for a table (see TableProgress.definitions), for whichever file."""
+
+        with self.lock:
+            progress = self.tables.get(name)
+
+        return None if progress is None else progress.definitions
+
+    def save(self, name: str, progress: TableProgress) -> None:
+        with self.lock:
+            self.tables[name] = progress
+            self._write()
+
+    def discard(self, names: Iterable[str]) -> None:
+        """
+        Forgets the progress of tables (e.g. emptied by a cascading truncate), keeping any bulk load definitions saved
+        for them, which may still need recreating.
+        """
+
+        with self.lock:
+            for name in names:
+                progress = self.tables.pop(name, None)
+                if progress is not None and progress.definitions is not None:
+                    self.tables[name] = TableProgress(source={}, definitions=progress.definitions)
+            self._write()
+
+    def remove(self) -> None:
+        """Removes the checkpoint file, once the upload has completed."""
+
+        with self.lock:
+            self.tables = {}
+            if os.path.isfile(self.path):
+                os.remove(self.path)
+
+    def _write(self) -> None:
+        # written in full and then moved into place, so that an interruption cannot leave a partial checkpoint
+        with open(f"{self.path}.tmp", "w", encoding="utf-8") as file:
+            json.dump({name: asdict(progress) for name, progress in self.tables.items()}, file, indent=2)
+        os.replace(f"{self.path}.tmp", self.path)
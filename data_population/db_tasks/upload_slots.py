@@ -0,0 +1,34 @@
+import threading
+
+from contextlib import contextmanager
+from typing import Generator
+
+from settings import UPLOAD_CONCURRENCY
+
+# Connections copying, rebuilding indexes or analyzing at once, across all databases being uploaded
+_slots = threading.BoundedSemaphore(UPLOAD_CONCURRENCY)
+
+
+@contextmanager
+def upload_slot() -> Generator[None, None, None]:
+    """Holds one of the UPLOAD_CONCURRENCY upload slots for the duration of the context, waiting for one to be free."""
+
+    with _slots:
+        yield
+
+
+@contextmanager
+def spare_upload_slots(wanted: int) -> Generator[int, None, None]:
+    """
+    Holds up to wanted upload slots for the duration of the context, of those free right now (without waiting, so that
+    a task already holding a slot can use spare ones without deadlocking), yielding the number held.
+    """
+
+    held = 0
+    try:
+        while held < wanted and _slots.acquire(blocking=False):
+            held += 1
+        yield held
+    finally:
+        for _ in range(held):
+            _slots.release()
@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import resource
+import shutil
+import tempfile
+
+from dataclasses import asdict, dataclass, field
+
+from data_population.data_config import STRUCTURAL_FIELDS, DataConfig
+from data_population.db_tasks.copy_benchmark import benchmark_copy_rates
+from data_population.tsv_creation.fixtures import (
+    carina_retry_task_types_to_populate,
+    fetch_task_type_keys,
+    fetch_task_types_ids,
+    polaris_retry_task_types_to_populate,
+    vela_retry_task_types_to_populate,
+)
+from data_population.tsv_creation.generators.task_generators import retry_task_count
+from data_population.tsv_creation.manifest import read_manifest
+from data_population.tsv_creation.tsv_manager import TSVHandler
+from data_population.tsv_creation.uuid_array import UUID_SIZE
+from settings import (
+    CARINA_DB,
+    GENERATION_PROCESSES,
+    PLAN_REPORT_FILE,
+    POLARIS_DB,
+    TSV_BASE_DIR,
+    TSV_COMPRESSION,
+    UPLOAD_CONCURRENCY,
+    VELA_DB,
+)
+
+logger = logging.getLogger("Planner")
+
+CALIBRATION_ROWS = 5000  # maximum of each (non-structural) data config count generated and loaded to calibrate a plan
+HEADROOM = 1.2  # factor estimates are multiplied by before checking them against the memory and disk available
+
+RETRY_TASK_TYPES = {
+    VELA_DB: vela_retry_task_types_to_populate,
+    CARINA_DB: carina_retry_task_types_to_populate,
+    POLARIS_DB: polaris_retry_task_types_to_populate,
+}
+
+
+@dataclass
+class TablePlan:
+    rows: int  # number of rows generated (exact)
+    bytes: int  # size of the table's file (as written, i.e. compressed if compressed)
+    generation_seconds: float  # time taken to generate and write the table on one process
+    upload_seconds: float  # time taken to copy the table into its database on one connection
+
+
+@dataclass
+class Plan:
+    """
+    Estimates of what generating and uploading a data config takes (see plan_data_config). Only row counts are exact:
+    the rest is extrapolated from a small calibration run, so is only a guide (larger data configs have longer ids, and
+    post-load steps such as analyzing tables are not included).
+    """
+
+    data_config: dict
+    seed: int
+    binary: bool
+    compression: str | None
+    tables: dict[str, TablePlan]  # by "<db>.<table>", in generation order
+    generation_seconds: float  # with GENERATION_PROCESSES processes
+    upload_seconds: float  # with UPLOAD_CONCURRENCY workers (across all databases)
+    memory_bytes: int  # peak memory use of generation (including process pool workers)
+    available_memory_bytes: int  # memory available to generation (including that already held by this process)
+    disk_bytes: int  # disk space needed by the dataset (at peak, while a sharded table's parts are joined)
+    free_disk_bytes: int  # free space on the filesystem of TSV_BASE_DIR
+    problems: list[str] = field(default_factory=list)  # reasons the machine cannot generate the data config
+
+    def check(self) -> None:
+        """Sets problems: memory or disk space (with HEADROOM) this machine is short of."""
+
+        self.problems = []
+        if self.memory_bytes * HEADROOM > self.available_memory_bytes:
+            self.problems.append(
+                f"generation needs about {_megabytes(self.memory_bytes)} of memory but only "
+                f"{_megabytes(self.available_memory_bytes)} is available (reduce GENERATION_PROCESSES, or use a "
+                "smaller data configuration)"
+            )
+        if self.disk_bytes * HEADROOM > self.free_disk_bytes:
+            self.problems.append(
+                f"the dataset needs about {_megabytes(self.disk_bytes)} of disk space but only "
+                f"{_megabytes(self.free_disk_bytes)} is free in {TSV_BASE_DIR} (remove cached datasets, or set "
+                "TSV_COMPRESSION)"
+            )
+
+
+def _megabytes(size: float) -> str:
+    return f"{size / 1024 ** 2:,.1f}MB"
+
+
+def table_row_counts(data_config: DataConfig) -> dict[str, int]:
+    """
+    Number of rows generated for each table (by "<db>.<table>") from data_config, counted as the generators count them
+    (see TSVHandler.table_jobs) rather than by generating them. task_type_key_value has a row for each key of each
+    retry task's task type, so task types and their keys are read from the databases.
+    """
+
+    config = data_config
+    campaigns = config.retailers * config.campaigns_per_retailer
+    counts = {
+        f"{VELA_DB}.retailer_rewards": config.retailers,
+        f"{VELA_DB}.campaign": campaigns,
+        f"{VELA_DB}.earn_rule": campaigns * config.earn_rule_per_campaign,
+        f"{VELA_DB}.reward_rule": campaigns,
+        f"{VELA_DB}.transaction": config.transactions,
+        f"{VELA_DB}.processed_transaction": config.transactions,
+        f"{CARINA_DB}.retailer": config.retailers,
+        f"{CARINA_DB}.retailer_fetch_type": config.retailers,
+        f"{CARINA_DB}.reward_config": campaigns,
+        f"{CARINA_DB}.reward": _rewards(config),
+        f"{CARINA_DB}.reward_update": config.reward_updates,
+        f"{POLARIS_DB}.retailer_config": config.retailers,
+        f"{POLARIS_DB}.account_holder": config.account_holders,
+        f"{POLARIS_DB}.account_holder_profile": config.account_holders,
+        f"{POLARIS_DB}.account_holder_marketing_preference": config.account_holders,
+        f"{POLARIS_DB}.account_holder_campaign_balance": config.account_holders,
+        f"{POLARIS_DB}.account_holder_reward": config.allocated_rewards,
+        f"{POLARIS_DB}.account_holder_pending_reward": config.pending_rewards,
+        f"{POLARIS_DB}.balance_adjustment": config.transactions,
+        f"{POLARIS_DB}.email_template": 2 * config.retailers,
+    }
+
+    for db_name, task_types_to_populate in RETRY_TASK_TYPES.items():
+        task_type_ids, task_type_keys = fetch_task_types_ids(db_name), fetch_task_type_keys(db_name)
+        counts[f"{db_name}.retry_task"] = retry_task_count(task_types_to_populate, config)
+        counts[f"{db_name}.task_type_key_value"] = sum(
+            retry_task_count({task_type: value_list}, config) * len(task_type_keys.get(task_type_ids[task_type], []))
+            for task_type, value_list in task_types_to_populate.items()
+        )
+
+    return counts
+
+
+def calibration_config(data_config: DataConfig) -> DataConfig:
+    """data_config with its counts capped at CALIBRATION_ROWS (keeping its retailers and campaigns)."""
+
+    return DataConfig(
+        **{
+            name: value if name in STRUCTURAL_FIELDS else min(value, CALIBRATION_ROWS)
+            for name, value in asdict(data_config).items()
+        }
+    )
+
+
+def _process_memory() -> int:
+    """Peak memory (resident set size) of this process so far, in bytes."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _available_memory() -> int:
+    """Memory available to new processes without swapping, in bytes."""
+
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def _free_disk() -> int:
+    """Free space on the filesystem of TSV_BASE_DIR (or of its nearest existing parent), in bytes."""
+
+    path = os.path.abspath(TSV_BASE_DIR)
+    while not os.path.exists(path):
+        path = os.path.dirname(path)
+
+    return shutil.disk_usage(path).free
+
+
+def _memory_bytes(data_config: DataConfig, handler: TSVHandler, baseline_memory: int) -> int:
+    """
+    Peak memory used generating data_config: that of this process before generating anything, plus the state kept by
+    the generators (per account holder: uuids, retailers and the index of account holders by retailer; per reward: see
+    RewardStore) as measured by a calibration run's handler, plus process pool workers (each holding the account
+    holders' uuids, see create_tsv_files, with those generating Polaris' rewards holding their own copy of that state).
+    """
+
+    calibration = handler.data_config
+    polaris, carina = handler.polaris_generator, handler.carina_generator
+    retailers, index = polaris.all_account_holder_retailers, polaris.account_holders_by_retailer
+
+    account_holder_bytes = len(handler.account_holder_uuids.data) + retailers.itemsize * len(retailers)
+    if index is not None:
+        account_holder_bytes += index.nbytes
+    reward_bytes = carina.allocated_rewards.nbytes + carina.unallocated_rewards.nbytes
+
+    state_bytes = _scale(account_holder_bytes, data_config.account_holders, calibration.account_holders)
+    state_bytes += _scale(reward_bytes, _rewards(data_config), _rewards(calibration))
+    memory = baseline_memory + state_bytes
+    if GENERATION_PROCESSES > 1:
+        memory += GENERATION_PROCESSES * (baseline_memory + data_config.account_holders * UUID_SIZE) + state_bytes
+
+    return round(memory)
+
+
+def _rewards(data_config: DataConfig) -> int:
+    return data_config.allocated_rewards + data_config.pending_rewards + data_config.spare_rewards
+
+
+def _scale(value: float, rows: int, calibration_rows: int) -> float:
+    return value * rows / calibration_rows if calibration_rows else 0.0
+
+
+def _upload_seconds(tables: dict[str, TablePlan]) -> float:
+    """
+    Upload time of all tables: tables of all databases are uploaded by UPLOAD_CONCURRENCY workers in total (but no
+    table faster than on its own).
+    """
+
+    seconds = [table.upload_seconds for table in tables.values()]
+
+    return max(sum(seconds) / UPLOAD_CONCURRENCY, *seconds, 0.0)
+
+
+def _calibrate(
+    data_config: DataConfig, seed: int, binary: bool, directory: str
+) -> tuple[dict[str, TablePlan], TSVHandler]:
+    """
+    Generates data_config's calibration config (see calibration_config) to directory on one process and copies it into
+    temporary tables (see benchmark_copy_rates). Returns what each of its tables took, and the handler that generated
+    them. Raises RuntimeError if the rows generated are not those counted by table_row_counts (i.e. it is out of date).
+    """
+
+    handler = TSVHandler(calibration_config(data_config), seed, binary, directory=directory)
+    handler.processes = 1
+    handler.create_tsv_files()
+
+    manifest = read_manifest(directory)
+    expected = table_row_counts(handler.data_config)
+    miscounted = [
+        f"{table.db}.{table.table}" for table in manifest.tables if table.rows != expected[f"{table.db}.{table.table}"]
+    ]
+    if miscounted:
+        raise RuntimeError(
+            f"Row counts of {', '.join(miscounted)} do not match their generators (see table_row_counts)"
+        )
+
+    rates = benchmark_copy_rates(manifest, directory)
+
+    calibration = {}
+    for table in manifest.tables:
+        name = f"{table.db}.{table.table}"
+        calibration[name] = TablePlan(
+            rows=table.rows,
+            bytes=table.bytes,
+            generation_seconds=handler.seconds_taken[name],
+            upload_seconds=table.bytes / rates[name] if rates[name] else 0.0,
+        )
+
+    return calibration, handler
+
+
+def plan_data_config(data_config: DataConfig, seed: int, binary: bool = False) -> Plan:
+    """
+    Plans the generation and upload of data_config without generating it: counts the rows of each table exactly (see
+    table_row_counts), then extrapolates their size, generation and upload times and the memory used by generation
+    from a calibration run of at most CALIBRATION_ROWS rows per table (generated to a temporary directory and copied
+    into temporary tables, see _calibrate). The plan is written to PLAN_REPORT_FILE.
+
+    Raises RuntimeError if this machine does not have the memory or disk space for data_config (see Plan.check).
+
+    :param data_config: data config to plan
+    :param seed: seed for data generation
+    :param binary: whether to plan binary COPY files rather than tsvs
+    """
+
+    baseline_memory = _process_memory()
+    rows = table_row_counts(data_config)
+
+    with tempfile.TemporaryDirectory() as directory:
+        calibration, handler = _calibrate(data_config, seed, binary, directory)
+
+    sharded = {job.name for job in handler.table_jobs() if job.shard_total is not None}
+    tables = {
+        name: TablePlan(
+            rows=rows[name],
+            bytes=round(_scale(table.bytes, rows[name], table.rows)),
+            generation_seconds=_scale(table.generation_seconds, rows[name], table.rows),
+            upload_seconds=_scale(table.upload_seconds, rows[name], table.rows),
+        )
+        for name, table in calibration.items()
+    }
+
+    largest_sharded = max((tables[name].bytes for name in sharded), default=0) if GENERATION_PROCESSES > 1 else 0
+    plan = Plan(
+        data_config=asdict(data_config),
+        seed=seed,
+        binary=binary,
+        compression=TSV_COMPRESSION,
+        tables=tables,
+        generation_seconds=sum(
+            table.generation_seconds / (GENERATION_PROCESSES if name in sharded else 1)
+            for name, table in tables.items()
+        ),
+        upload_seconds=_upload_seconds(tables),
+        memory_bytes=_memory_bytes(data_config, handler, baseline_memory),
+        available_memory_bytes=_available_memory() + _process_memory(),
+        disk_bytes=sum(table.bytes for table in tables.values()) + largest_sharded,
+        free_disk_bytes=_free_disk(),
+    )
+    plan.check()
+    write_plan_report(plan)
+
+    if plan.problems:
+        raise RuntimeError(f"This machine cannot generate the data configuration: {'; '.join(plan.problems)}")
+
+    return plan
+
+
+def write_plan_report(plan: Plan) -> None:
+    """Writes a plan to PLAN_REPORT_FILE and logs a summary of it."""
+
+    with open(PLAN_REPORT_FILE, "w", encoding="utf-8") as file:
+        json.dump(asdict(plan), file, indent=2)
+
+    for name, table in plan.tables.items():
+        logger.info(
+            f"{name}: {table.rows:,} rows, {_megabytes(table.bytes)}, generated in ~{table.generation_seconds:.1f} "
+            f"seconds, uploaded in ~{table.upload_seconds:.1f} seconds"
+        )
+    logger.info(
+        f"Total: {sum(table.rows for table in plan.tables.values()):,} rows, generated in "
+        f"~{plan.generation_seconds:.1f} seconds ({GENERATION_PROCESSES} processes) and uploaded in "
+        f"~{plan.upload_seconds:.1f} seconds"
+    )
+    logger.info(
+        f"Memory: ~{_megabytes(plan.memory_bytes)} of {_megabytes(plan.available_memory_bytes)} available, disk: "
+        f"~{_megabytes(plan.disk_bytes)} of {_megabytes(plan.free_disk_bytes)} free"
+    )
+    logger.info(f"Plan written to {PLAN_REPORT_FILE}")
@@ -1,41 +1,201 @@
 import logging
+import random
 import time
 
-from data_population.common.utils import timed_function
-from data_population.data_config import data_configs
-from data_population.db_tasks import db_tasks
-from data_population.tsv_creation import tsv_manager
+from dataclasses import astuple, dataclass, fields
+
+from data_population import planning
+from data_population.common.utils import derive_seed, timed_function
+from data_population.data_config import DataConfig, data_configs, parse_overrides, scale_data_config
+from data_population.db_tasks import copy_benchmark, db_tasks, prewarming, snapshots
+from data_population.tsv_creation import benchmark, dataset_cache, growth, tsv_manager
+from settings import GENERATION_SEED, TSV_COMPRESSION
 
 logger = logging.getLogger("TaskController")
 
 
+@dataclass
+class TaskOptions:
+    seed: int | None = None  # seed for data generation (GENERATION_SEED if not provided, random for benchmarks)
+    direct: bool = False  # copy generated rows straight into the databases, without writing tsvs
+    bulk_load: bool = False  # drop and rebuild indexes and foreign keys around each table's copy
+    binary: bool = False  # write (and load) binary COPY files rather than tsvs
+    regenerate: bool = False  # regenerate tsvs even if the dataset is cached
+    databases: tuple[str, ...] = ()  # only generate and upload these databases' tables (see select_tables)
+    tables: tuple[str, ...] = ()  # only generate and upload these tables (and those referencing them)
+    scale: float = 1.0  # factor the data configuration's counts are scaled by (see scale_data_config)
+    overrides: tuple[str, ...] = ()  # data configuration fields to override, as "<field>=<value>"
+
+    @property
+    def generation_seed(self) -> int:
+        return GENERATION_SEED if self.seed is None else self.seed
+
+    def data_config(self, data_configuration: str) -> DataConfig:
+        """The named data configuration, scaled and overridden as set in these options (see scale_data_config)."""
+
+        data_config = data_configs[data_configuration]
+        if self.scale == 1 and not self.overrides:
+            return data_config
+
+        data_config = scale_data_config(data_config, self.scale, parse_overrides(self.overrides))
+        logger.info(f"Scaled {data_configuration} by {self.scale} (overrides: {list(self.overrides)}): {data_config}")
+        return data_config
+
+
 @timed_function
-def populate_all(data_configuration: str) -> None:
+def populate_all(data_configuration: str, options: TaskOptions) -> None:
     """
     Populates all databases.
 
     :param data_configuration: data_configuration name as passed in cli command
+    :param options: task options as passed in cli command
     """
 
-    data_config = data_configs[data_configuration]
+    data_config = options.data_config(data_configuration)
+    tables = db_tasks.select_tables(options.databases, options.tables)
 
-    #  Create all tsvs
-    start_time = time.time()
-    tsv_manager.TSVHandler(data_config).create_tsv_files()
-    logger.info(f"All tsvs successfully generated in {time.time() - start_time} seconds")
+    if options.direct:
+        #  Generate and upload all (selected) tables at once
+        logger.info("Attempting direct upload of all tables")
+        start_time = time.time()
+        tsv_handler = tsv_manager.TSVHandler(data_config, seed=options.generation_seed)
+        data_task_handler = db_tasks.DataTaskHandler(bulk_load=options.bulk_load, binary=options.binary)
+        data_task_handler.stream_all_tables(tsv_handler.table_rows(tables))
+        logger.info(f"All tables successfully generated and uploaded in {time.time() - start_time} seconds")
+        return
 
-    #  Repopulate all dbs
+    #  Create all (selected) tsvs (unless the dataset is cached)
+    directory = dataset_cache.dataset_directory(data_config, options.generation_seed)
+    if not options.regenerate and dataset_cache.is_cached(directory, options.binary, TSV_COMPRESSION, tables):
+        logger.info(f"Re-using cached dataset {directory} (seed {options.generation_seed}), skipping generation")
+    else:
+        start_time = time.time()
+        tsv_manager.TSVHandler(
+            data_config, seed=options.generation_seed, binary=options.binary, directory=directory
+        ).create_tsv_files(tables)
+        logger.info(f"All tsvs successfully generated in {time.time() - start_time} seconds")
+
+    #  Repopulate all (selected) tables
     logger.info("Attempting upload of all tsvs")
     start_time = time.time()
-    db_tasks.DataTaskHandler().repopulate_all_databases()
+    db_tasks.DataTaskHandler(bulk_load=options.bulk_load, directory=directory).repopulate_all_databases(tables)
     logger.info(f"All tsvs successfully uploaded in {time.time() - start_time} seconds")
 
 
 @timed_function
-def upload_only(data_configuration: str) -> None:  # pylint: disable=unused-argument
+def upload_only(data_configuration: str, options: TaskOptions) -> None:
 
-    #  Repopulate all dbs
-    logger.info("Attempting upload of all tsvs")
+    #  Repopulate all (selected) tables (from the cached dataset of the data configuration and seed)
+    tables = db_tasks.select_tables(options.databases, options.tables)
+    directory = dataset_cache.dataset_directory(options.data_config(data_configuration), options.generation_seed)
+    logger.info(f"Attempting upload of all tsvs in {directory}")
     start_time = time.time()
-    db_tasks.DataTaskHandler().repopulate_all_databases()
+    db_tasks.DataTaskHandler(bulk_load=options.bulk_load, directory=directory).repopulate_all_databases(tables)
     logger.info(f"All tsvs successfully uploaded in {time.time() - start_time} seconds")
+
+
+@timed_function
+def grow(data_configuration: str, options: TaskOptions) -> None:
+    """
+    Grows all databases to a (larger) data configuration, generating only the rows they lack and appending them to
+    their tables rather than truncating and repopulating them: new rows' ids follow on from the existing rows' and
+    they refer to the existing retailers, campaigns, account holders and rewards (see growth).
+
+    :param data_configuration: data_configuration name as passed in cli command
+    :param options: task options as passed in cli command
+    """
+
+    existing = growth.read_existing_data()
+    delta = growth.delta_config(existing.data_config, options.data_config(data_configuration))
+    structural = set(growth.STRUCTURAL_FIELDS)
+    if not any(getattr(delta, field.name) for field in fields(delta) if field.name not in structural):
+        logger.info(f"Databases already hold at least the {data_configuration} data configuration, nothing to grow")
+        return
+
+    logger.info(f"Attempting growth of all databases to {data_configuration}")
+    start_time = time.time()
+    # (seeded by the existing data too, so that rows added on top of rows generated with the same seed are not copies)
+    seed = derive_seed(options.generation_seed, "grow", *astuple(existing.data_config))
+    tsv_handler = tsv_manager.TSVHandler(delta, seed=seed, existing=existing)
+    db_tasks.DataTaskHandler(binary=options.binary).append_all_tables(tsv_handler.table_rows())
+    logger.info(f"All databases successfully grown in {time.time() - start_time} seconds")
+
+
+@timed_function
+def plan(data_configuration: str, options: TaskOptions) -> None:
+    """
+    Dry run of populate-db: counts the rows of each table and estimates their size, the time taken to generate and
+    upload them and the memory needed (see planning), failing if this machine does not have the memory or disk space.
+    Nothing is written to TSV_BASE_DIR or the databases' tables.
+
+    :param data_configuration: data_configuration name as passed in cli command
+    :param options: task options as passed in cli command
+    """
+
+    logger.info(f"Planning {data_configuration}")
+    planning.plan_data_config(options.data_config(data_configuration), options.generation_seed, binary=options.binary)
+    logger.info(f"This machine can generate {data_configuration}")
+
+
+@timed_function
+def benchmark_generation(data_configuration: str, options: TaskOptions) -> None:
+    """
+    Benchmarks row generation for each generation backend (no tsvs are written and no database is needed).
+
+    :param data_configuration: data_configuration name as passed in cli command
+    :param options: task options as passed in cli command
+    """
+
+    data_config = options.data_config(data_configuration)
+    seed = random.randrange(2**32) if options.seed is None else options.seed
+
+    results = benchmark.benchmark_generators(data_config, seed)
+    for backend, rates in results.items():
+        rows_per_second = ", ".join(f"{table}={rate:,.0f}" for table, rate in rates.items())
+        logger.info(f"{backend} backend rows/second: {rows_per_second}")
+
+
+@timed_function
+def benchmark_copy(data_configuration: str, options: TaskOptions) -> None:
+    """
+    Benchmarks loading each table with text COPY against binary COPY, with newly generated data loaded into temporary
+    copies of the tables (see copy_benchmark), leaving the databases' data untouched.
+
+    :param data_configuration: data_configuration name as passed in cli command
+    :param options: task options as passed in cli command
+    """
+
+    data_config = options.data_config(data_configuration)
+    tsv_handler = tsv_manager.TSVHandler(data_config, seed=options.seed)
+
+    results = copy_benchmark.benchmark_copy_formats(tsv_handler.table_rows())
+    text_total = sum(seconds["text"] for seconds in results.values())
+    binary_total = sum(seconds["binary"] for seconds in results.values())
+    logger.info(f"Total load time: text COPY {text_total:.2f} seconds, binary COPY {binary_total:.2f} seconds")
+
+
+@timed_function
+def snapshot(data_configuration: str, options: TaskOptions) -> None:  # pylint: disable=unused-argument
+    """Snapshots all (populated) databases as templates, for later resets."""
+
+    logger.info("Attempting snapshot of all databases")
+    snapshots.snapshot_databases()
+    logger.info("All databases successfully snapshotted")
+
+
+@timed_function
+def reset(data_configuration: str, options: TaskOptions) -> None:  # pylint: disable=unused-argument
+    """Resets all databases to their last snapshot (see snapshot)."""
+
+    logger.info("Attempting reset of all databases")
+    snapshots.reset_databases()
+    logger.info("All databases successfully reset")
+
+
+@timed_function
+def prewarm(data_configuration: str, options: TaskOptions) -> None:  # pylint: disable=unused-argument
+    """Loads the tables (and indexes) hit by locust's UserTasks into shared buffers, ahead of a load test."""
+
+    logger.info("Attempting prewarm of all databases")
+    prewarming.prewarm_databases()
+    logger.info("All databases successfully prewarmed")
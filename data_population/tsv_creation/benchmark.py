@@ -0,0 +1,85 @@
+import logging
+import time
+
+from collections import deque
+from typing import Callable, Iterable
+
+from data_population.common.utils import random_uuid, seeded_random
+from data_population.data_config import DataConfig
+from data_population.tsv_creation.fixtures import polaris_retry_task_types_to_populate
+from data_population.tsv_creation.generators.carina_generators import CarinaGenerators
+from data_population.tsv_creation.generators.polaris_generators import PolarisGenerators
+from data_population.tsv_creation.generators.task_generators import retry_task, retry_task_count
+from data_population.tsv_creation.generators.vela_generators import VelaGenerators
+from data_population.tsv_creation.random_columns import backends, numpy
+from data_population.tsv_creation.sharding import Shard
+from data_population.tsv_creation.uuid_array import UUIDArray
+
+logger = logging.getLogger("GeneratorBenchmark")
+
+
+def _time_rows(generate: Callable[[], Iterable[list]]) -> tuple[int, float]:
+    """Consumes all rows of a generator (without writing them). Returns (number of rows, seconds taken)."""
+
+    start_time = time.perf_counter()
+    rows = deque(enumerate(generate(), start=1), maxlen=1)
+
+    return (rows[0][0] if rows else 0), time.perf_counter() - start_time
+
+
+def _benchmark_jobs(data_config: DataConfig, seed: int, backend: str) -> dict[str, Callable[[], Iterable[list]]]:
+    """Tables generated with random_columns, as generators of all of their rows, using the provided backend."""
+
+    rng = seeded_random(seed, "account_holder_uuid")
+    account_holder_uuids = UUIDArray.from_uuids(random_uuid(rng) for _ in range(data_config.account_holders))
+    polaris = PolarisGenerators(data_config, account_holder_uuids, seed, backend=backend)
+    vela = VelaGenerators(data_config, account_holder_uuids, seed, backend=backend)
+    carina = CarinaGenerators(data_config, seed, backend=backend)
+
+    # reward_update picks from generated (allocated) rewards, which in turn need reward configs
+    for generate in (carina.reward_config, carina.reward):
+        deque(generate(), maxlen=0)
+
+    # task type ids are normally fetched from the database, any distinct ids will do here
+    task_type_ids = {task_type: i for i, task_type in enumerate(polaris_retry_task_types_to_populate, start=1)}
+    retry_tasks = retry_task_count(polaris_retry_task_types_to_populate, data_config)
+
+    return {
+        "balance_adjustment": lambda: polaris.balance_adjustment(Shard(0, 1, data_config.transactions + 1)),
+        "transaction": lambda: vela.transaction(Shard(0, 1, data_config.transactions + 1)),
+        "processed_transaction": lambda: vela.processed_transaction(Shard(0, 1, data_config.transactions + 1)),
+        "reward_update": carina.reward_update,
+        "retry_task": lambda: retry_task(
+            task_type_ids,
+            polaris_retry_task_types_to_populate,
+            data_config,
+            seed,
+            Shard(0, 1, retry_tasks + 1),
+            backend=backend,
+        ),
+    }
+
+
+def benchmark_generators(data_config: DataConfig, seed: int) -> dict[str, dict[str, float]]:
+    """
+    Times row generation of the tables generated with random_columns, for each available generation backend.
+
+    :param data_config: data config to generate rows for
+    :param seed: seed for data generation
+    :return: rows per second, by backend then table
+    """
+
+    results: dict[str, dict[str, float]] = {}
+
+    for backend in backends:
+        if backend == "numpy" and numpy is None:
+            logger.info("Skipping numpy backend (numpy is not installed)")
+            continue
+
+        results[backend] = {}
+        for table, generate in _benchmark_jobs(data_config, seed, backend).items():
+            rows, seconds = _time_rows(generate)
+            results[backend][table] = rows / seconds if seconds else 0.0
+            logger.info(f"{backend} backend: generated {rows} {table} rows in {seconds:.2f} seconds")
+
+    return results
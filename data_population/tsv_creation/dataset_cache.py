@@ -0,0 +1,102 @@
+import hashlib
+import json
+import logging
+import os
+
+from dataclasses import asdict
+from functools import cache
+from typing import Collection
+
+from data_population.data_config import DataConfig
+from data_population.tsv_creation.fixtures import fetch_task_types
+from data_population.tsv_creation.manifest import MANIFEST_NAME, read_manifest, verify_files
+from settings import FAKER_LOCALE, GENERATION_BACKEND, PROJECT_ROOT, TSV_BASE_DIR, VALUE_POOL_SIZE
+
+logger = logging.getLogger("DatasetCache")
+
+# Source files whose changes may change generated data (hashed as the generator version)
+GENERATOR_SOURCES = ("data_population/tsv_creation", "data_population/common/utils.py")
+KEY_LENGTH = 16  # hex digits of the dataset key used as the dataset's directory name
+
+
+@cache
+def generator_version() -> str:
+    """Hash of the source of the generators (see GENERATOR_SOURCES), so that cached datasets are not re-used once
+    generation changes."""
+
+    version = hashlib.sha256()
+    for source in GENERATOR_SOURCES:
+        path = os.path.join(PROJECT_ROOT, source)
+        paths = (
+            [path]
+            if os.path.isfile(path)
+            else sorted(
+                os.path.join(directory, file_name)
+                for directory, _, file_names in os.walk(path)
+                for file_name in file_names
+                if file_name.endswith(".py")
+            )
+        )
+        for file_path in paths:
+            version.update(os.path.relpath(file_path, PROJECT_ROOT).encode())
+            with open(file_path, "rb") as file:
+                version.update(file.read())
+
+    return version.hexdigest()
+
+
+def dataset_key(data_config: DataConfig, seed: int, task_types: dict[str, dict]) -> str:
+    """
+    Key of the dataset generated from data_config with seed, regardless of the format it is written in.
+
+    :param data_config: data config of the dataset
+    :param seed: seed the dataset is generated with
+    :param task_types: task type ids and keys of each database (see fixtures.fetch_task_types)
+    """
+
+    key = {
+        "data_config": asdict(data_config),
+        "seed": seed,
+        "task_types": task_types,
+        "generator_version": generator_version(),
+        "backend": GENERATION_BACKEND,
+        "faker_locale": FAKER_LOCALE,
+        "value_pool_size": VALUE_POOL_SIZE,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:KEY_LENGTH]
+
+
+def dataset_directory(data_config: DataConfig, seed: int) -> str:
+    """
+    Directory (in TSV_BASE_DIR) of the dataset generated from data_config with seed (see dataset_key), given the task
+    types now in the databases.
+    """
+
+    return os.path.join(TSV_BASE_DIR, dataset_key(data_config, seed, fetch_task_types()))
+
+
+def is_cached(directory: str, binary: bool, compression: str | None, tables: Collection[str] | None = None) -> bool:
+    """
+    Whether a complete dataset in the given format (or, given tables, one with all of those) is cached in directory.
+    """
+
+    if not os.path.isfile(os.path.join(directory, MANIFEST_NAME)):
+        return False
+
+    manifest = read_manifest(directory)
+    if any(table.binary != binary or table.compression != compression for table in manifest.tables):
+        logger.info(f"Dataset in {directory} was generated in another format, regenerating it")
+        return False
+
+    missing = set(manifest.missing) if tables is None else set(manifest.missing) & set(tables)
+    if missing:
+        logger.info(f"Dataset in {directory} is missing {', '.join(sorted(missing))}, generating it")
+        return False
+
+    try:
+        verify_files(manifest, directory, checksums=False)
+    except ValueError as ex:
+        logger.warning(f"{ex}, regenerating it")
+        return False
+
+    return True
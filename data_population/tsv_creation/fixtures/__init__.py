@@ -1,5 +1,7 @@
 from .task_types import (
     carina_retry_task_types_to_populate,
+    fetch_task_type_keys,
+    fetch_task_types,
     fetch_task_types_ids,
     generate_task_type_key_values,
     polaris_retry_task_types_to_populate,
@@ -1,14 +1,16 @@
-from dataclasses import dataclass
-from random import randint
-from typing import Any
-
-import psycopg2
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from random import Random
+from typing import Any, Callable, Iterable
 
 from faker import Faker
 
-import settings
+from data_population.common.connection_pool import pooled_connection
+from data_population.common.utils import derive_seed, seeded_random
+from settings import CARINA_DB, FAKER_LOCALE, POLARIS_DB, VELA_DB
 
-_fake = Faker(locale="en_GB")
+# Range of DATE and DATETIME values (fixed, rather than ending now, so that values are reproducible)
+_FAKE_DATETIMES = (datetime(2000, 1, 1), datetime(2020, 1, 1))
 
 
 #  We will generate retry rows for each of the following task types equal to the sum of their data_config values:
@@ -24,14 +26,15 @@ polaris_retry_task_types_to_populate = {
 vela_retry_task_types_to_populate = {"reward-adjustment": ["transactions"]}
 carina_retry_task_types_to_populate = {"reward-issuance": ["allocated_rewards"]}
 
-_tk_type_to_faker = {
-    "STRING": _fake.pystr,
-    "INTEGER": _fake.pyint,
-    "FLOAT": _fake.pyfloat,
-    "BOOLEAN": lambda: bool(randint(0, 1)),
-    "DATE": _fake.date,
-    "DATETIME": _fake.date_time,
-    "JSON": lambda: {_fake.pystr(): _fake.pystr() for _ in range(2)},
+# Fake value generators, by task type key type, given a (seeded) Faker and Random
+_tk_type_to_faker: dict[str, Callable[[Faker, Random], Any]] = {
+    "STRING": lambda fake, rng: fake.pystr(),
+    "INTEGER": lambda fake, rng: fake.pyint(),
+    "FLOAT": lambda fake, rng: fake.pyfloat(),
+    "BOOLEAN": lambda fake, rng: bool(rng.randint(0, 1)),
+    "DATE": lambda fake, rng: fake.date_between_dates(*(value.date() for value in _FAKE_DATETIMES)),
+    "DATETIME": lambda fake, rng: fake.date_time_between_dates(*_FAKE_DATETIMES),
+    "JSON": lambda fake, rng: {fake.pystr(): fake.pystr() for _ in range(2)},
 }
 
 
@@ -42,31 +45,30 @@ class TaskTypeKeyData:
 
 
 def fetch_task_types_ids(db_name: str) -> dict[str, int]:
-    db_uri = settings.DB_CONNECTION_URI.replace("/postgres?", f"/{db_name}?")
     task_type_query = "SELECT name, task_type_id FROM task_type"
 
-    with psycopg2.connect(db_uri) as db_connection:
+    with pooled_connection(db_name) as db_connection:
         with db_connection.cursor() as cursor:
             cursor.execute(task_type_query)
             result = dict(cursor.fetchall())
 
-    db_connection.close()
     return result
 
 
-def _generate_fake_val_for_type(tk_type: str) -> Any:
+def _generate_fake_val_for_type(tk_type: str, fake: Faker, rng: Random) -> Any:
     if tk_type not in _tk_type_to_faker:
         raise ValueError(f"Could not find {tk_type} type, allowed types {_tk_type_to_faker}")
 
-    return _tk_type_to_faker[tk_type]()
+    return _tk_type_to_faker[tk_type](fake, rng)
+
 
+def fetch_task_type_keys(db_name: str) -> dict[int, list[TaskTypeKeyData]]:
+    """Task type keys by task type id (in task_type_key_id order)."""
 
-def generate_task_type_key_values(db_name: str) -> dict[int, dict[int, Any]]:
-    db_uri = settings.DB_CONNECTION_URI.replace("/postgres?", f"/{db_name}?")
-    task_type_key_query = "SELECT type, task_type_key_id, task_type_id FROM task_type_key"
+    task_type_key_query = "SELECT type, task_type_key_id, task_type_id FROM task_type_key ORDER BY task_type_key_id"
     task_type_key_data: dict[int, list[TaskTypeKeyData]] = {}
 
-    with psycopg2.connect(db_uri) as db_connection:
+    with pooled_connection(db_name) as db_connection:
         with db_connection.cursor() as cursor:
 
             cursor.execute(task_type_key_query)
@@ -78,9 +80,38 @@ def generate_task_type_key_values(db_name: str) -> dict[int, dict[int, Any]]:
 
                 task_type_key_data[tt_id].append(TaskTypeKeyData(type=tk_type, task_type_key_id=tk_id))
 
-    db_connection.close()
+    return task_type_key_data
+
+
+def fetch_task_types(db_names: Iterable[str] = (POLARIS_DB, VELA_DB, CARINA_DB)) -> dict[str, dict]:
+    """
+    Task type ids and task type keys (see fetch_task_types_ids and fetch_task_type_keys) of each database, by database
+    name: the database state generated retry tasks and task type key values refer to.
+    """
+
+    return {
+        db_name: {
+            "task_type_ids": fetch_task_types_ids(db_name),
+            "task_type_keys": {
+                task_type_id: [asdict(key) for key in keys]
+                for task_type_id, keys in fetch_task_type_keys(db_name).items()
+            },
+        }
+        for db_name in db_names
+    }
+
+
+def generate_task_type_key_values(db_name: str, seed: int) -> dict[int, dict[int, Any]]:
+    """
+    A fake value for each task type key (by task type key id), by task type id. Values are drawn from a Faker and
+    Random seeded from seed and db_name, so are the same for the same seed (however tables are generated).
+    """
+
+    fake = Faker(locale=FAKER_LOCALE)
+    fake.seed_instance(derive_seed(seed, db_name, "task_type_key_value"))
+    rng = seeded_random(seed, db_name, "task_type_key_value")
 
     return {
-        tt_id: {tk_data.task_type_key_id: _generate_fake_val_for_type(tk_data.type) for tk_data in values}
-        for tt_id, values in task_type_key_data.items()
+        tt_id: {tk_data.task_type_key_id: _generate_fake_val_for_type(tk_data.type, fake, rng) for tk_data in values}
+        for tt_id, values in fetch_task_type_keys(db_name).items()
     }
@@ -1,92 +1,99 @@
 from datetime import datetime, timedelta
-from random import choice
-from uuid import uuid4
+from typing import Generator
 
-from data_population.common.utils import id_generator
+from data_population.common.utils import id_generator, random_uuid, seeded_random
 from data_population.data_config import DataConfig
+from data_population.tsv_creation.growth import ExistingData
+from data_population.tsv_creation.random_columns import random_columns
+from data_population.tsv_creation.reward_store import RewardStore
+from settings import CARINA_DB, GENERATION_BACKEND
 
 
 class CarinaGenerators:
-    def __init__(self, data_config: DataConfig) -> None:
+    def __init__(
+        self,
+        data_config: DataConfig,
+        seed: int,
+        backend: str = GENERATION_BACKEND,
+        existing: ExistingData | None = None,
+    ) -> None:
         self.now = datetime.utcnow()
         self.end_date = self.now + timedelta(weeks=100)
         self.data_config = data_config
-        self.allocated_rewards: list = []
-        self.unallocated_rewards: list = []
-        self.all_reward_configs: dict = {}
-
-    def retailer(self) -> list:
+        self.seed = seed
+        self.backend = backend  # random_columns backend
+        self.existing = existing or ExistingData.empty()  # data rows are added to (see growth), none by default
+        self.allocated_rewards = RewardStore()
+        self.unallocated_rewards = RewardStore()
+        # retailer_id of each reward_config, by id: those existing (see growth), or otherwise those reward_config
+        # generates
+        self.all_reward_configs: dict = (
+            dict(self.existing.reward_configs) if existing is not None else self._reward_config_retailers()
+        )
+
+    def retailer(self) -> Generator[list, None, None]:
         """Generates n retailers (n defined in data_config)"""
-        retailers = []
 
         for retailer_count in range(1, self.data_config.retailers + 1):
-            retailers.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    retailer_count,  # id
-                    f"retailer_{retailer_count}",  # slug
-                ]
-            )
-        return retailers
-
-    def retailer_fetch_type(self) -> list:
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                retailer_count,  # id
+                f"retailer_{retailer_count}",  # slug
+            ]
+
+    def retailer_fetch_type(self) -> Generator[list, None, None]:
         """Generates n retailer<->fetch_type links (1 per retailer (fetch type 1 only))"""
-        retailer_fetch_types = []
 
         for retailer_count in range(1, self.data_config.retailers + 1):
-            retailer_fetch_types.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    retailer_count,  # retailer_id
-                    1,  # fetch_type_id (1=Preloaded, 2=Jigsaw)
-                    "",  # agent_config
-                ]
-            )
-        return retailer_fetch_types
-
-    def reward_config(self) -> list:
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                retailer_count,  # retailer_id
+                1,  # fetch_type_id (1=Preloaded, 2=Jigsaw)
+                "",  # agent_config
+            ]
+
+    def _reward_config_retailers(self) -> dict[int, int]:
+        """retailer_id of each reward_config generated (campaigns_per_retailer per retailer), by id"""
+        id_gen = id_generator(1)
+        return {
+            next(id_gen): retailer_count
+            for retailer_count in range(1, self.data_config.retailers + 1)
+            for _ in range(self.data_config.campaigns_per_retailer)
+        }
+
+    def reward_config(self) -> Generator[list, None, None]:
         """
         Generates n reward_configs (n defined in data_config as retailers * campaigns per retailer)
         Assumes a 121 relationship between reward_config (CARINA) and reward_rule/campaign (VELA) (i.e. only one config
         per campaign)
         """
-        id_gen = id_generator(1)
-        reward_configs = []
-
-        for retailer_count in range(1, self.data_config.retailers + 1):
-            for _ in range(self.data_config.campaigns_per_retailer):
-
-                reward_config_id = next(id_gen)
-
-                reward_configs.append(
-                    [
-                        self.now,  # created_at
-                        self.now,  # updated_at
-                        reward_config_id,  # id
-                        f"reward_{reward_config_id}",  # reward_slug
-                        retailer_count,  # retailer_id
-                        1,  # fetch_type_id
-                        "ACTIVE",  # status
-                        {"validity_days": 90},  # required_fields_values
-                    ]
-                )
-
-                self.all_reward_configs[reward_config_id] = retailer_count
 
-        return reward_configs
-
-    def reward(self) -> list:
+        for reward_config_id, retailer_count in self._reward_config_retailers().items():
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                reward_config_id,  # id
+                f"reward_{reward_config_id}",  # reward_slug
+                retailer_count,  # retailer_id
+                1,  # fetch_type_id
+                "ACTIVE",  # status
+                {"validity_days": 90},  # required_fields_values
+            ]
+
+    def reward(self) -> Generator[list, None, tuple[RewardStore, RewardStore]]:
         """
         Generates n rewards/vouchers (total n defined as allocated_rewards + pending_rewards + spare_rewards in
         data_config).
 
-        Saves allocated_rewards and unallocated_rewards for later use by Polaris' account_holder_reward and
-        account_holder_pending_reward tables.
+        Returns the allocated and unallocated rewards (see RewardStore), which keep_rewards saves for later use by
+        Polaris' account_holder_reward and account_holder_pending_reward tables.
         """
 
-        rewards = []
+        rng = seeded_random(self.seed, "reward")
+        allocated_rewards, unallocated_rewards = RewardStore(), RewardStore()
+        reward_config_ids = list(self.all_reward_configs)
 
         for reward in range(
             self.data_config.allocated_rewards + self.data_config.pending_rewards + self.data_config.spare_rewards
@@ -96,66 +103,60 @@ class CarinaGenerators:
             # account_holder_reward
             allocated = reward < self.data_config.allocated_rewards
 
-            reward_id = str(uuid4())
-            reward_config_id = choice(list(self.all_reward_configs))
+            reward_id = random_uuid(rng)
+            reward_config_id = rng.choice(reward_config_ids)
             retailer_id = self.all_reward_configs[reward_config_id]  # retailer_id
-            code = str(uuid4())
-
-            rewards.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    reward_id,  # id (:uuid)
-                    code,  # code
-                    allocated,  # allocated
-                    False,  # deleted
-                    reward_config_id,  # reward_config_id
-                    retailer_id,  # retailer_id
-                ]
-            )
-
-            if allocated:
-                self.allocated_rewards.append(
-                    {
-                        "reward_uuid": reward_id,
-                        "reward_config_id": reward_config_id,
-                        "retailer_id": retailer_id,
-                        "code": code,
-                        "allocated": allocated,
-                    }
-                )
-            else:
-                self.unallocated_rewards.append(
-                    {
-                        "reward_uuid": reward_id,
-                        "reward_config_id": reward_config_id,
-                        "retailer_id": retailer_id,
-                        "code": code,
-                        "allocated": allocated,
-                    }
-                )
-
-        return rewards
-
-    def reward_update(self) -> list:
+            code = random_uuid(rng)
+
+            rewards = allocated_rewards if allocated else unallocated_rewards
+            rewards.append(reward_id, code, reward_config_id, retailer_id)
+
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                reward_id,  # id (:uuid)
+                code,  # code
+                allocated,  # allocated
+                False,  # deleted
+                reward_config_id,  # reward_config_id
+                retailer_id,  # retailer_id
+            ]
+
+        return allocated_rewards, unallocated_rewards
+
+    def keep_rewards(self, results: list[tuple[RewardStore, RewardStore]]) -> None:
+        """Saves the rewards returned by reward (see TableJob.collect), as it may be run in another process."""
+
+        for allocated_rewards, unallocated_rewards in results:
+            self.allocated_rewards.extend(allocated_rewards)
+            self.unallocated_rewards.extend(unallocated_rewards)
+
+    def reward_update(self) -> Generator[list, None, None]:
         """
         Generates n reward_updates. n is defined at the dataconfig
-        Note: This re-uses uuids from self.reward_id. So must be run after
+        Note: This re-uses uuids from self.reward_id (and those of existing allocated rewards). So must be run after
         reward generator
         """
 
-        reward_updates = []
-        reward_uuids = [item["reward_uuid"] for item in self.allocated_rewards]
-
-        for count in range(self.data_config.reward_updates):
-            reward_updates.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    count,  # id
-                    choice(reward_uuids),  # reward_uuid
-                    self.now.date(),  # date
-                    choice(["CANCELLED", "REDEEMED", "ISSUED"]),  # status
-                ]
-            )
-        return reward_updates
+        columns = random_columns(self.seed, "reward_update", backend=self.backend)
+        size = self.data_config.reward_updates
+        first_id = self.existing.next_id(CARINA_DB, "reward_update", default=0)
+        existing_rewards = self.existing.allocated_reward_uuids
+
+        for count, reward_index, status in zip(
+            range(first_id, first_id + size),
+            columns.integers(0, len(existing_rewards) + len(self.allocated_rewards) - 1, size),
+            columns.choices(["CANCELLED", "REDEEMED", "ISSUED"], size),
+        ):
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                count,  # id
+                (
+                    existing_rewards[reward_index]
+                    if reward_index < len(existing_rewards)
+                    else self.allocated_rewards.reward_uuid(reward_index - len(existing_rewards))
+                ),  # reward_uuid
+                self.now.date(),  # date
+                status,  # status
+            ]
@@ -1,238 +1,326 @@
-import uuid
+import logging
+import time
 
+from array import array
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from random import choice, randint
+from typing import Any, Generator, Iterable
 
-from data_population.common.utils import id_generator
+from data_population.common.utils import random_uuid, seeded_random
 from data_population.data_config import DataConfig
 from data_population.tsv_creation.fixtures.polaris import AccountHolderStatuses, marketing_preferences, profile_config
-from settings import fake
+from data_population.tsv_creation.growth import ExistingData
+from data_population.tsv_creation.random_columns import random_columns
+from data_population.tsv_creation.retailer_index import RetailerIndex
+from data_population.tsv_creation.reward_store import RewardStore
+from data_population.tsv_creation.sharding import Shard
+from data_population.tsv_creation.uuid_array import UUIDArray
+from data_population.tsv_creation.value_pools import value_pool
+from settings import GENERATION_BACKEND, POLARIS_DB
+
+logger = logging.getLogger("PolarisGenerators")
+
+# Attributes sent to each process pool worker once (see sharing_state) rather than pickled with every shard task
+SHARED_ATTRIBUTES = ("existing", "all_account_holder_retailers", "credit_card_numbers", "first_names", "last_names")
+
+# Shared attributes of the generators each process (including process pool workers) already holds, by generator seed
+_shared_state: dict[int, dict[str, Any]] = {}
+
+
+def share_state(states: dict[int, dict[str, Any]]) -> None:
+    """
+    Process pool initializer: receives the shared attributes of generators (by seed) once per worker process, so that
+    shard tasks using the generators do not each carry a copy of them (see PolarisGenerators.__getstate__).
+
+    :param states: shared attributes (as name: value) of the generators to share, by generator seed
+    """
+
+    _shared_state.update(states)
+
+
+@contextmanager
+def sharing_state(generators: Iterable["PolarisGenerators"]) -> Generator[dict[int, dict[str, Any]], None, None]:
+    """
+    Marks generators as shared with process pool workers for the duration of the context, yielding the initargs states
+    to pass to share_state.
+    """
+
+    states = {
+        generator.seed: {name: getattr(generator, name) for name in SHARED_ATTRIBUTES} for generator in generators
+    }
+    _shared_state.update(states)
+    try:
+        yield states
+    finally:
+        for seed in states:
+            _shared_state.pop(seed, None)
 
 
 class PolarisGenerators:
-    def __init__(self, data_config: DataConfig, account_holder_uuids: list[uuid.UUID]) -> None:
+    def __init__(
+        self,
+        data_config: DataConfig,
+        account_holder_uuids: UUIDArray,
+        seed: int,
+        *,
+        backend: str = GENERATION_BACKEND,
+        existing: ExistingData | None = None,
+    ) -> None:
         self.now = datetime.utcnow()
         self.data_config = data_config
-        self.all_account_holder_retailers: dict = {}
-        self.allocated_rewards: list = []
-        self.unallocated_rewards: list = []
-        self.account_holders_by_retailer: dict = {}
-        self.account_holder_uuids = account_holder_uuids
-
-    def get_account_holders_by_retailer(self) -> dict:
-        if not self.account_holders_by_retailer:
-            for retailer in range(1, self.data_config.retailers + 1):
-                self.account_holders_by_retailer[retailer] = [
-                    k for k, v in self.all_account_holder_retailers.items() if v == retailer
-                ]
+        self.seed = seed
+        self.backend = backend  # random_columns backend
+        self.existing = existing or ExistingData.empty()  # data rows are added to (see growth), none by default
+        self.account_holders_by_retailer: RetailerIndex | None = None
+        self.account_holder_uuids = account_holder_uuids  # (existing account holders' followed by those generated)
+        self.first_account_holder_id = self.existing.next_id(POLARIS_DB, "account_holder")
+
+        # Retailers are assigned up front (rather than while generating account_holder rows) so that account_holder
+        # can be generated in shards by other processes while still being available to later tables.
+        rng = seeded_random(seed, "account_holder_retailer")
+        self.all_account_holder_retailers = self.existing.account_holder_retailers + array(
+            "I", (rng.randint(1, data_config.retailers) for _ in range(data_config.account_holders))
+        )  # retailer_id per (existing, then generated) account_holder, indexed by account_holder_id - 1
+
+        # Faker is far too slow to call per row, so values are picked from pools sampled from it once
+        self.credit_card_numbers = value_pool("credit_card_number", seed)
+        self.first_names = value_pool("first_name", seed)
+        self.last_names = value_pool("last_name", seed)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # (pickled with every shard task, see TSVHandler.write_sharded_tsv)
+        state = self.__dict__.copy()
+        state["account_holders_by_retailer"] = None  # (not used by shards, rebuilt where needed)
+        if self.seed in _shared_state:
+            for name in SHARED_ATTRIBUTES:
+                del state[name]
+
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        if "existing" not in state:  # (shared, see sharing_state)
+            state.update(_shared_state[state["seed"]])
+        self.__dict__.update(state)
+
+    def get_account_holders_by_retailer(self) -> RetailerIndex:
+        if self.account_holders_by_retailer is None:
+            # built in full before being assigned, as reward tables may be generated concurrently
+            start_time = time.time()
+            account_holders_by_retailer = RetailerIndex(self.all_account_holder_retailers, self.data_config.retailers)
+            logger.info(
+                f"Indexed account holders by retailer in {time.time() - start_time:.2f} seconds "
+                f"({account_holders_by_retailer.nbytes / 1024 ** 2:.1f}MB)"
+            )
+            self.account_holders_by_retailer = account_holders_by_retailer
 
         return self.account_holders_by_retailer
 
-    def retailer_config(self) -> list:
+    def retailer_config(self) -> Generator[list, None, None]:
         """Generates n retailer_configs (n defined in data_config)"""
-        retailer_configs = []
         for count in range(1, self.data_config.retailers + 1):
-            retailer_configs.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    count,  # id
-                    f"Retailer {count}",  # name
-                    f"retailer_{count}",  # slug
-                    str(count).zfill(4),  # account_number_prefix (e.g. '0013')
-                    10,  # account_number_length
-                    profile_config,  # profile_config
-                    marketing_preferences,  # marketing_preference_config
-                    "Performance Retailer",  # loyalty_name
-                ]
-            )
-        return retailer_configs
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                count,  # id
+                f"Retailer {count}",  # name
+                f"retailer_{count}",  # slug
+                str(count).zfill(4),  # account_number_prefix (e.g. '0013')
+                10,  # account_number_length
+                profile_config,  # profile_config
+                marketing_preferences,  # marketing_preference_config
+                "Performance Retailer",  # loyalty_name
+            ]
 
-    def account_holder(self) -> list:
-        """Generates n account_holders (n defined in data_config)"""
+    def account_holder(self, shard: Shard) -> Generator[list, None, None]:
+        """Generates account_holders for the ids in shard (n defined in data_config)"""
 
-        account_holders = []
-        for count in range(1, self.data_config.account_holders + 1):
+        columns = random_columns(self.seed, "account_holder", shard.index, backend=self.backend)
+        size = len(shard.ids)
+
+        for count, credit_card_number, opt_out_token in zip(
+            shard.ids, columns.choices(self.credit_card_numbers, size), columns.uuids(size)
+        ):
             account_id = count
-            account_holder_uuid = self.account_holder_uuids.pop()
-            retailer_id = randint(1, self.data_config.retailers)
-            account_holders.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    account_id,  # id
-                    f"user_{count}@performancetest.com",  # email
-                    AccountHolderStatuses.ACTIVE,  # status
-                    f"{fake.credit_card_number()}_{count}",  # account_number
-                    retailer_id,  # retailer_id
-                    account_holder_uuid,  # account_holder_uuid
-                    uuid.uuid4(),  # opt_out_token
-                ]
-            )
-            self.all_account_holder_retailers[account_id] = retailer_id
-
-        return account_holders
-
-    def account_holder_profile(self) -> list:
-        """Generates n account_holder_profiles (n defined in data_config (1-1 w/account_holders))"""
-        account_holder_profiles = []
-        for count in range(1, self.data_config.account_holders + 1):
-            account_holder_profiles.append(
-                [
-                    count,  # id
-                    fake.first_name(),  # first name
-                    fake.last_name(),  # surname
-                    self.now,  # date_of_birth
-                    "01234567891",  # phone
-                    "Fake_first_line_address",  # address_line1
-                    "Fake_second_line_address",  # address_line2
-                    "Fake_postcode",  # postcode
-                    "Fake_city",  # city
-                    count,  # account_holder_id
-                    "",  # custom
-                ]
-            )
-        return account_holder_profiles
+            account_holder_uuid = self.account_holder_uuids[count - 1]
+            retailer_id = self.all_account_holder_retailers[count - 1]
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                account_id,  # id
+                f"user_{count}@performancetest.com",  # email
+                AccountHolderStatuses.ACTIVE,  # status
+                f"{credit_card_number}_{count}",  # account_number (unique, as suffixed with the account holder id)
+                retailer_id,  # retailer_id
+                account_holder_uuid,  # account_holder_uuid
+                opt_out_token,  # opt_out_token
+            ]
 
-    def account_holder_marketing_preference(self) -> list:
+    def account_holder_profile(self, shard: Shard) -> Generator[list, None, None]:
+        """
+        Generates account_holder_profiles for the account holder ids in shard (n defined in data_config (1-1
+        w/account_holders))
+        """
+
+        columns = random_columns(self.seed, "account_holder_profile", shard.index, backend=self.backend)
+        size = len(shard.ids)
+        id_offset = self.existing.next_id(POLARIS_DB, "account_holder_profile") - self.first_account_holder_id
+
+        for count, first_name, last_name in zip(
+            shard.ids, columns.choices(self.first_names, size), columns.choices(self.last_names, size)
+        ):
+            yield [
+                count + id_offset,  # id
+                first_name,  # first name
+                last_name,  # surname
+                self.now,  # date_of_birth
+                "01234567891",  # phone
+                "Fake_first_line_address",  # address_line1
+                "Fake_second_line_address",  # address_line2
+                "Fake_postcode",  # postcode
+                "Fake_city",  # city
+                count,  # account_holder_id
+                "",  # custom
+            ]
+
+    def account_holder_marketing_preference(self) -> Generator[list, None, None]:
         """Generates account_holder_marketing_preferences (n defined in data_config (1-1 w/account_holders))"""
-        account_holder_marketing_preferences = []
-        for count in range(1, self.data_config.account_holders + 1):
-            account_holder_marketing_preferences.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    count,  # id
-                    count,  # account_holder_id
-                    "marketing_pref",  # key_name
-                    "True",  # value
-                    "BOOLEAN",  # value_type
-                ]
-            )
-        return account_holder_marketing_preferences
+        for row_id, account_holder_id in enumerate(
+            range(self.first_account_holder_id, len(self.all_account_holder_retailers) + 1),
+            start=self.existing.next_id(POLARIS_DB, "account_holder_marketing_preference"),
+        ):
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                row_id,  # id
+                account_holder_id,  # account_holder_id
+                "marketing_pref",  # key_name
+                "True",  # value
+                "BOOLEAN",  # value_type
+            ]
 
-    def account_holder_campaign_balance(self) -> list:
+    def account_holder_campaign_balance(self) -> Generator[list, None, None]:
         """Generates account_holder_campaign_balances (n defined in data_config (1-1 w/account_holders))"""
-        account_holder_campaign_balances = []
-        for account_holder_id in range(1, self.data_config.account_holders + 1):
-
-            retailer_id = self.all_account_holder_retailers[account_holder_id]
-            campaign_slug = f"campaign_{retailer_id * self.data_config.campaigns_per_retailer}"
-
-            account_holder_campaign_balances.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    account_holder_id,  # id
-                    account_holder_id,  # account_holder_id
-                    campaign_slug,  # campaign_slug
-                    0,  # balance
-                ]
-            )
-        return account_holder_campaign_balances
+        # campaign slug per retailer, indexed by retailer_id
+        campaign_slugs = [
+            f"campaign_{retailer_id * self.data_config.campaigns_per_retailer}"
+            for retailer_id in range(self.data_config.retailers + 1)
+        ]
+
+        for row_id, account_holder_id in enumerate(
+            range(self.first_account_holder_id, len(self.all_account_holder_retailers) + 1),
+            start=self.existing.next_id(POLARIS_DB, "account_holder_campaign_balance"),
+        ):
+            campaign_slug = campaign_slugs[self.all_account_holder_retailers[account_holder_id - 1]]
+
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                row_id,  # id
+                account_holder_id,  # account_holder_id
+                campaign_slug,  # campaign_slug
+                0,  # balance
+            ]
 
-    def account_holder_reward(self) -> list:
+    def account_holder_reward(self, allocated_rewards: RewardStore) -> Generator[list, None, None]:
         """
         Generates account_holder_rewards (1-1 w/ data_config.allocated_rewards)
+
+        :param allocated_rewards: allocated rewards as generated by CarinaGenerators.reward (not modified)
         """
-        account_holder_rewards = []
         account_holders_by_retailer = self.get_account_holders_by_retailer()
+        rng = seeded_random(self.seed, "account_holder_reward")
+        first_id = self.existing.next_id(POLARIS_DB, "account_holder_reward")
 
-        for reward_count in range(1, self.data_config.allocated_rewards + 1):
-
-            reward = self.allocated_rewards.pop()
-
-            account_holder_rewards.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    reward_count,  # id
-                    reward["reward_uuid"],  # reward_uuid
-                    reward["code"],  # code
-                    self.now,  # issued_date
-                    self.now + timedelta(days=30),  # expiry_date
-                    choice(["ISSUED", "CANCELLED", "REDEEMED"]),  # status
-                    "NULL",  # redeemed_date
-                    "NULL",  # cancelled_date
-                    f"reward_{reward['reward_config_id']}",  # reward_slug
-                    f"retailer_{reward['retailer_id']}",  # retailer_slug
-                    str(uuid.uuid4()),  # idempotency_token
-                    choice(account_holders_by_retailer[reward["retailer_id"]]),  # account_holder_id
-                    "",  # associated_url
-                ]
-            )
-        return account_holder_rewards
+        for reward_count, reward in zip(
+            range(first_id, first_id + self.data_config.allocated_rewards), reversed(allocated_rewards)
+        ):
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                reward_count,  # id
+                reward.reward_uuid,  # reward_uuid
+                reward.code,  # code
+                self.now,  # issued_date
+                self.now + timedelta(days=30),  # expiry_date
+                rng.choice(["ISSUED", "CANCELLED", "REDEEMED"]),  # status
+                None,  # redeemed_date
+                None,  # cancelled_date
+                f"reward_{reward.reward_config_id}",  # reward_slug
+                f"retailer_{reward.retailer_id}",  # retailer_slug
+                str(random_uuid(rng)),  # idempotency_token
+                account_holders_by_retailer.random_account_holder(reward.retailer_id, rng),  # account_holder_id
+                "",  # associated_url
+            ]
 
-    def account_holder_pending_reward(self) -> list:
+    def account_holder_pending_reward(self, unallocated_rewards: RewardStore) -> Generator[list, None, None]:
         """
         Generates account_holder_pending_rewards (1-1 w/ data_config.pending_rewards)
+
+        :param unallocated_rewards: unallocated rewards as generated by CarinaGenerators.reward (not modified)
         """
 
-        account_holder_pending_rewards = []
         account_holders_by_retailer = self.get_account_holders_by_retailer()
+        rng = seeded_random(self.seed, "account_holder_pending_reward")
+        first_id = self.existing.next_id(POLARIS_DB, "account_holder_pending_reward")
 
-        for reward_count in range(1, self.data_config.pending_rewards + 1):
-
-            reward = self.unallocated_rewards.pop()
-
-            account_holder_pending_rewards.append(
-                [
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    reward_count,  # id
-                    self.now,  # created_date
-                    self.now + timedelta(days=-1),  # conversion_date
-                    randint(500, 1000),  # value
-                    f"campaign_{reward['retailer_id'] * self.data_config.campaigns_per_retailer}",  # campaign_slug
-                    f"reward_{reward['reward_config_id']}",  # reward_slug
-                    f"retailer_{reward['retailer_id']}",  # retailer_slug
-                    str(uuid.uuid4()),  # idempotency_token
-                    choice(account_holders_by_retailer[reward["retailer_id"]]),  # account_holder_id
-                    False,  # enqueued
-                ]
-            )
-        return account_holder_pending_rewards
+        for reward_count, reward in zip(
+            range(first_id, first_id + self.data_config.pending_rewards), reversed(unallocated_rewards)
+        ):
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                reward_count,  # id
+                self.now,  # created_date
+                self.now + timedelta(days=-1),  # conversion_date
+                rng.randint(500, 1000),  # value
+                f"campaign_{reward.retailer_id * self.data_config.campaigns_per_retailer}",  # campaign_slug
+                f"reward_{reward.reward_config_id}",  # reward_slug
+                f"retailer_{reward.retailer_id}",  # retailer_slug
+                str(random_uuid(rng)),  # idempotency_token
+                account_holders_by_retailer.random_account_holder(reward.retailer_id, rng),  # account_holder_id
+                False,  # enqueued
+            ]
 
-    def balance_adjustment(self) -> list:
+    def balance_adjustment(self, shard: Shard) -> Generator[list, None, None]:
         """
-        Generates balance_adjustment rows (1-1 w/ data_config.transactions)
+        Generates balance_adjustment rows for the ids in shard (1-1 w/ data_config.transactions)
         """
 
-        balance_adjustments = []
+        columns = random_columns(self.seed, "balance_adjustment", shard.index, backend=self.backend)
+        size = len(shard.ids)
 
-        for count in range(1, self.data_config.transactions + 1):
+        for count, adjustment, account_holder_id in zip(
+            shard.ids,
+            columns.integers(500, 1000, size),
+            columns.integers(1, len(self.all_account_holder_retailers), size),  # (existing or generated)
+        ):
 
-            balance_adjustments.append(
-                [
-                    count,  # id
-                    f"token_{count}",  # token
-                    randint(500, 1000),  # adjustment
-                    self.now,  # created_at
-                    randint(1, self.data_config.account_holders),  # account_holder_id
-                ]
-            )
-        return balance_adjustments
+            yield [
+                count,  # id
+                f"token_{count}",  # token
+                adjustment,  # adjustment
+                self.now,  # created_at
+                account_holder_id,  # account_holder_id
+            ]
 
-    def email_template(self) -> list:
+    def email_template(self) -> Generator[list, None, None]:
         """
         Generates email_template rows (2-1 w/ data_config.retails)
         Different email templates for each retailer
         """
 
-        email_templates = []
-        row_id = id_generator(1)
-        template_id = id_generator(1)
-
-        for template_type in ("WELCOME_EMAIL", "REWARD_ISSUANCE"):
-            for count in range(1, self.data_config.retailers + 1):
-                email_templates.append(
-                    [
-                        self.now,  # created_at
-                        self.now,  # updated_at
-                        next(row_id),  # id
-                        next(template_id),  # template_id
-                        template_type,  # type
-                        count,  # retailer_id
-                    ]
-                )
-        return email_templates
+        templates = (
+            (template_type, count)
+            for template_type in ("WELCOME_EMAIL", "REWARD_ISSUANCE")
+            for count in range(1, self.data_config.retailers + 1)
+        )
+
+        for row_id, (template_type, count) in enumerate(templates, start=1):
+            yield [
+                self.now,  # created_at
+                self.now,  # updated_at
+                row_id,  # id
+                row_id,  # template_id (numbered as ids are)
+                template_type,  # type
+                count,  # retailer_id
+            ]
@@ -1,70 +1,103 @@
 import json
 
 from datetime import datetime, timedelta
-from random import choice, randint
+from typing import Generator
 
-from data_population.common.utils import id_generator
 from data_population.data_config import DataConfig
 from data_population.tsv_creation.fixtures.common import audit_data
+from data_population.tsv_creation.random_columns import random_columns
+from data_population.tsv_creation.sharding import Shard
+from settings import GENERATION_BACKEND
 
 
-def retry_task(task_type_ids_dict: dict, task_types_to_populate: dict, data_config: DataConfig) -> list:
+def retry_task_count(task_types_to_populate: dict, data_config: DataConfig) -> int:
+    """Total number of retry_tasks generated for the provided task types (sum of their data_config values)"""
+    return sum(getattr(data_config, i) for value_list in task_types_to_populate.values() for i in value_list)
+
+
+def _retry_task_ids(
+    task_type_ids_dict: dict, task_types_to_populate: dict, data_config: DataConfig, shard: Shard, first_id: int = 1
+) -> Generator[tuple[int, int], None, None]:
+    """
+    Yields (retry_task_id, task_type_id) for each retry_task id in shard. Retry tasks are numbered consecutively from
+    first_id, task type by task type, in the order of `task_types_to_populate`.
+    """
+    for task_type, value_list in task_types_to_populate.items():
+        rowcount = sum(getattr(data_config, i) for i in value_list)
+        for retry_task_id in range(max(first_id, shard.start), min(first_id + rowcount, shard.stop)):
+            yield retry_task_id, task_type_ids_dict[task_type]
+        first_id += rowcount
+
+
+def retry_task(  # pylint: disable=too-many-arguments
+    task_type_ids_dict: dict,
+    task_types_to_populate: dict,
+    data_config: DataConfig,
+    seed: int,
+    shard: Shard,
+    *,
+    backend: str = GENERATION_BACKEND,
+    first_id: int = 1,
+) -> Generator[list, None, None]:
     """
     `tasks` = DataConfig.account_holder or DataConfig.reward_updates or DataConfig.transactions.
 
     `task_type_ids_dict` refer to the fixtures that should be passed. These will be app specific to
     polaris, carina and vela.
+
+    Only the retry_tasks with ids in `shard` are generated (see retry_task_count for the total), of those numbered from
+    `first_id` (the next id of a table being grown, see growth).
     """
-    id_gen = id_generator(1)
-    retry_tasks = []
-    for task_type, value_list in task_types_to_populate.items():
-        rowcount = sum(getattr(data_config, i) for i in value_list)
-        for _ in range(1, rowcount + 1):
-            task_type_id = task_type_ids_dict[task_type]
-            now = datetime.utcnow()
-            retry_tasks.append(
-                [
-                    now,  # created_at
-                    now,  # updated_at
-                    next(id_gen),  # retry_task_id
-                    randint(1, 3),  # attempts
-                    json.dumps(audit_data),  # audit data
-                    now + timedelta(minutes=5),  # next_time_attempt
-                    choice(["SUCCESS", "REQUEUED", "CANCELLED"]),  # status
-                    task_type_id,  # task_type_id
-                ]
-            )
-    return retry_tasks
-
-
-def task_type_key_value(
-    task_type_ids_dict: dict, task_type_keys_dict: dict, task_types_to_populate: dict, data_config: DataConfig
-) -> list:
+    columns = random_columns(seed, "retry_task", shard.index, backend=backend)
+    size = len(shard.ids)
+    audit_data_json = json.dumps(audit_data)  # rendered once, identical for all retry tasks
+
+    for (retry_task_id, task_type_id), attempts, status in zip(
+        _retry_task_ids(task_type_ids_dict, task_types_to_populate, data_config, shard, first_id),
+        columns.integers(1, 3, size),
+        columns.choices(["SUCCESS", "REQUEUED", "CANCELLED"], size),
+    ):
+        now = datetime.utcnow()
+        yield [
+            now,  # created_at
+            now,  # updated_at
+            retry_task_id,  # retry_task_id
+            attempts,  # attempts
+            audit_data_json,  # audit data
+            now + timedelta(minutes=5),  # next_time_attempt
+            status,  # status
+            task_type_id,  # task_type_id
+        ]
+
+
+def task_type_key_value(  # pylint: disable=too-many-arguments
+    task_type_ids_dict: dict,
+    task_type_keys_dict: dict,
+    task_types_to_populate: dict,
+    data_config: DataConfig,
+    shard: Shard,
+    *,
+    first_id: int = 1,
+) -> Generator[list, None, None]:
     """
     `tasks` = DataConfig.account_holder or DataConfig.reward_updates or DataConfig.transactions.
 
     `task_type_ids_dict` and `task_type_keys_dict` refer to the fixtures that should be passed.
     These will be app specific to polaris, carina and vela.
-    """
 
-    retry_task_id_gen = id_generator(1)
+    Only the values for retry_tasks with ids in `shard` are generated (see retry_task_count for the total), of those
+    numbered from `first_id` (see retry_task).
+    """
 
-    task_type_key_value_rows = []
-    for task_type, value_list in task_types_to_populate.items():
-        rowcount = sum(getattr(data_config, i) for i in value_list)
-        for _ in range(1, rowcount + 1):
-
-            retry_task_id = next(retry_task_id_gen)
-
-            for task_type_key_id, value in task_type_keys_dict[task_type_ids_dict[task_type]].items():
-                now = datetime.utcnow()
-                task_type_key_value_rows.append(
-                    [
-                        now,  # created_at
-                        now,  # updated_at
-                        value,  # task_type_key_value
-                        retry_task_id,  # retry_task_id
-                        task_type_key_id,  # task_type_key_id
-                    ]
-                )
-    return task_type_key_value_rows
+    for retry_task_id, task_type_id in _retry_task_ids(
+        task_type_ids_dict, task_types_to_populate, data_config, shard, first_id
+    ):
+        for task_type_key_id, value in task_type_keys_dict[task_type_id].items():
+            now = datetime.utcnow()
+            yield [
+                now,  # created_at
+                now,  # updated_at
+                value,  # task_type_key_value
+                retry_task_id,  # retry_task_id
+                task_type_key_id,  # task_type_key_id
+            ]
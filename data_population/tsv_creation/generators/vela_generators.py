@@ -1,30 +1,34 @@
 from datetime import datetime, timedelta
-from random import choice, randint
-from uuid import UUID, uuid4
+from typing import Generator
 
 from data_population.common.utils import id_generator
 from data_population.data_config import DataConfig
+from data_population.tsv_creation.random_columns import random_columns
+from data_population.tsv_creation.sharding import Shard
+from data_population.tsv_creation.uuid_array import UUIDArray
+from settings import GENERATION_BACKEND
 
 
 class VelaGenerators:
-    def __init__(self, data_config: DataConfig, account_holder_uuids: list[UUID]) -> None:
+    def __init__(
+        self, data_config: DataConfig, account_holder_uuids: UUIDArray, seed: int, backend: str = GENERATION_BACKEND
+    ) -> None:
         self.now = datetime.utcnow()
         self.end_date = self.now + timedelta(weeks=100)
         self.data_config = data_config
+        self.seed = seed
+        self.backend = backend  # random_columns backend
         self.retailer_ids: list = []
         self.account_holder_uuids = account_holder_uuids
 
-    def retailer_rewards(self) -> list:
-        retailers = []
+    def retailer_rewards(self) -> Generator[list, None, None]:
         for count in range(1, self.data_config.retailers + 1):
             self.retailer_ids.append(count)
-            retailers.append([count, f"retailer_{count}"])  # id  # slug
-        return retailers
+            yield [count, f"retailer_{count}"]  # id  # slug
 
-    def campaign(self) -> list:
+    def campaign(self) -> Generator[list, None, None]:
         """Generates campaigns (n defined in data_config as retailers * campaigns per retailer)"""
         id_gen = id_generator(1)
-        campaigns = []
         for count in range(1, self.data_config.retailers + 1):
             for _ in range(1, self.data_config.campaigns_per_retailer + 1):
 
@@ -32,104 +36,103 @@ class VelaGenerators:
                 if not campaign_id:
                     raise ValueError("no campaign_id value found")
 
-                campaigns.append(
-                    [
-                        campaign_id,  # id
-                        self.now,  # created_at
-                        self.now,  # updated_at
-                        "ACTIVE",  # status
-                        f"Campaign {campaign_id}",  # name
-                        f"campaign_{campaign_id}",  # slug
-                        count,  # retailer_id
-                        "STAMPS",  # loyalty_type
-                        self.now,  # start_date
-                        self.end_date,  # end_date (set to 100 weeks in the future)
-                    ]
-                )
-        return campaigns
+                yield [
+                    campaign_id,  # id
+                    self.now,  # created_at
+                    self.now,  # updated_at
+                    "ACTIVE",  # status
+                    f"Campaign {campaign_id}",  # name
+                    f"campaign_{campaign_id}",  # slug
+                    count,  # retailer_id
+                    "STAMPS",  # loyalty_type
+                    self.now,  # start_date
+                    self.end_date,  # end_date (set to 100 weeks in the future)
+                ]
 
-    def earn_rule(self) -> list:
+    def earn_rule(self) -> Generator[list, None, None]:
         """
         Generates earn_rules (n defined in data_config as retailers * campaigns per retailer * earn_rules per campaign)
         """
-        id_gen = id_generator(1)
         total_campaigns = self.data_config.retailers * self.data_config.campaigns_per_retailer
-        earn_rules = []
-        for campaign_count in range(1, total_campaigns + 1):
-            for _ in range(self.data_config.earn_rule_per_campaign):
-                earn_rules.append(
-                    [
-                        next(id_gen),  # id
-                        self.now,  # created_at
-                        self.now,  # updated_at
-                        100,  # threshold
-                        500,  # increment
-                        1,  # increment_multiplier
-                        campaign_count,  # campaign_id
-                        0,  # max_amount
-                    ]
-                )
-        return earn_rules
+        campaign_ids = (
+            campaign_count
+            for campaign_count in range(1, total_campaigns + 1)
+            for _ in range(self.data_config.earn_rule_per_campaign)
+        )
+        for earn_rule_id, campaign_count in enumerate(campaign_ids, start=1):
+            yield [
+                earn_rule_id,  # id
+                self.now,  # created_at
+                self.now,  # updated_at
+                100,  # threshold
+                500,  # increment
+                1,  # increment_multiplier
+                campaign_count,  # campaign_id
+                0,  # max_amount
+            ]
 
-    def reward_rule(self) -> list:
+    def reward_rule(self) -> Generator[list, None, None]:
         """Generates reward_rules (n defined in data_config as retailers * campaigns per retailer (1-1 w/campaigns))"""
         total_campaigns = self.data_config.retailers * self.data_config.campaigns_per_retailer
-        reward_rules = []
         for count in range(1, total_campaigns + 1):
-            reward_rules.append(
-                [
-                    count,  # id
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    500,  # reward_goal
-                    f"reward_{count}",  # reward_slug
-                    0,  # allocation_window
-                    count,  # campaign_id
-                ]
-            )
-        return reward_rules
+            yield [
+                count,  # id
+                self.now,  # created_at
+                self.now,  # updated_at
+                500,  # reward_goal
+                f"reward_{count}",  # reward_slug
+                0,  # allocation_window
+                count,  # campaign_id
+            ]
 
-    def transaction(self) -> list:
-        """Generates transactions (n defined in n data_config)"""
-        id_gen = id_generator(1)
-        transactions = []
-        for count in range(1, self.data_config.transactions + 1):
-            transactions.append(
-                [
-                    next(id_gen),  # id
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    f"tx_{count}",  # transaction_id
-                    randint(500, 1000),  # amount
-                    "MID_1234",  # mid
-                    self.now,  # datetime
-                    uuid4(),  # account_holder_uuid, not a fkey
-                    randint(1, self.data_config.retailers),  # retailer_rewards.id fkey
-                    f"tx_payment_{count}",  # payment_transaction_id
-                    choice(["PROCESSED", "DUPLICATE", "NO_ACTIVE_CAMPAIGNS"]),  # status
-                ]
-            )
-        return transactions
+    def transaction(self, shard: Shard) -> Generator[list, None, None]:
+        """Generates transactions for the ids in shard (n defined in n data_config)"""
+        columns = random_columns(self.seed, "transaction", shard.index, backend=self.backend)
+        size = len(shard.ids)
 
-    def processed_transaction(self) -> list:
-        """Generates processed transaction (1-1 w/ transactions in data config)"""
-        id_gen = id_generator(1)
-        processed_transactions = []
+        for count, amount, account_holder_uuid, retailer_id, status in zip(
+            shard.ids,
+            columns.integers(500, 1000, size),
+            columns.uuids(size),
+            columns.integers(1, self.data_config.retailers, size),
+            columns.choices(["PROCESSED", "DUPLICATE", "NO_ACTIVE_CAMPAIGNS"], size),
+        ):
+            yield [
+                count,  # id
+                self.now,  # created_at
+                self.now,  # updated_at
+                f"tx_{count}",  # transaction_id
+                amount,  # amount
+                "MID_1234",  # mid
+                self.now,  # datetime
+                account_holder_uuid,  # account_holder_uuid, not a fkey
+                retailer_id,  # retailer_rewards.id fkey
+                f"tx_payment_{count}",  # payment_transaction_id
+                status,  # status
+            ]
 
-        for count in range(1, self.data_config.transactions + 1):
-            processed_transactions.append(
-                [
-                    next(id_gen),  # id
-                    self.now,  # created_at
-                    self.now,  # updated_at
-                    f"tx_{count}",  # transaction_id
-                    randint(500, 1000),  # amount
-                    "MID_1234",  # mid
-                    self.now,  # datetime
-                    choice(self.account_holder_uuids),  # account_holder_uuid, not a fkey
-                    randint(1, self.data_config.retailers),  # retailer_rewards.id fkey
-                    '{"campaign_1", "campaign_2"}',  # campaign_slugs: array
-                    f"tx_payment_{count}",  # payment_transaction_id
-                ]
-            )
-        return processed_transactions
+    def processed_transaction(self, shard: Shard) -> Generator[list, None, None]:
+        """Generates processed transaction for the ids in shard (1-1 w/ transactions in data config)"""
+        columns = random_columns(self.seed, "processed_transaction", shard.index, backend=self.backend)
+        size = len(shard.ids)
+        campaign_slugs = ("campaign_1", "campaign_2")
+
+        for count, amount, account_holder_index, retailer_id in zip(
+            shard.ids,
+            columns.integers(500, 1000, size),
+            columns.integers(0, len(self.account_holder_uuids) - 1, size),
+            columns.integers(1, self.data_config.retailers, size),
+        ):
+            yield [
+                count,  # id
+                self.now,  # created_at
+                self.now,  # updated_at
+                f"tx_{count}",  # transaction_id
+                amount,  # amount
+                "MID_1234",  # mid
+                self.now,  # datetime
+                self.account_holder_uuids[account_holder_index],  # account_holder_uuid, not a fkey
+                retailer_id,  # retailer_rewards.id fkey
+                campaign_slugs,  # campaign_slugs: array
+                f"tx_payment_{count}",  # payment_transaction_id
+            ]
@@ -0,0 +1,181 @@
+import logging
+
+from array import array
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field, fields
+from uuid import UUID
+
+from psycopg2.extensions import connection as connection_type
+
+from data_population.common.connection_pool import pooled_connection
+from data_population.data_config import STRUCTURAL_FIELDS, DataConfig
+from data_population.tsv_creation.uuid_array import UUIDArray
+from settings import CARINA_DB, POLARIS_DB, VELA_DB
+
+logger = logging.getLogger("Growth")
+
+# Tables grow appends to, by database, with the integer id column their rows are numbered by (None where they have
+# none). All other tables belong to the retailers and their campaigns, see STRUCTURAL_FIELDS.
+GROWN_TABLES: dict[str, dict[str, str | None]] = {
+    VELA_DB: {
+        "transaction": "id",
+        "processed_transaction": "id",
+        "retry_task": "retry_task_id",
+        "task_type_key_value": None,
+    },
+    CARINA_DB: {
+        "reward": None,
+        "reward_update": "id",
+        "retry_task": "retry_task_id",
+        "task_type_key_value": None,
+    },
+    POLARIS_DB: {
+        "account_holder": "id",
+        "account_holder_profile": "id",
+        "account_holder_marketing_preference": "id",
+        "account_holder_campaign_balance": "id",
+        "account_holder_reward": "id",
+        "account_holder_pending_reward": "id",
+        "balance_adjustment": "id",
+        "retry_task": "retry_task_id",
+        "task_type_key_value": None,
+    },
+}
+
+# Database and query counting the existing data of each data config field
+CONFIG_COUNTS = {
+    "retailers": (POLARIS_DB, "SELECT count(*) FROM retailer_config"),
+    "campaigns_per_retailer": (
+        VELA_DB,
+        "SELECT (SELECT count(*) FROM campaign) / greatest((SELECT count(*) FROM retailer_rewards), 1)",
+    ),
+    "earn_rule_per_campaign": (
+        VELA_DB,
+        "SELECT (SELECT count(*) FROM earn_rule) / greatest((SELECT count(*) FROM campaign), 1)",
+    ),
+    "account_holders": (POLARIS_DB, "SELECT count(*) FROM account_holder"),
+    "allocated_rewards": (CARINA_DB, "SELECT count(*) FROM reward WHERE allocated"),
+    "pending_rewards": (POLARIS_DB, "SELECT count(*) FROM account_holder_pending_reward"),
+    # all unallocated rewards, including those promised to account holders (pending_rewards is subtracted)
+    "spare_rewards": (CARINA_DB, "SELECT count(*) FROM reward WHERE NOT allocated"),
+    "transactions": (VELA_DB, 'SELECT count(*) FROM "transaction"'),
+    "reward_updates": (CARINA_DB, "SELECT count(*) FROM reward_update"),
+}
+
+ACCOUNT_HOLDER_FETCH_SIZE = 10000  # account holders fetched at a time by read_existing_data
+
+
+@dataclass
+class ExistingData:
+    """
+    Data already in the databases which grown tables follow on from and refer to (see read_existing_data). Generators
+    given none generate from scratch, as for empty databases.
+    """
+
+    data_config: DataConfig  # existing data, counted in data config terms (see CONFIG_COUNTS)
+    next_ids: dict[str, int] = field(default_factory=dict)  # max id + 1 of each grown table, by "<db>.<table>"
+    # retailer_id and account_holder_uuid (16 bytes each) of each account_holder, indexed by account_holder_id - 1
+    account_holder_retailers: array = field(default_factory=lambda: array("I"))
+    account_holder_uuids: bytes = b""
+    reward_configs: dict[int, int] = field(default_factory=dict)  # retailer_id of each reward_config, by id
+    allocated_reward_uuids: UUIDArray = field(default_factory=lambda: UUIDArray(b""))  # ids of allocated rewards
+
+    @classmethod
+    def empty(cls) -> "ExistingData":
+        return cls(DataConfig(**{config_field.name: 0 for config_field in fields(DataConfig)}))
+
+    def next_id(self, db_name: str, table: str, default: int = 1) -> int:
+        """Id of the first row to generate for table (default where there is no existing data)."""
+        return self.next_ids.get(f"{db_name}.{table}", default)
+
+
+def _count_config(connections: dict[str, connection_type]) -> DataConfig:
+    counts = {}
+    for config_field, (db_name, query) in CONFIG_COUNTS.items():
+        with connections[db_name].cursor() as cursor:
+            cursor.execute(query)
+            (counts[config_field],) = cursor.fetchone()
+    counts["spare_rewards"] = max(counts["spare_rewards"] - counts["pending_rewards"], 0)
+
+    return DataConfig(**counts)
+
+
+def _next_ids(connections: dict[str, connection_type]) -> dict[str, int]:
+    """
+    Reads the row count and max id of each grown table with an id column, checking that account holders are numbered 1
+    to n (as account_holder ids index the account holders' retailers and uuids, see ExistingData).
+    """
+
+    next_ids = {}
+    for db_name, tables in GROWN_TABLES.items():
+        with connections[db_name].cursor() as cursor:
+            for table, id_column in tables.items():
+                if id_column is None:
+                    continue
+                cursor.execute(f'SELECT count(*), coalesce(max("{id_column}"), 0) FROM "{table}"')
+                rows, max_id = cursor.fetchone()
+                next_ids[f"{db_name}.{table}"] = max_id + 1
+                logger.info(f"{db_name.upper()}: {table}: {rows} rows, max {id_column} {max_id}")
+
+                if table == "account_holder" and rows != max_id:
+                    raise ValueError(
+                        f"Cannot grow {db_name}: account_holder has {rows} rows but ids up to {max_id} (account "
+                        "holders must be numbered 1 to n: reset the databases to their snapshot, or populate them)"
+                    )
+
+    return next_ids
+
+
+def read_existing_data() -> ExistingData:
+    """
+    Reads what grow needs of the data already in the databases: its size in data config terms (see CONFIG_COUNTS),
+    the max id of each grown table (see GROWN_TABLES) for new rows to continue from, and the account holders, reward
+    configs and allocated rewards that new rows are spread over.
+    """
+
+    with ExitStack() as stack:
+        connections = {db_name: stack.enter_context(pooled_connection(db_name)) for db_name in GROWN_TABLES}
+        existing = ExistingData(_count_config(connections), _next_ids(connections))
+
+        with connections[POLARIS_DB].cursor(name="account_holders") as cursor:
+            cursor.itersize = ACCOUNT_HOLDER_FETCH_SIZE
+            cursor.execute("SELECT retailer_id, account_holder_uuid FROM account_holder ORDER BY id")
+            uuids = bytearray()
+            for retailer_id, account_holder_uuid in cursor:
+                existing.account_holder_retailers.append(retailer_id)
+                uuids += UUID(str(account_holder_uuid)).bytes
+            existing.account_holder_uuids = bytes(uuids)
+
+        with connections[CARINA_DB].cursor() as cursor:
+            cursor.execute("SELECT id, retailer_id FROM reward_config")
+            existing.reward_configs = dict(cursor.fetchall())
+            cursor.execute("SELECT id FROM reward WHERE allocated")
+            existing.allocated_reward_uuids = UUIDArray.from_uuids(UUID(str(reward_id)) for (reward_id,) in cursor)
+
+    logger.info(f"Existing data: {asdict(existing.data_config)}")
+    return existing
+
+
+def delta_config(existing: DataConfig, target: DataConfig) -> DataConfig:
+    """
+    Data config of the rows to generate to grow existing data to target, raising ValueError if target adds retailers,
+    campaigns or earn rules.
+    """
+
+    structural = [name for name in STRUCTURAL_FIELDS if getattr(target, name) > getattr(existing, name)]
+    if structural:
+        raise ValueError(
+            f"Cannot grow {', '.join(structural)} from {[getattr(existing, name) for name in structural]} to "
+            f"{[getattr(target, name) for name in structural]}: populate the databases instead"
+        )
+
+    return DataConfig(
+        **{
+            name: (
+                getattr(existing, name)
+                if name in STRUCTURAL_FIELDS
+                else max(getattr(target, name) - getattr(existing, name), 0)
+            )
+            for name in (config_field.name for config_field in fields(DataConfig))
+        }
+    )
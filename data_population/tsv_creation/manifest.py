@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+from data_population.common.compression import split_compression
+
+MANIFEST_NAME = "manifest.json"
+CHECKSUM_READ_SIZE = 1024 * 1024  # bytes read at a time when checksumming a file
+
+
+@dataclass
+class TableFile:
+    filename: str  # name of the file in the dataset's directory
+    db: str  # database the table belongs to  # pylint: disable=invalid-name
+    table: str
+    order: int  # position of the table in generation order (tables are uploaded in dependency order regardless)
+    rows: int  # number of rows in the file
+    bytes: int  # size of the file (as written, i.e. compressed if compressed)
+    checksum: str  # sha256 of the file (as written)
+    binary: bool  # whether the file holds binary (rather than text) COPY data
+    compression: str | None  # compression of the file (see compression.extensions), None if uncompressed
+
+
+@dataclass
+class Manifest:
+    """Description of a generated dataset (a directory of tsvs), written alongside it as MANIFEST_NAME."""
+
+    data_config: dict  # DataConfig the dataset was generated from
+    seed: int  # seed the dataset was generated with
+    tables: list[TableFile]
+    generator_version: str = ""  # version of the generators the dataset was generated with (see dataset_cache)
+    # tables ("<db>.<table>") not generated in a partial dataset, i.e. one generated for selected tables only
+    missing: list[str] = field(default_factory=list)
+
+    def total_bytes(self, db_name: str | None = None) -> int:
+        return sum(table.bytes for table in self.tables if db_name is None or table.db == db_name)
+
+
+def file_checksum(path: str) -> str:
+    checksum = hashlib.sha256()
+    with open(path, "rb") as file:
+        while data := file.read(CHECKSUM_READ_SIZE):
+            checksum.update(data)
+
+    return checksum.hexdigest()
+
+
+def table_file(  # pylint: disable=too-many-arguments
+    path: str, *, db_name: str, table: str, order: int, rows: int, binary: bool
+) -> TableFile:
+    """Describes a written tsv (or binary COPY file, either possibly compressed), see TableFile."""
+
+    return TableFile(
+        filename=os.path.basename(path),
+        db=db_name,
+        table=table,
+        order=order,
+        rows=rows,
+        bytes=os.path.getsize(path),
+        checksum=file_checksum(path),
+        binary=binary,
+        compression=split_compression(path)[1],
+    )
+
+
+def write_manifest(manifest: Manifest, directory: str) -> None:
+    # written in full and then moved into place, so that an interrupted run cannot leave a partial manifest
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump(asdict(manifest), file, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def remove_manifest(directory: str) -> None:
+    """Removes a dataset's manifest (e.g. before regenerating it, so that a partial dataset is never uploaded)."""
+
+    path = os.path.join(directory, MANIFEST_NAME)
+    if os.path.isfile(path):
+        os.remove(path)
+
+
+def read_manifest(directory: str) -> Manifest:
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No dataset manifest {path}: generate the dataset (e.g. with populate-db) first")
+
+    with open(path, encoding="utf-8") as file:
+        manifest = json.load(file)
+
+    return Manifest(
+        data_config=manifest["data_config"],
+        seed=manifest["seed"],
+        tables=[TableFile(**table) for table in manifest["tables"]],
+        generator_version=manifest.get("generator_version", ""),
+        missing=manifest.get("missing", []),
+    )
+
+
+def verify_files(manifest: Manifest, directory: str, max_workers: int = 4, checksums: bool = True) -> None:
+    """
+    Checks that the files of a dataset are those described by its manifest (by size, then checksum unless checksums is
+    false), checksumming up to max_workers files at once. Raises ValueError listing any missing or modified files.
+    """
+
+    def check(table: TableFile) -> str | None:
+        path = os.path.join(directory, table.filename)
+        if not os.path.isfile(path):
+            return f"{table.filename} is missing"
+        if os.path.getsize(path) != table.bytes or (checksums and file_checksum(path) != table.checksum):
+            return f"{table.filename} does not match its checksum"
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        problems = [problem for problem in executor.map(check, manifest.tables) if problem is not None]
+
+    if problems:
+        raise ValueError(f"Dataset in {directory} does not match its manifest: {', '.join(problems)}")
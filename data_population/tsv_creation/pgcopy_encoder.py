@@ -0,0 +1,298 @@
+import struct
+
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+from uuid import UUID
+
+from psycopg2.extensions import cursor as cursor_type
+
+from data_population.tsv_creation.tsv_encoder import BATCH_SIZE, cell_text
+
+# Binary COPY file header (signature, flags and header extension length) and trailer (a field count of -1)
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+
+_INT2 = struct.Struct(">h")
+_INT4 = struct.Struct(">i")
+_NULL_FIELD = _INT4.pack(-1)
+_UNSET = object()
+
+# Fixed size fields: data length, followed by the value
+_INT2_FIELD = struct.Struct(">ih")
+_INT4_FIELD = struct.Struct(">ii")
+_INT8_FIELD = struct.Struct(">iq")
+_FLOAT4_FIELD = struct.Struct(">if")
+_FLOAT8_FIELD = struct.Struct(">id")
+_NUMERIC_HEADER = struct.Struct(">hhHh")  # number of digits, weight, sign and display scale
+# One-dimensional array header: number of dimensions, whether there are nulls and element type oid, followed by the
+# dimension's length and lower bound (empty arrays have no dimensions, so stop after the element type oid)
+_ARRAY_HEADER = struct.Struct(">iiiii")
+_EMPTY_ARRAY_HEADER = struct.Struct(">iii")
+
+_POSTGRES_EPOCH = datetime(2000, 1, 1)
+_POSTGRES_EPOCH_DATE = date(2000, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_TRUE_TEXT = {"t", "true", "y", "yes", "on", "1"}
+
+_NUMERIC_NEGATIVE = 0x4000
+_NUMERIC_NAN = 0xC000
+
+
+def _field(data: bytes) -> bytes:
+    return _INT4.pack(len(data)) + data
+
+
+def _text(value: object) -> bytes:
+    data = (value if isinstance(value, str) else cell_text(value)).encode("utf-8")
+    return _INT4.pack(len(data)) + data
+
+
+def _jsonb(value: object) -> bytes:
+    return _field(b"\x01" + cell_text(value).encode("utf-8"))  # jsonb format version 1, followed by the json text
+
+
+def _bool(value: object) -> bytes:
+    if not isinstance(value, bool):
+        value = cell_text(value).strip().lower() in _TRUE_TEXT
+
+    return b"\x00\x00\x00\x01\x01" if value else b"\x00\x00\x00\x01\x00"
+
+
+def _uuid(value: object) -> bytes:
+    if isinstance(value, UUID):
+        return _field(value.bytes)
+    if isinstance(value, str) and len(value) == 36:
+        # (far quicker than parsing the uuid, for the usual hyphenated form)
+        return _field(bytes.fromhex(value.replace("-", "")))
+
+    return _field(UUID(cell_text(value)).bytes)
+
+
+def _date(value: object) -> bytes:
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    elif isinstance(value, datetime):
+        value = value.date()
+
+    if not isinstance(value, date):
+        raise TypeError(f"Cannot write {value!r} as a date")
+
+    return _INT4_FIELD.pack(4, (value - _POSTGRES_EPOCH_DATE).days)
+
+
+def _datetime(value: object) -> datetime:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+
+    raise TypeError(f"Cannot write {value!r} as a timestamp")
+
+
+def _timestamp(value: object) -> bytes:
+    # as in text COPY, any time zone is ignored
+    timestamp = _datetime(value).replace(tzinfo=None)
+    return _INT8_FIELD.pack(8, (timestamp - _POSTGRES_EPOCH) // _MICROSECOND)
+
+
+def _timestamptz(value: object) -> bytes:
+    # naive datetimes (e.g. from datetime.utcnow) are taken to be in UTC, as in text COPY (see CONNECTION_OPTIONS)
+    timestamp = _datetime(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return _INT8_FIELD.pack(8, (timestamp - _POSTGRES_EPOCH) // _MICROSECOND)
+
+
+def _base_10000_digits(integer_digits: str, fraction_digits: str) -> tuple[list[int], int]:
+    """
+    Digits of a number in base 10000 (as stored by numeric, grouped either side of the decimal point), without leading
+    or trailing zeros, and the weight (power of 10000) of the first digit.
+    """
+
+    integer_digits = integer_digits.rjust(-(-len(integer_digits) // 4) * 4, "0")
+    fraction_digits = fraction_digits.ljust(-(-len(fraction_digits) // 4) * 4, "0")
+    groups = [int(part[i : i + 4]) for part in (integer_digits, fraction_digits) for i in range(0, len(part), 4)]
+
+    leading_zeros = next((i for i, group in enumerate(groups) if group), len(groups))
+    groups = groups[leading_zeros:]
+    while groups and groups[-1] == 0:
+        groups.pop()
+
+    return groups, (len(integer_digits) // 4 - 1 - leading_zeros if groups else 0)
+
+
+def _numeric(value: object) -> bytes:
+    number = value if isinstance(value, Decimal) else Decimal(cell_text(value))
+    if number.is_nan():
+        return _field(_NUMERIC_HEADER.pack(0, 0, _NUMERIC_NAN, 0))
+    if number.is_infinite():
+        raise ValueError(f"Cannot write {value!r} as a numeric")
+
+    sign, digit_tuple, exponent = number.as_tuple()
+    digits = "".join(map(str, digit_tuple)) + "0" * max(int(exponent), 0)
+    scale = max(-int(exponent), 0)
+    groups, weight = _base_10000_digits(digits[: len(digits) - scale], digits[len(digits) - scale :].rjust(scale, "0"))
+
+    header = _NUMERIC_HEADER.pack(len(groups), weight, _NUMERIC_NEGATIVE if sign else 0, scale)
+    return _field(header + struct.pack(f">{len(groups)}H", *groups))
+
+
+def _array(element_type: str) -> Callable[[Any], bytes]:
+    """Encoder of one-dimensional arrays (lists or tuples, see cell_text) of element_type."""
+
+    encode, oid = _ENCODERS[element_type], _ELEMENT_OIDS[element_type]
+
+    def encode_array(value: object) -> bytes:
+        if not isinstance(value, (list, tuple)) or any(isinstance(element, (list, tuple)) for element in value):
+            raise TypeError(f"Cannot write {value!r} as a one-dimensional array")
+        if not value:
+            return _field(_EMPTY_ARRAY_HEADER.pack(0, 0, oid))
+
+        header = _ARRAY_HEADER.pack(1, int(any(element is None for element in value)), oid, len(value), 1)
+        return _field(header + b"".join(_NULL_FIELD if element is None else encode(element) for element in value))
+
+    return encode_array
+
+
+# Binary COPY field encoders (returning the field's length and data) of non-null values, by Postgres type name. Values
+# are converted as Postgres would convert their text (see cell_text) in text COPY, so binary and text files of the same
+# rows load the same data.
+_ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    "bool": _bool,
+    "int2": lambda value: _INT2_FIELD.pack(2, int(value)),
+    "int4": lambda value: _INT4_FIELD.pack(4, int(value)),
+    "int8": lambda value: _INT8_FIELD.pack(8, int(value)),
+    "float4": lambda value: _FLOAT4_FIELD.pack(4, float(value)),
+    "float8": lambda value: _FLOAT8_FIELD.pack(8, float(value)),
+    "numeric": _numeric,
+    "text": _text,
+    "varchar": _text,
+    "bpchar": _text,
+    "name": _text,
+    "citext": _text,
+    "json": _text,
+    "jsonb": _jsonb,
+    "uuid": _uuid,
+    "date": _date,
+    "timestamp": _timestamp,
+    "timestamptz": _timestamptz,
+}
+
+# Type oids of the (built in) types arrays are encoded of, which array elements are tagged with
+_ELEMENT_OIDS = {
+    "bool": 16,
+    "int2": 21,
+    "int4": 23,
+    "int8": 20,
+    "float4": 700,
+    "float8": 701,
+    "numeric": 1700,
+    "text": 25,
+    "varchar": 1043,
+    "bpchar": 1042,
+    "name": 19,
+    "json": 114,
+    "jsonb": 3802,
+    "uuid": 2950,
+    "date": 1082,
+    "timestamp": 1114,
+    "timestamptz": 1184,
+}
+_ENCODERS.update({f"_{element_type}": _array(element_type) for element_type in _ELEMENT_OIDS})  # ("_" + element type)
+
+
+def fetch_column_types(cursor: cursor_type, table_name: str) -> list[str]:
+    """
+    Reads the types of table_name's columns (in column order, as copied) from the catalog: the names of their types,
+    or of their base types for domains, with enum types as text (which they are sent as).
+    """
+
+    cursor.execute(
+        """
+        SELECT CASE WHEN base_type.typtype = 'e' THEN 'text' ELSE base_type.typname END
+        FROM pg_attribute
+        JOIN pg_type column_type ON column_type.oid = pg_attribute.atttypid
+        JOIN pg_type base_type ON base_type.oid = CASE
+            WHEN column_type.typtype = 'd' THEN column_type.typbasetype ELSE column_type.oid
+        END
+        WHERE pg_attribute.attrelid = %s::regclass AND pg_attribute.attnum > 0 AND NOT pg_attribute.attisdropped
+        ORDER BY pg_attribute.attnum
+        """,
+        (table_name,),
+    )
+
+    return [type_name for (type_name,) in cursor.fetchall()]
+
+
+class PGCopyEncoder:
+    """Encodes rows as Postgres binary COPY tuples, only encoding a cell again when its value changes (by identity)."""
+
+    def __init__(self, column_types: list[str]) -> None:
+        """
+        :param column_types: Postgres type names of the table's columns, in order (see fetch_column_types)
+        """
+
+        unsupported = sorted(set(column_types) - _ENCODERS.keys())
+        if unsupported:
+            raise ValueError(f"Binary COPY of {', '.join(unsupported)} columns is not supported, use text COPY instead")
+
+        self.encoders = [_ENCODERS[column_type] for column_type in column_types]
+        self.field_count = _INT2.pack(len(column_types))
+        self.last_values: list = [_UNSET] * len(column_types)
+        self.last_fields: list[bytes] = [b""] * len(column_types)
+
+    def encode_row(self, row: list) -> bytes:
+        """Returns row as a binary COPY tuple (field count, followed by each field's length and data)."""
+
+        if len(row) != len(self.encoders):
+            raise ValueError(f"Expected rows of {len(self.encoders)} columns, got {len(row)}")
+
+        last_values, last_fields = self.last_values, self.last_fields
+        for i, value in enumerate(row):
+            if value is not last_values[i]:
+                last_values[i] = value
+                last_fields[i] = _NULL_FIELD if value is None else self.encoders[i](value)
+
+        return self.field_count + b"".join(last_fields)
+
+
+def encode_binary_rows(rows: Iterable[list], column_types: list[str]) -> Iterator[bytes]:
+    """
+    Encodes rows (see PGCopyEncoder) as binary COPY tuples, BATCH_SIZE rows at a time, without header or trailer.
+
+    :param rows: rows to encode, consumed lazily
+    :param column_types: Postgres type names of the table's columns, in order (see fetch_column_types)
+    :return: encoded batches of rows
+    """
+
+    encoder = PGCopyEncoder(column_types)
+    rows = iter(rows)
+
+    while batch := list(islice(rows, BATCH_SIZE)):
+        yield b"".join(map(encoder.encode_row, batch))
+
+
+def encode_binary_copy(rows: Iterable[list], column_types: list[str]) -> Iterator[bytes]:
+    """Encodes rows as complete binary COPY data (header, tuples and trailer), e.g. for RowReader."""
+
+    yield PGCOPY_HEADER
+    yield from encode_binary_rows(rows, column_types)
+    yield PGCOPY_TRAILER
+
+
+def write_binary_rows(file: BinaryIO, rows: Iterable[list], column_types: list[str]) -> None:
+    """
+    Writes rows to a binary file as binary COPY tuples (without the file's header and trailer).
+
+    :param file: binary file to write to (e.g. as opened by open_tsv)
+    :param rows: rows to write, consumed lazily
+    :param column_types: Postgres type names of the table's columns, in order (see fetch_column_types)
+    """
+
+    for batch in encode_binary_rows(rows, column_types):
+        file.write(batch)
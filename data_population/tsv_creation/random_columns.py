@@ -0,0 +1,95 @@
+import random
+
+from typing import Any, Callable, Iterator, Sequence
+
+from data_population.common.utils import derive_seed, random_uuid
+from settings import GENERATION_BACKEND
+
+try:
+    import numpy
+except ImportError:  # numpy is only required by the (opt-in) numpy generation backend
+    numpy = None
+
+CHUNK_SIZE = 10000  # number of values drawn at once by the numpy backend
+
+
+class RandomColumns:
+    """
+    Draws columns of random values for table generators, seeded from a base seed and any number of keys (see
+    derive_seed).
+    """
+
+    def __init__(self, seed: int, *keys: Any) -> None:
+        self.rng = random.Random(derive_seed(seed, *keys))
+
+    def integers(self, low: int, high: int, size: int) -> Iterator[int]:
+        """size random integers between low and high (inclusive)"""
+        return (self.rng.randint(low, high) for _ in range(size))
+
+    def choices(self, population: Sequence, size: int) -> Iterator:
+        """size random picks from population (e.g. categorical values, or foreign keys)"""
+        return (self.rng.choice(population) for _ in range(size))
+
+    def uuids(self, size: int) -> Iterator[str]:
+        """size random (version 4) uuids, as strings"""
+        return (str(random_uuid(self.rng)) for _ in range(size))
+
+
+class NumpyRandomColumns(RandomColumns):
+    """
+    "numpy" backend: draws CHUNK_SIZE values of a column at once with NumPy, rather than one value per row. Draws are
+    different to those of the python backend, so the same seed generates different (but still reproducible) data.
+    """
+
+    def __init__(self, seed: int, *keys: Any) -> None:  # pylint: disable=super-init-not-called
+        if numpy is None:
+            raise RuntimeError("The numpy generation backend requires numpy to be installed (pip install numpy)")
+
+        self.generator = numpy.random.default_rng(derive_seed(seed, *keys))
+
+    @staticmethod
+    def _chunked(size: int, draw: Callable[[int], list]) -> Iterator:
+        for start in range(0, size, CHUNK_SIZE):
+            yield from draw(min(CHUNK_SIZE, size - start))
+
+    def integers(self, low: int, high: int, size: int) -> Iterator[int]:
+        return self._chunked(size, lambda n: self.generator.integers(low, high, n, endpoint=True).tolist())
+
+    def choices(self, population: Sequence, size: int) -> Iterator:
+        return self._chunked(
+            size, lambda n: [population[i] for i in self.generator.integers(0, len(population), n).tolist()]
+        )
+
+    def _uuid_chunk(self, count: int) -> list[str]:
+        # All 128 bits of the uuids come from one random buffer, with version and variant bits then set per RFC 4122
+        buffer = numpy.frombuffer(self.generator.bytes(16 * count), dtype=numpy.uint8).reshape(count, 16).copy()
+        buffer[:, 6] = buffer[:, 6] & 0x0F | 0x40
+        buffer[:, 8] = buffer[:, 8] & 0x3F | 0x80
+        hex_digits = buffer.tobytes().hex()
+
+        return [
+            f"{hex_digits[i:i + 8]}-{hex_digits[i + 8:i + 12]}-{hex_digits[i + 12:i + 16]}-"
+            f"{hex_digits[i + 16:i + 20]}-{hex_digits[i + 20:i + 32]}"
+            for i in range(0, 32 * count, 32)
+        ]
+
+    def uuids(self, size: int) -> Iterator[str]:
+        return self._chunked(size, self._uuid_chunk)
+
+
+backends = {"python": RandomColumns, "numpy": NumpyRandomColumns}
+
+
+def random_columns(seed: int, *keys: Any, backend: str = GENERATION_BACKEND) -> RandomColumns:
+    """
+    Returns a RandomColumns for the provided backend (GENERATION_BACKEND by default).
+
+    :param seed: base seed
+    :param keys: keys to derive the seed for these columns from, e.g. table name and shard index
+    :param backend: one of backends
+    """
+
+    if backend not in backends:
+        raise ValueError(f"Unknown generation backend {backend}, allowed backends {list(backends)}")
+
+    return backends[backend](seed, *keys)
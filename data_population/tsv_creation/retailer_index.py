@@ -0,0 +1,49 @@
+from array import array
+from random import Random
+
+
+class RetailerIndex:
+    """
+    Account holder ids grouped by retailer, held in typed arrays rather than lists of ints: account_holder_ids holds
+    the ids of retailer 1's account holders, then those of retailer 2 etc. (each in ascending order), with retailer r's
+    ids at account_holder_ids[offsets[r - 1]:offsets[r]].
+    """
+
+    def __init__(self, account_holder_retailers: array, retailers: int) -> None:
+        """
+        Builds the index in a single pass over account holders.
+
+        :param account_holder_retailers: retailer_id per account_holder, indexed by account_holder_id - 1
+        :param retailers: number of retailers (retailer ids are 1 to retailers)
+        """
+
+        by_retailer = [array("I") for _ in range(retailers + 1)]  # indexed by retailer_id
+        for account_holder_id, retailer_id in enumerate(account_holder_retailers, start=1):
+            by_retailer[retailer_id].append(account_holder_id)
+
+        self.offsets = array("I", [0])
+        self.account_holder_ids = array("I")
+        for retailer_account_holder_ids in by_retailer[1:]:
+            self.account_holder_ids.extend(retailer_account_holder_ids)
+            self.offsets.append(len(self.account_holder_ids))
+
+    def account_holders(self, retailer_id: int) -> array:
+        """Ids of retailer_id's account holders (a copy)."""
+        return self.account_holder_ids[self.offsets[retailer_id - 1] : self.offsets[retailer_id]]
+
+    def random_account_holder(self, retailer_id: int, rng: Random) -> int:
+        """
+        Picks one of retailer_id's account holders at random (with the same draw as rng.choice on their ids, without
+        copying them).
+        """
+
+        start, stop = self.offsets[retailer_id - 1], self.offsets[retailer_id]
+        if start == stop:
+            raise IndexError(f"Cannot choose an account holder for retailer {retailer_id}: it has no account holders")
+
+        return self.account_holder_ids[start + rng.randrange(stop - start)]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the index' arrays, in bytes."""
+        return (len(self.offsets) + len(self.account_holder_ids)) * self.account_holder_ids.itemsize
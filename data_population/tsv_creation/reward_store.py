@@ -0,0 +1,62 @@
+from array import array
+from typing import NamedTuple
+from uuid import UUID
+
+from data_population.tsv_creation.uuid_array import UUID_SIZE
+
+
+class Reward(NamedTuple):
+    reward_uuid: str
+    code: str
+    reward_config_id: int
+    retailer_id: int
+
+
+class RewardStore:
+    """Compact, columnar store of generated rewards, read back by index as Reward tuples."""
+
+    def __init__(self) -> None:
+        self.reward_uuids = bytearray()
+        self.codes = bytearray()
+        self.reward_config_ids = array("I")
+        self.retailer_ids = array("I")
+
+    def append(self, reward_uuid: UUID, code: UUID, reward_config_id: int, retailer_id: int) -> None:
+        self.reward_uuids += reward_uuid.bytes
+        self.codes += code.bytes
+        self.reward_config_ids.append(reward_config_id)
+        self.retailer_ids.append(retailer_id)
+
+    def extend(self, rewards: "RewardStore") -> None:
+        self.reward_uuids += rewards.reward_uuids
+        self.codes += rewards.codes
+        self.reward_config_ids.extend(rewards.reward_config_ids)
+        self.retailer_ids.extend(rewards.retailer_ids)
+
+    def __len__(self) -> int:
+        return len(self.reward_config_ids)
+
+    def __getitem__(self, index: int) -> Reward:
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"Reward index {index} out of range")
+
+        index %= len(self)
+        return Reward(
+            reward_uuid=self.reward_uuid(index),
+            code=str(UUID(bytes=bytes(self.codes[index * UUID_SIZE : (index + 1) * UUID_SIZE]))),
+            reward_config_id=self.reward_config_ids[index],
+            retailer_id=self.retailer_ids[index],
+        )
+
+    def reward_uuid(self, index: int) -> str:
+        """Reward uuid of the reward at index (without reading the rest of the reward)."""
+        return str(UUID(bytes=bytes(self.reward_uuids[index * UUID_SIZE : (index + 1) * UUID_SIZE])))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the store's columns, in bytes."""
+        return (
+            len(self.reward_uuids)
+            + len(self.codes)
+            + len(self) * (self.reward_config_ids.itemsize + self.retailer_ids.itemsize)
+        )
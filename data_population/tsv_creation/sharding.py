@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+# Number of ids per shard. Each shard has its own random seed, so changing this changes the generated data for a given
+# seed (but not the number of worker processes, which only affects how many shards are generated at once).
+SHARD_SIZE = 50000
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    start: int  # first id in shard (inclusive)
+    stop: int  # last id in shard (exclusive)
+
+    @property
+    def ids(self) -> range:
+        return range(self.start, self.stop)
+
+
+def split_into_shards(total: int, shard_size: int = SHARD_SIZE, first_id: int = 1) -> list[Shard]:
+    """
+    Splits total ids, from first_id, into consecutive id-range shards of at most shard_size ids.
+
+    :param total: number of rows/ids to split.
+    :param shard_size: maximum number of ids per shard.
+    :param first_id: first id to split (1 unless following on from existing rows, see growth).
+    :return: list of shards in id order (always at least one, possibly empty, shard).
+    """
+
+    return [
+        Shard(index=index, start=start, stop=min(start + shard_size, first_id + total))
+        for index, start in enumerate(range(first_id, first_id + max(total, 1), shard_size))
+    ]
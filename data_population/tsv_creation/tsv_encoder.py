@@ -0,0 +1,186 @@
+from itertools import islice
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from data_population.common.compression import open_compressed
+
+WRITE_BUFFER_SIZE = 1024 * 1024  # bytes buffered by tsv file streams (see open_tsv)
+BATCH_SIZE = 1000  # number of rows encoded and written to a tsv at once
+PREFETCH_BATCHES = 16  # number of encoded batches a RowReader may generate ahead of its reader
+NULL_TEXT = "NULL"  # text COPY cell of None, i.e. the null marker tables are copied with (see copy_into_table)
+
+# Characters with special meaning in Postgres' text COPY format, and their escaped forms
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+_ARRAY_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"'})  # (of quoted array literal elements)
+_UNSET = object()
+
+
+def cell_text(value: object) -> str:
+    """
+    Text of a single value, as written to a COPY cell (before escaping, with None as NULL_TEXT and lists or tuples as
+    one-dimensional array literals).
+    """
+
+    if value is None:
+        return NULL_TEXT
+    if isinstance(value, str):
+        return str.__str__(value)  # str subclasses (e.g. str enums) as their value rather than their str()
+    if isinstance(value, (list, tuple)):
+        return "{" + ",".join(map(_array_element_text, value)) + "}"
+
+    return str(value)
+
+
+def _array_element_text(value: object) -> str:
+    if value is None:
+        return "NULL"  # (an array literal's null, whatever NULL_TEXT is)
+
+    return '"' + cell_text(value).translate(_ARRAY_ESCAPES) + '"'
+
+
+def render_cell(value: object) -> str:
+    """Renders a single value as a Postgres text COPY cell (its text, escaped, with None as NULL_TEXT)."""
+    return cell_text(value).translate(_COPY_ESCAPES)
+
+
+class TSVEncoder:
+    """
+    Encodes rows as lines of Postgres text COPY data, only rendering a cell again when its value changes (by identity).
+    """
+
+    def __init__(self) -> None:
+        self.last_values: list = []
+        self.last_cells: list[str] = []
+
+    def encode_row(self, row: list) -> str:
+        """Returns row as a line of text COPY data (including the line terminator)."""
+
+        if len(row) != len(self.last_values):
+            self.last_values = [_UNSET] * len(row)
+            self.last_cells = [""] * len(row)
+
+        last_values, last_cells = self.last_values, self.last_cells
+        for i, value in enumerate(row):
+            if value is not last_values[i]:
+                last_values[i] = value
+                # (ints and plain strings, the most common changing cells, are special-cased for speed)
+                if value.__class__ is str:
+                    last_cells[i] = value
+                elif value.__class__ is int:
+                    last_cells[i] = str(value)
+                else:
+                    last_cells[i] = cell_text(value)
+
+        line = "\t".join(last_cells)
+
+        # Escaping is rarely needed, so it is checked for once per line rather than per cell
+        if "\\" in line or "\n" in line or "\r" in line or line.count("\t") >= len(row):
+            line = "\t".join(map(render_cell, row))
+
+        return line + "\n"
+
+
+def encode_rows(rows: Iterable[list]) -> Iterator[bytes]:
+    """
+    Encodes rows (see TSVEncoder) as utf-8 text COPY data, BATCH_SIZE rows at a time.
+
+    :param rows: rows to encode, consumed lazily
+    :return: encoded batches of rows
+    """
+
+    encoder = TSVEncoder()
+    rows = iter(rows)
+
+    while batch := list(islice(rows, BATCH_SIZE)):
+        yield "".join(map(encoder.encode_row, batch)).encode("utf-8")
+
+
+def write_rows(file: BinaryIO, rows: Iterable[list]) -> None:
+    """
+    Encodes rows (see TSVEncoder) and writes them to a binary file, BATCH_SIZE rows at a time.
+
+    :param file: binary file to write to (e.g. as opened by open_tsv)
+    :param rows: rows to write, consumed lazily
+    """
+
+    for batch in encode_rows(rows):
+        file.write(batch)
+
+
+class RowReader:
+    """
+    Read-only file-like object serving rows as COPY data, generated by a background thread. Must be used as a context
+    manager.
+    """
+
+    def __init__(self, rows: Iterable[list], encode: Callable[[Iterable[list]], Iterator[bytes]] | None = None) -> None:
+        self.rows = rows
+        self.encode = encode or encode_rows  # encodes rows as batches of bytes
+        self.buffer = bytearray()
+        self.batches: Queue = Queue(maxsize=PREFETCH_BATCHES)
+        self.finished = False  # whether all batches have been read from self.batches
+        self.stopping = Event()
+        self.thread = Thread(target=self._produce, name="RowReader", daemon=True)
+
+    def __enter__(self) -> "RowReader":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stopping.set()
+        self.thread.join()
+
+    def _put(self, item: bytes | BaseException | None) -> None:
+        while not self.stopping.is_set():
+            try:
+                self.batches.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def _produce(self) -> None:
+        try:
+            for batch in self.encode(self.rows):
+                if self.stopping.is_set():
+                    return
+                self._put(batch)
+        except Exception as ex:  # pylint: disable=broad-except
+            self._put(ex)  # re-raised by the reader
+        else:
+            self._put(None)  # end of rows
+
+    def _fill(self, size: int) -> None:
+        while not self.finished and (size < 0 or len(self.buffer) < size):
+            item = self.batches.get()
+            if item is None:
+                self.finished = True
+            elif isinstance(item, BaseException):
+                self.finished = True
+                raise item
+            else:
+                self.buffer += item
+
+    def read(self, size: int = -1) -> bytes:
+        self._fill(size)
+        if size < 0:
+            size = len(self.buffer)
+
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        while b"\n" not in self.buffer and not self.finished:
+            self._fill(len(self.buffer) + 1)
+
+        end = self.buffer.find(b"\n") + 1 or len(self.buffer)
+        return self.read(end if size < 0 else min(end, size))
+
+
+def open_tsv(file_name: str, compression: str | None = None) -> BinaryIO:
+    """
+    Opens a tsv for writing as a binary stream with a large (WRITE_BUFFER_SIZE) buffer, compressing it as it is written
+    if a compression is provided (see compression.open_compressed).
+    """
+    return open_compressed(file_name, "wb", compression, buffering=WRITE_BUFFER_SIZE)
@@ -1,11 +1,24 @@
-import csv
 import logging
 import os
+import random
+import shutil
+import time
 
-from uuid import uuid4
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, replace
+from functools import partial
+from itertools import repeat
+from multiprocessing import get_context
+from typing import Any, BinaryIO, Callable, Collection, Generator, Iterable, Iterator
 
-from data_population.common.utils import id_generator
+from data_population.common.compression import compress, extensions, split_compression
+from data_population.common.connection_pool import pooled_connection
+from data_population.common.task_graph import run_task_graph
+from data_population.common.utils import derive_seed, random_uuid, seeded_random
 from data_population.data_config import DataConfig
+from data_population.tsv_creation.dataset_cache import dataset_directory, generator_version
 from data_population.tsv_creation.fixtures import (
     carina_retry_task_types_to_populate,
     fetch_task_types_ids,
@@ -14,149 +27,567 @@ from data_population.tsv_creation.fixtures import (
     vela_retry_task_types_to_populate,
 )
 from data_population.tsv_creation.generators.carina_generators import CarinaGenerators
-from data_population.tsv_creation.generators.polaris_generators import PolarisGenerators
-from data_population.tsv_creation.generators.task_generators import retry_task, task_type_key_value
+from data_population.tsv_creation.generators.polaris_generators import PolarisGenerators, share_state, sharing_state
+from data_population.tsv_creation.generators.task_generators import retry_task, retry_task_count, task_type_key_value
 from data_population.tsv_creation.generators.vela_generators import VelaGenerators
-from settings import CARINA_DB, POLARIS_DB, TSV_BASE_DIR, VELA_DB
-
-execution_order = id_generator(1)
+from data_population.tsv_creation.growth import GROWN_TABLES, ExistingData
+from data_population.tsv_creation.manifest import (
+    MANIFEST_NAME,
+    Manifest,
+    TableFile,
+    read_manifest,
+    remove_manifest,
+    table_file,
+    write_manifest,
+)
+from data_population.tsv_creation.pgcopy_encoder import (
+    PGCOPY_HEADER,
+    PGCOPY_TRAILER,
+    fetch_column_types,
+    write_binary_rows,
+)
+from data_population.tsv_creation.sharding import Shard, split_into_shards
+from data_population.tsv_creation.tsv_encoder import open_tsv, write_rows
+from data_population.tsv_creation.uuid_array import UUIDArray, share_arrays, sharing
+from settings import CARINA_DB, GENERATION_PROCESSES, POLARIS_DB, TSV_COMPRESSION, VELA_DB
 
 logger = logging.getLogger("TSVHandler")
 
 
+TEXT_EXTENSION = ".tsv"
+BINARY_EXTENSION = ".pgcopy"
+
+
+def _write_rows(file: BinaryIO, rows: Generator[list, None, Any], column_types: list[str] | None) -> tuple[int, Any]:
+    """
+    Writes rows as text COPY data or, given column types, as binary COPY tuples (without header or trailer). Returns the
+    number of rows written and the value returned by the rows' generator (see TableJob.collect), if any.
+    """
+
+    count = 0
+    result = None
+
+    def returned() -> Generator[list, None, None]:
+        nonlocal result
+        result = yield from rows
+
+    def counted() -> Iterator[list]:
+        nonlocal count
+        for count, row in enumerate(returned(), start=1):
+            yield row
+
+    if column_types is None:
+        write_rows(file, counted())
+    else:
+        write_binary_rows(file, counted(), column_types)
+
+    return count, result
+
+
+@contextmanager
+def _open_data_file(
+    file_name: str, column_types: list[str] | None, compression: str | None
+) -> Generator[BinaryIO, None, None]:
+    """Opens a tsv (or, given column types, a binary COPY file, which is given its header and trailer) for writing."""
+
+    with open_tsv(file_name, compression) as file:
+        if column_types is not None:
+            file.write(PGCOPY_HEADER)
+        yield file
+        if column_types is not None:
+            file.write(PGCOPY_TRAILER)
+
+
+def _share_with_worker(buffers: dict[str, bytes], states: dict[int, dict[str, Any]]) -> None:
+    """Process pool initializer: receives the shared arrays (see share_arrays) and generator state (see share_state)."""
+    share_arrays(buffers)
+    share_state(states)
+
+
+def _write_shard(
+    generate: Callable[[Shard], Generator[list, None, Any]],
+    shard: Shard,
+    file_name: str,
+    column_types: list[str] | None,
+    compression: str | None,
+) -> tuple[int, Any]:
+    """
+    Process pool worker: writes the rows of a single shard to their own partial tsv (or binary COPY file), compressed
+    as a stream of its own (so that compressed parts can be concatenated). Returns the number of rows written and the
+    value returned by the shard's generator.
+    """
+    with open_tsv(file_name, compression) as file:
+        return _write_rows(file, generate(shard), column_types)
+
+
+def _combined(written: Iterable[tuple[int, Any]]) -> tuple[int, list]:
+    """Total number of rows written, and the values returned by their generators, of shards written by _write_rows."""
+    written = list(written)
+    return sum(rows for rows, _ in written), [result for _, result in written]
+
+
+def _write_table(
+    generate: Callable[[], Generator[list, None, Any]],
+    file_name: str,
+    column_types: list[str] | None,
+    compression: str | None,
+) -> tuple[int, Any]:
+    """
+    Process pool worker: writes an unsharded table's rows, returning the number written and the generator's return
+    value.
+    """
+    with _open_data_file(file_name, column_types, compression) as file:
+        return _write_rows(file, generate(), column_types)
+
+
+@dataclass(frozen=True)
+class TableJob:
+    db_name: str
+    table: str
+    # Generates the table's rows: takes no arguments, or a Shard if shard_total is set. Must be picklable, as tables
+    # (and shards) are generated by the process pool
+    generate: Callable
+    shard_total: int | None = None  # number of ids to generate in id-range shards (None: not sharded)
+    first_id: int = 1  # first id of the id-range shards (see split_into_shards)
+    prerequisites: tuple[str, ...] = ()  # names of jobs whose generated state this job relies on
+    # Called (in this process) with the values returned by generate's generators, one per shard in id order (or just
+    # the one if not sharded), to save state later tables rely on, as generate may run in another process
+    collect: Callable[[list], None] | None = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.db_name}.{self.table}"
+
+
 class TSVHandler:
     """Handles whole TSV creation journey for all databases."""
 
-    def __init__(self, data_config: DataConfig) -> None:
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        data_config: DataConfig,
+        seed: int | None = None,
+        binary: bool = False,
+        compression: str | None = TSV_COMPRESSION,
+        *,
+        directory: str | None = None,
+        existing: ExistingData | None = None,
+    ) -> None:
         self.id = 0  # pylint: disable=invalid-name
         self.data_config = data_config
-        account_holder_uuids = [uuid4() for _ in range(data_config.account_holders)]
-        self.polaris_generator = PolarisGenerators(data_config=data_config, account_holder_uuids=account_holder_uuids)
-        self.vela_generator = VelaGenerators(data_config=data_config, account_holder_uuids=account_holder_uuids.copy())
-        self.carina_generator = CarinaGenerators(data_config=data_config)
+        self.seed = random.randrange(2**32) if seed is None else seed
+        self.binary = binary  # whether to write binary COPY files rather than tsvs
+        self.compression = compression  # compression of written files (see compression.extensions), None for none
+        # directory files are written to (by default the dataset's cache directory, see dataset_cache)
+        self.directory = dataset_directory(data_config, self.seed) if directory is None else directory
+        self.processes = GENERATION_PROCESSES
+        self.executor: ProcessPoolExecutor | None = None  # process pool generating tables, set by create_tsv_files
+        self.rows_written: dict[str, int] = {}  # number of rows written per table (by job name), see write_table
+        self.seconds_taken: dict[str, float] = {}  # seconds taken to generate and write each table (by job name)
+        # data already in the databases, when generating the rows data_config adds to it (see growth), None otherwise
+        self.existing = existing
+        logger.info(f"Generating data with seed {self.seed} (re-use this seed to reproduce the same data)")
+
+        rng = seeded_random(self.seed, "account_holder_uuid")
+        # Shared by Polaris and Vela generators (and process pool workers, see create_tsv_files), following on from
+        # those of any existing account holders
+        self.account_holder_uuids = UUIDArray(
+            (b"" if existing is None else existing.account_holder_uuids)
+            + b"".join(random_uuid(rng).bytes for _ in range(data_config.account_holders)),
+            name="account_holder_uuids",
+        )
+        self.polaris_generator = PolarisGenerators(
+            data_config=data_config,
+            account_holder_uuids=self.account_holder_uuids,
+            seed=derive_seed(self.seed, POLARIS_DB),
+            existing=existing,
+        )
+        self.vela_generator = VelaGenerators(
+            data_config=data_config,
+            account_holder_uuids=self.account_holder_uuids,
+            seed=derive_seed(self.seed, VELA_DB),
+        )
+        self.carina_generator = CarinaGenerators(
+            data_config=data_config, seed=derive_seed(self.seed, CARINA_DB), existing=existing
+        )
         self.polaris_task_type_ids = fetch_task_types_ids(POLARIS_DB)
         self.vela_task_type_ids = fetch_task_types_ids(VELA_DB)
         self.carina_task_type_ids = fetch_task_types_ids(CARINA_DB)
 
-    def create_tsv_files(self) -> None:
+    def create_tsv_files(self, tables: Collection[str] | None = None) -> None:
         """
-        Writes generated table data to tsvs for all databases, in execution order.
+        Writes generated table data to tsvs (or binary COPY files) and their manifest, for all tables or those selected.
 
-        N.b. tables will later be written to the db in the order below.
+        :param tables: names ("<db>.<table>") of the tables to generate, None for all
         """
 
-        # VELA GENERATION
-        self.write_to_tsv(self.vela_generator.retailer_rewards(), VELA_DB, table="retailer_rewards")
-        self.write_to_tsv(self.vela_generator.campaign(), VELA_DB, table="campaign")
-        self.write_to_tsv(self.vela_generator.earn_rule(), VELA_DB, table="earn_rule")
-        self.write_to_tsv(self.vela_generator.reward_rule(), VELA_DB, table="reward_rule")
-        self.write_to_tsv(self.vela_generator.transaction(), VELA_DB, table="transaction")
-        self.write_to_tsv(self.vela_generator.processed_transaction(), VELA_DB, table="processed_transaction")
-
-        self.write_to_tsv(
-            retry_task(self.vela_task_type_ids, vela_retry_task_types_to_populate, data_config=self.data_config),
-            VELA_DB,
-            table="retry_task",
-        )
-        self.write_to_tsv(
-            task_type_key_value(
-                task_type_ids_dict=self.vela_task_type_ids,
-                task_type_keys_dict=generate_task_type_key_values(VELA_DB),
-                task_types_to_populate=vela_retry_task_types_to_populate,
-                data_config=self.data_config,
-            ),
-            VELA_DB,
-            table="task_type_key_value",
-        )
+        previous_tables = self.previous_tables() if tables is not None else {}
+        remove_manifest(self.directory)
+        all_jobs = self.table_jobs()
+        jobs = all_jobs if tables is None else self.select_jobs(all_jobs, tables)
+        column_types = self.fetch_column_types(jobs) if self.binary else {}
+        tsv_names = {  # (named by position among all tables, whichever are generated)
+            job.name: self._tsv_name(
+                job.db_name, job.table, execute_id, binary=self.binary, compression=self.compression
+            )
+            for execute_id, job in enumerate(all_jobs, start=1)
+        }
+        tasks = {
+            job.name: partial(self.write_table, job, tsv_names[job.name], column_types.get(job.name)) for job in jobs
+        }
+
+        with ExitStack() as stack:
+            if self.processes > 1:
+                # Account holder uuids and the Polaris generator's account holder retailers and value pools are sent
+                # to each worker once (rather than with every task)
+                shared_buffers = stack.enter_context(sharing([self.account_holder_uuids]))
+                shared_states = stack.enter_context(sharing_state([self.polaris_generator]))
+                # spawned (rather than forked) as the pool is used from several threads
+                self.executor = stack.enter_context(
+                    ProcessPoolExecutor(
+                        max_workers=self.processes,
+                        mp_context=get_context("spawn"),
+                        initializer=_share_with_worker,
+                        initargs=(shared_buffers, shared_states),
+                    )
+                )
+            run_task_graph(tasks, {job.name: job.prerequisites for job in jobs}, max_workers=self.processes)
+
+        self.executor = None
+        self.write_manifest(all_jobs, tsv_names, previous_tables)
 
-        # CARINA GENERATION
-        self.write_to_tsv(self.carina_generator.retailer(), CARINA_DB, table="retailer")
-        self.write_to_tsv(self.carina_generator.retailer_fetch_type(), CARINA_DB, table="retailer_fetch_type")
-        self.write_to_tsv(self.carina_generator.reward_config(), CARINA_DB, table="reward_config")
-        self.write_to_tsv(self.carina_generator.reward(), CARINA_DB, table="reward")
-        self.write_to_tsv(self.carina_generator.reward_update(), CARINA_DB, table="reward_update")
-
-        self.write_to_tsv(
-            retry_task(self.carina_task_type_ids, carina_retry_task_types_to_populate, data_config=self.data_config),
-            CARINA_DB,
-            table="retry_task",
+    def previous_tables(self) -> dict[str, TableFile]:
+        """Tables of the dataset's current manifest (if any) by "<db>.<table>", see create_tsv_files."""
+
+        if not os.path.isfile(os.path.join(self.directory, MANIFEST_NAME)):
+            return {}
+
+        return {f"{table.db}.{table.table}": table for table in read_manifest(self.directory).tables}
+
+    def write_manifest(
+        self, jobs: list[TableJob], tsv_names: dict[str, str], previous_tables: dict[str, TableFile] | None = None
+    ) -> None:
+        """
+        Writes the manifest of the tsvs written for jobs (by job name, those in rows_written), see create_tsv_files,
+        keeping previous_tables (by job name) of the jobs not written where they are in the same format.
+        """
+
+        tables = []
+        for order, job in enumerate(jobs, start=1):
+            previous = (previous_tables or {}).get(job.name)
+            if job.name in self.rows_written:
+                tables.append(
+                    table_file(
+                        tsv_names[job.name],
+                        db_name=job.db_name,
+                        table=job.table,
+                        order=order,
+                        rows=self.rows_written[job.name],
+                        binary=self.binary,
+                    )
+                )
+            elif previous is not None and (previous.binary, previous.compression) == (self.binary, self.compression):
+                tables.append(replace(previous, order=order))
+
+        included = {f"{table.db}.{table.table}" for table in tables}
+        manifest = Manifest(
+            data_config=asdict(self.data_config),
+            seed=self.seed,
+            tables=tables,
+            generator_version=generator_version(),
+            missing=[job.name for job in jobs if job.name not in included],
         )
+        write_manifest(manifest, self.directory)
+        logger.info(f"Wrote manifest of {len(tables)} tables to {self.directory}")
+
+    def table_jobs(self) -> list[TableJob]:
+        """All tables to generate, in execution order (tables will later be written to the db in this order)."""
+
+        vela, carina, polaris = self.vela_generator, self.carina_generator, self.polaris_generator
+        carina_reward = f"{CARINA_DB}.reward"
+        first_account_holder_id = self._first_id(POLARIS_DB, "account_holder")
 
-        self.write_to_tsv(
-            task_type_key_value(
-                task_type_ids_dict=self.carina_task_type_ids,
-                task_type_keys_dict=generate_task_type_key_values(CARINA_DB),
-                task_types_to_populate=carina_retry_task_types_to_populate,
-                data_config=self.data_config,
+        jobs = [
+            # VELA GENERATION
+            TableJob(VELA_DB, "retailer_rewards", vela.retailer_rewards),
+            TableJob(VELA_DB, "campaign", vela.campaign),
+            TableJob(VELA_DB, "earn_rule", vela.earn_rule),
+            TableJob(VELA_DB, "reward_rule", vela.reward_rule),
+            TableJob(
+                VELA_DB,
+                "transaction",
+                vela.transaction,
+                shard_total=self.data_config.transactions,
+                first_id=self._first_id(VELA_DB, "transaction"),
             ),
-            CARINA_DB,
-            table="task_type_key_value",
-        )
+            TableJob(
+                VELA_DB,
+                "processed_transaction",
+                vela.processed_transaction,
+                shard_total=self.data_config.transactions,
+                first_id=self._first_id(VELA_DB, "processed_transaction"),
+            ),
+            *self.retry_task_jobs(VELA_DB, self.vela_task_type_ids, vela_retry_task_types_to_populate),
+            # CARINA GENERATION
+            TableJob(CARINA_DB, "retailer", carina.retailer),
+            TableJob(CARINA_DB, "retailer_fetch_type", carina.retailer_fetch_type),
+            TableJob(CARINA_DB, "reward_config", carina.reward_config),
+            TableJob(CARINA_DB, "reward", carina.reward, collect=carina.keep_rewards),
+            TableJob(CARINA_DB, "reward_update", carina.reward_update, prerequisites=(carina_reward,)),
+            *self.retry_task_jobs(CARINA_DB, self.carina_task_type_ids, carina_retry_task_types_to_populate),
+            # POLARIS GENERATION (ACCOUNT_HOLDER_REWARDS AND RETRY TASKS)
+            TableJob(POLARIS_DB, "retailer_config", polaris.retailer_config),
+            TableJob(
+                POLARIS_DB,
+                "account_holder",
+                polaris.account_holder,
+                shard_total=self.data_config.account_holders,
+                first_id=first_account_holder_id,
+            ),
+            TableJob(
+                POLARIS_DB,
+                "account_holder_profile",
+                polaris.account_holder_profile,
+                shard_total=self.data_config.account_holders,
+                first_id=first_account_holder_id,  # (sharded by account holder)
+            ),
+            TableJob(POLARIS_DB, "account_holder_marketing_preference", polaris.account_holder_marketing_preference),
+            TableJob(POLARIS_DB, "account_holder_campaign_balance", polaris.account_holder_campaign_balance),
+            TableJob(
+                POLARIS_DB,
+                "account_holder_reward",
+                partial(polaris.account_holder_reward, carina.allocated_rewards),  # (filled by carina.keep_rewards)
+                prerequisites=(carina_reward,),
+            ),
+            TableJob(
+                POLARIS_DB,
+                "account_holder_pending_reward",
+                partial(polaris.account_holder_pending_reward, carina.unallocated_rewards),
+                prerequisites=(carina_reward,),
+            ),
+            TableJob(
+                POLARIS_DB,
+                "balance_adjustment",
+                polaris.balance_adjustment,
+                shard_total=self.data_config.transactions,
+                first_id=self._first_id(POLARIS_DB, "balance_adjustment"),
+            ),
+            TableJob(POLARIS_DB, "email_template", polaris.email_template),
+            *self.retry_task_jobs(POLARIS_DB, self.polaris_task_type_ids, polaris_retry_task_types_to_populate),
+        ]
 
-        # POLARIS GENERATION (ACCOUNT_HOLDER_REWARDS AND RETRY TASKS)
+        if self.existing is None:
+            return jobs
 
-        self.polaris_generator.allocated_rewards = self.carina_generator.allocated_rewards
-        self.polaris_generator.unallocated_rewards = self.carina_generator.unallocated_rewards
+        grown = {job.name for job in jobs if job.table in GROWN_TABLES[job.db_name]}
+        return [
+            replace(job, prerequisites=tuple(name for name in job.prerequisites if name in grown))
+            for job in jobs
+            if job.name in grown
+        ]
 
-        self.write_to_tsv(self.polaris_generator.retailer_config(), POLARIS_DB, table="retailer_config")
-        self.write_to_tsv(self.polaris_generator.account_holder(), POLARIS_DB, table="account_holder")
-        self.write_to_tsv(self.polaris_generator.account_holder_profile(), POLARIS_DB, table="account_holder_profile")
-        self.write_to_tsv(
-            self.polaris_generator.account_holder_marketing_preference(),
-            POLARIS_DB,
-            table="account_holder_marketing_preference",
-        )
-        self.write_to_tsv(
-            self.polaris_generator.account_holder_campaign_balance(),
-            POLARIS_DB,
-            table="account_holder_campaign_balance",
-        )
-        self.write_to_tsv(
-            self.polaris_generator.account_holder_reward(),
-            POLARIS_DB,
-            table="account_holder_reward",
-        )
-        self.write_to_tsv(
-            self.polaris_generator.account_holder_pending_reward(), POLARIS_DB, table="account_holder_pending_reward"
-        )
-        self.write_to_tsv(self.polaris_generator.balance_adjustment(), POLARIS_DB, table="balance_adjustment")
-        self.write_to_tsv(self.polaris_generator.email_template(), POLARIS_DB, table="email_template")
+    def _first_id(self, db_name: str, table: str) -> int:
+        """Id of the first row generated for table: 1, or following on from existing rows (see growth)."""
+        return 1 if self.existing is None else self.existing.next_id(db_name, table)
 
-        self.write_to_tsv(
-            retry_task(self.polaris_task_type_ids, polaris_retry_task_types_to_populate, data_config=self.data_config),
-            POLARIS_DB,
-            table="retry_task",
-        )
-        self.write_to_tsv(
-            task_type_key_value(
-                task_type_ids_dict=self.polaris_task_type_ids,
-                task_type_keys_dict=generate_task_type_key_values(POLARIS_DB),
-                task_types_to_populate=polaris_retry_task_types_to_populate,
-                data_config=self.data_config,
+    @staticmethod
+    def fetch_column_types(jobs: list[TableJob]) -> dict[str, list[str]]:
+        """Column types (see pgcopy_encoder.fetch_column_types) of the tables of jobs, by job name."""
+
+        column_types = {}
+
+        for db_name in dict.fromkeys(job.db_name for job in jobs):
+            with pooled_connection(db_name) as db_connection:
+                with db_connection.cursor() as cursor:
+                    for job in jobs:
+                        if job.db_name == db_name:
+                            column_types[job.name] = fetch_column_types(cursor, job.table)
+
+        return column_types
+
+    @staticmethod
+    def select_jobs(jobs: list[TableJob], tables: Collection[str]) -> list[TableJob]:
+        """
+        Jobs of the selected tables (by "<db>.<table>"), along with those of the tables whose generated state they rely
+        on (see TableJob.prerequisites, generated again as they are deterministic), in execution order.
+        """
+
+        by_name = {job.name: job for job in jobs}
+        selected: set[str] = set()
+        pending = [name for name in tables if name in by_name]
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(by_name[name].prerequisites)
+
+        return [job for job in jobs if job.name in selected]
+
+    def table_rows(self, tables: Collection[str] | None = None) -> Iterator[tuple[str, str, Iterable[list]]]:
+        """(database name, table name, rows) of all tables, or those in tables, in execution order, generated lazily."""
+
+        jobs = self.table_jobs()
+        for job in jobs if tables is None else self.select_jobs(jobs, tables):
+            if tables is None or job.name in tables:
+                yield job.db_name, job.table, self._rows(job)
+            else:
+                deque(self._rows(job), maxlen=0)
+
+    @staticmethod
+    def _rows(job: TableJob) -> Iterator[list]:
+        if job.shard_total is None:
+            results = [(yield from job.generate())]
+        else:
+            results = []
+            for shard in split_into_shards(job.shard_total, first_id=job.first_id):
+                results.append((yield from job.generate(shard)))
+
+        if job.collect is not None:
+            job.collect(results)
+
+    def retry_task_jobs(self, db_name: str, task_type_ids: dict, task_types_to_populate: dict) -> list[TableJob]:
+        """
+        Jobs for the retry_task and task_type_key_value tables of a database.
+
+        :param db_name: database to write these tables to
+        :param task_type_ids: task type ids as fetched from the database
+        :param task_types_to_populate: task types to generate retry tasks for (see fixtures)
+        """
+
+        total = retry_task_count(task_types_to_populate, self.data_config)
+        first_id = self._first_id(db_name, "retry_task")
+
+        return [
+            TableJob(
+                db_name,
+                "retry_task",
+                partial(
+                    retry_task,
+                    task_type_ids,
+                    task_types_to_populate,
+                    self.data_config,
+                    derive_seed(self.seed, db_name),
+                    first_id=first_id,
+                ),
+                shard_total=total,
+                first_id=first_id,
             ),
-            POLARIS_DB,
-            table="task_type_key_value",
+            TableJob(
+                db_name,
+                "task_type_key_value",
+                partial(
+                    task_type_key_value,
+                    task_type_ids,
+                    generate_task_type_key_values(db_name, self.seed),
+                    task_types_to_populate,
+                    self.data_config,
+                    first_id=first_id,
+                ),
+                shard_total=total,
+                first_id=first_id,
+            ),
+        ]
+
+    def write_table(self, job: TableJob, tsv_name: str, column_types: list[str] | None = None) -> None:
+        """
+        Generates a table and writes it to tsv_name (as binary COPY data if column types are provided), removing any
+        file left for the table in another format or compression by a previous run (which would otherwise be uploaded
+        as well).
+        """
+
+        start_time = time.time()
+
+        name = os.path.splitext(split_compression(tsv_name)[0])[0]
+        for extension in (TEXT_EXTENSION, BINARY_EXTENSION):
+            for stale_name in [name + extension, *(name + extension + suffix for suffix in extensions.values())]:
+                if stale_name != tsv_name and os.path.exists(stale_name):
+                    os.remove(stale_name)
+
+        if job.shard_total is None:
+            rows, results = self.write_unsharded_tsv(job.generate, tsv_name, column_types)
+        else:
+            rows, results = self.write_sharded_tsv(
+                job.generate, job.shard_total, tsv_name, column_types, first_id=job.first_id
+            )
+        if job.collect is not None:
+            job.collect(results)
+        self.rows_written[job.name] = rows
+        self.seconds_taken[job.name] = time.time() - start_time
+
+        logger.info(f"Wrote tsv {tsv_name} ({rows} rows) in {self.seconds_taken[job.name]:.2f} seconds")
+
+    def write_sharded_tsv(  # pylint: disable=too-many-arguments
+        self,
+        generate: Callable[[Shard], Generator[list, None, Any]],
+        total: int,
+        tsv_name: str,
+        column_types: list[str] | None = None,
+        first_id: int = 1,
+    ) -> tuple[int, list]:
+        """
+        Writes a table generated in id-range shards by the process pool to a single tsv, in id order.
+
+        :param generate: callable generating the rows for a single shard (must be picklable e.g. a bound method)
+        :param total: total number of ids/rows to generate
+        :param tsv_name: tsv to write to
+        :param column_types: table's column types, to write binary COPY data rather than a tsv
+        :param first_id: first id to generate (see split_into_shards)
+        :return: number of rows written, and the values returned by the shards' generators (in id order)
+        """
+
+        shards = split_into_shards(total, first_id=first_id)
+
+        if self.executor is None:
+            with _open_data_file(tsv_name, column_types, self.compression) as file:
+                return _combined([_write_rows(file, generate(shard), column_types) for shard in shards])
+
+        part_names = [f"{tsv_name}.{shard.index}.part" for shard in shards]
+        rows, results = _combined(
+            self.executor.map(
+                _write_shard, repeat(generate), shards, part_names, repeat(column_types), repeat(self.compression)
+            )
         )
 
-    @staticmethod
-    def write_to_tsv(data: list, db_name: str, table: str) -> None:
+        # Parts are already compressed (each as a stream of its own), so are concatenated as they are
+        with open_tsv(tsv_name) as file:
+            if column_types is not None:
+                file.write(compress(PGCOPY_HEADER, self.compression))
+            for part_name in part_names:
+                with open(part_name, "rb") as part:
+                    shutil.copyfileobj(part, file)
+                os.remove(part_name)
+            if column_types is not None:
+                file.write(compress(PGCOPY_TRAILER, self.compression))
+
+        return rows, results
+
+    def write_unsharded_tsv(
+        self, generate: Callable[[], Generator[list, None, Any]], tsv_name: str, column_types: list[str] | None = None
+    ) -> tuple[int, list]:
         """
-        Writes data to tsv with filename containing all information needed for upload (including order).
+        Writes an unsharded table to tsv, generated by the process pool if there is one.
 
-        :param data: data to write to tsv
-        :param db: database to write this data to
-        :param table: table to write this data to
+        :param generate: callable generating the table's rows (must be picklable e.g. a bound method)
+        :param tsv_name: tsv to write to
+        :param column_types: table's column types, to write binary COPY data rather than a tsv
+        :return: number of rows written, and the value returned by the generator (as a list, see TableJob.collect)
         """
 
-        execute_id = next(execution_order)
+        if self.executor is None:
+            rows, result = _write_table(generate, tsv_name, column_types, self.compression)
+        else:
+            rows, result = self.executor.submit(
+                _write_table, generate, tsv_name, column_types, self.compression
+            ).result()
 
-        if not os.path.isdir(TSV_BASE_DIR):
-            os.mkdir(TSV_BASE_DIR)
+        return rows, [result]
 
-        tsv_name = os.path.join(TSV_BASE_DIR, f"tsv-{db_name}-{execute_id}-{table}.tsv")
+    def _tsv_name(  # pylint: disable=too-many-arguments
+        self, db_name: str, table: str, execute_id: int, *, binary: bool = False, compression: str | None = None
+    ) -> str:
+        """Returns the path of a tsv (named after its database, position in generation order and table)."""
 
-        with open(tsv_name, "w+", encoding="utf-8") as file:
-            tsv_writer = csv.writer(file, delimiter="\t", quoting=csv.QUOTE_NONE, escapechar="", quotechar="")
-            tsv_writer.writerows(data)
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
 
-        logger.info(f"Wrote tsv {tsv_name}")
+        extension = (BINARY_EXTENSION if binary else TEXT_EXTENSION) + (extensions[compression] if compression else "")
+        return os.path.join(self.directory, f"tsv-{db_name}-{execute_id}-{table}{extension}")
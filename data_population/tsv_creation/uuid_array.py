@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+from typing import Generator, Iterable
+from uuid import UUID
+
+UUID_SIZE = 16  # bytes per uuid
+
+# Arrays each process (including process pool workers) already holds, by name: these are pickled by name only
+_shared_arrays: dict[str, "UUIDArray"] = {}
+
+
+def share_arrays(buffers: dict[str, bytes]) -> None:
+    """
+    Process pool initializer: receives named arrays (as name: buffer) once per worker process, so that tasks using them
+    do not each carry a copy of the array (see UUIDArray.__reduce__).
+
+    :param buffers: buffers of the arrays to share, by array name
+    """
+
+    for name, data in buffers.items():
+        _shared_arrays[name] = UUIDArray(data, name=name)
+
+
+@contextmanager
+def sharing(arrays: Iterable["UUIDArray"]) -> Generator[dict[str, bytes], None, None]:
+    """
+    Marks named arrays as shared with process pool workers for the duration of the context, yielding the initargs
+    buffers to pass to share_arrays.
+    """
+
+    named_arrays = {array.name: array for array in arrays if array.name is not None}
+    _shared_arrays.update(named_arrays)
+    try:
+        yield {name: array.data for name, array in named_arrays.items()}
+    finally:
+        for name in named_arrays:
+            _shared_arrays.pop(name, None)
+
+
+def _shared_array(name: str) -> "UUIDArray":
+    return _shared_arrays[name]
+
+
+class UUIDArray:
+    """
+    Read-only array of uuids held as a single contiguous bytes buffer (16 bytes per uuid) rather than as uuid objects.
+    uuids are read by index, as strings.
+    """
+
+    def __init__(self, data: bytes, name: str | None = None) -> None:
+        """
+        :param data: concatenated 16 byte uuids
+        :param name: name to share the array with process pool workers by (see sharing)
+        """
+
+        if len(data) % UUID_SIZE:
+            raise ValueError(f"UUIDArray buffer length must be a multiple of {UUID_SIZE}, got {len(data)}")
+
+        self.data = data
+        self.name = name
+
+    @classmethod
+    def from_uuids(cls, uuids: Iterable[UUID], name: str | None = None) -> "UUIDArray":
+        return cls(b"".join(value.bytes for value in uuids), name=name)
+
+    def __len__(self) -> int:
+        return len(self.data) // UUID_SIZE
+
+    def __getitem__(self, index: int) -> str:
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"UUIDArray index {index} out of range")
+
+        start = (index % len(self)) * UUID_SIZE
+        return str(UUID(bytes=self.data[start : start + UUID_SIZE]))
+
+    def __reduce__(self) -> tuple:
+        if self.name is not None and _shared_arrays.get(self.name) is not None:
+            return _shared_array, (self.name,)
+
+        return UUIDArray, (self.data, self.name)
@@ -0,0 +1,57 @@
+import json
+import logging
+import os
+
+from typing import Callable
+
+from faker import Faker
+
+from data_population.common.utils import derive_seed
+from settings import FAKER_LOCALE, VALUE_POOL_DIR, VALUE_POOL_SIZE
+
+logger = logging.getLogger("ValuePools")
+
+# Faker providers values can be pooled from, by pool name
+samplers: dict[str, Callable[[Faker], str]] = {
+    "credit_card_number": lambda fake: fake.credit_card_number(),
+    "first_name": lambda fake: fake.first_name(),
+    "last_name": lambda fake: fake.last_name(),
+}
+
+
+def _sample(name: str, size: int, locale: str, seed: int) -> list[str]:
+    fake = Faker(locale)
+    fake.seed_instance(derive_seed(seed, "value_pool", name))
+    sampler = samplers[name]
+
+    return [sampler(fake) for _ in range(size)]
+
+
+def value_pool(name: str, seed: int, size: int = VALUE_POOL_SIZE, locale: str = FAKER_LOCALE) -> list[str]:
+    """
+    Returns a pool of size values sampled from Faker (cached on disk), for generators to pick from by random index.
+
+    :param name: name of the pool (one of samplers)
+    :param seed: seed to sample the pool with
+    :param size: number of values in the pool
+    :param locale: Faker locale to sample values for
+    """
+
+    if name not in samplers:
+        raise ValueError(f"Unknown value pool {name}, allowed pools {list(samplers)}")
+
+    pool_name = os.path.join(VALUE_POOL_DIR, f"{name}-{locale}-{seed}-{size}.json")
+
+    if os.path.isfile(pool_name):
+        with open(pool_name, encoding="utf-8") as file:
+            return json.load(file)
+
+    values = _sample(name, size, locale, seed)
+
+    os.makedirs(VALUE_POOL_DIR, exist_ok=True)
+    with open(f"{pool_name}.tmp", "w", encoding="utf-8") as file:
+        json.dump(values, file)
+    os.replace(f"{pool_name}.tmp", pool_name)  # so that a partially written pool is never read
+    logger.info(f"Sampled value pool {pool_name}")
+
+    return values
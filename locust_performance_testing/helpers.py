@@ -4,8 +4,6 @@ from dataclasses import dataclass
 from functools import wraps
 from typing import Any, Callable, Generator
 
-import psycopg2
-
 from azure.identity import DefaultAzureCredential
 from azure.keyvault.secrets import SecretClient
 from locust import task
@@ -14,6 +12,8 @@ from redis import Redis
 
 import settings
 
+from data_population.common.connection_pool import pooled_connection
+
 
 @dataclass
 class AccountHolder:
@@ -27,7 +27,6 @@ class AccountHolder:
 
 class LocustHandler:
     logger = logging.getLogger("LocustHandler")
-    polaris_connection_string: str = settings.DB_CONNECTION_URI.replace("/postgres?", f"/{settings.POLARIS_DB}?")
 
     def __init__(self) -> None:
         self.redis = Redis.from_url(
@@ -69,7 +68,7 @@ class LocustHandler:
         """
 
         if not self.retailer_count:
-            with psycopg2.connect(self.polaris_connection_string) as polaris_connection:
+            with pooled_connection(settings.POLARIS_DB) as polaris_connection:
                 with polaris_connection.cursor() as cursor:
                     query = "SELECT count(*) from retailer_config;"
                     cursor.execute(query)
@@ -77,8 +76,6 @@ class LocustHandler:
 
                     self.retailer_count = int(results[0])
 
-            polaris_connection.close()
-
         return self.retailer_count
 
     def get_polaris_account_holder_count(self) -> int:
@@ -89,7 +86,7 @@ class LocustHandler:
         """
 
         if not self.account_holder_count:
-            with psycopg2.connect(self.polaris_connection_string) as polaris_connection:
+            with pooled_connection(settings.POLARIS_DB) as polaris_connection:
                 with polaris_connection.cursor() as cursor:
                     query = "SELECT count(*) from account_holder;"
                     cursor.execute(query)
@@ -97,8 +94,6 @@ class LocustHandler:
 
                     self.account_holder_count = int(results[0])
 
-            polaris_connection.close()
-
         return self.account_holder_count
 
     def get_headers(self) -> dict:
@@ -157,7 +152,7 @@ class LocustHandler:
 
         self.logger.info(f"Fetching account information for ids: {id_fetch_list}")
 
-        with psycopg2.connect(self.polaris_connection_string) as polaris_connection:
+        with pooled_connection(settings.POLARIS_DB) as polaris_connection:
             with polaris_connection.cursor() as cursor:
 
                 query = (
@@ -183,8 +178,6 @@ class LocustHandler:
                     )
                     all_account_holders.append(account_holder)
 
-        polaris_connection.close()
-
         return all_account_holders
 
 
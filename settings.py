@@ -11,11 +11,32 @@ LOG_LEVEL = env.log_level("LOG_LEVEL", "DEBUG")
 logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s :: %(name)s :: %(levelname)s :: %(message)s")
 logging.getLogger("faker").setLevel(logging.WARNING)
 
-fake = Faker("en_GB")
+FAKER_LOCALE = env("FAKER_LOCALE", "en_GB")
+fake = Faker(FAKER_LOCALE)
 
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
 
 TSV_BASE_DIR = env("TSV_BASE_DIR", "data_population/data")
+GENERATION_PROCESSES = env.int("GENERATION_PROCESSES", os.cpu_count() or 1)
+GENERATION_SEED = env.int("GENERATION_SEED", 0)  # seed used when none is given (so that repeat runs hit the cache)
+GENERATION_BACKEND = env("GENERATION_BACKEND", "python")  # "python" or "numpy" (requires numpy)
+TSV_COMPRESSION = env("TSV_COMPRESSION", "") or None  # "gzip", "lzma" or "zstd" (requires zstandard), unset: none
+UPLOAD_CONCURRENCY = env.int("UPLOAD_CONCURRENCY", 4)  # connections uploading at once, across all databases
+UPLOAD_CHUNK_SIZE = env.int("UPLOAD_CHUNK_SIZE", 32 * 1024 * 1024)  # bytes of tsv copied (and committed) at a time
+UPLOAD_CHECKPOINT_FILE = env("UPLOAD_CHECKPOINT_FILE", "data_population/upload_checkpoint.json")
+DB_POOL_SIZE = env.int("DB_POOL_SIZE", 8)  # idle connections kept open (for reuse) per database
+DB_POOL_MAX_SIZE = env.int("DB_POOL_MAX_SIZE", 32)  # connections borrowed at once per database (more wait for one)
+DB_POOL_TIMEOUT = env.float(
+    "DB_POOL_TIMEOUT", 600
+)  # seconds to wait for a connection once DB_POOL_MAX_SIZE are borrowed
+BULK_LOAD_UNLOGGED = env.bool("BULK_LOAD_UNLOGGED", False)  # bulk load tables UNLOGGED (where possible)
+BULK_LOAD_REPLICA_ROLE = env.bool("BULK_LOAD_REPLICA_ROLE", False)  # bulk load with session_replication_role = replica
+LOAD_TIMINGS_FILE = env("LOAD_TIMINGS_FILE", "data_population/load_timings.json")
+LOAD_REPORT_FILE = env("LOAD_REPORT_FILE", "data_population/load_report.json")  # row counts etc. of the last load
+PLAN_REPORT_FILE = env("PLAN_REPORT_FILE", "data_population/plan_report.json")  # estimates of the last plan
+SNAPSHOT_TEMPLATE_SUFFIX = env("SNAPSHOT_TEMPLATE_SUFFIX", "_template")  # snapshot of a database: <db name><suffix>
+VALUE_POOL_DIR = env("VALUE_POOL_DIR", "data_population/value_pools")
+VALUE_POOL_SIZE = env.int("VALUE_POOL_SIZE", 10000)  # number of Faker values sampled per pool
 
 VAULT_URL = env("VAULT_URL", "")
 POLARIS_AUTH_KEY_NAME = env("POLARIS_AUTH_KEY_NAME", "bpl-polaris-api-auth-token")
@@ -0,0 +1,12 @@
+from typing import Any, Callable
+
+
+def raised(exception_type: type[Exception], function: Callable, *args: Any, **kwargs: Any) -> Exception:
+    """Calls function, returning the exception of exception_type it raises (failing the test if it raises none)."""
+
+    try:
+        function(*args, **kwargs)
+    except exception_type as ex:
+        return ex
+
+    raise AssertionError(f"{exception_type.__name__} not raised")
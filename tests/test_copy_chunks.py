@@ -0,0 +1,43 @@
+import io
+
+from data_population.db_tasks.copy_chunks import CopyChunks
+from data_population.tsv_creation.pgcopy_encoder import PGCOPY_HEADER, PGCOPY_TRAILER, PGCopyEncoder
+from tests.helpers import raised
+
+TEXT = b"1\ta\n2\tb\n3\tccccccccccccccccccccccccc\n4\td"
+
+
+def test_text_chunks() -> None:
+    chunks = list(CopyChunks(io.BytesIO(TEXT), binary=False, chunk_size=10))
+
+    assert [chunk.data for chunk in chunks] == [b"1\ta\n2\tb\n", b"3\tccccccccccccccccccccccccc\n", b"4\td"]
+    assert [chunk.rows for chunk in chunks] == [2, 1, 1]
+    assert [chunk.end for chunk in chunks] == [8, 36, 39]
+
+
+def test_resume_from_chunk_end() -> None:
+    first = next(iter(CopyChunks(io.BytesIO(TEXT), binary=False, chunk_size=10)))
+    rest = list(CopyChunks(io.BytesIO(TEXT), binary=False, offset=first.end, chunk_size=10))
+
+    assert b"".join(chunk.data for chunk in rest) == TEXT[first.end :]
+
+
+def test_binary_chunks() -> None:
+    encoder = PGCopyEncoder(["int4", "text"])
+    rows = [encoder.encode_row([i, None if i % 2 else "x" * i]) for i in range(5)]
+    data = PGCOPY_HEADER + b"".join(rows) + PGCOPY_TRAILER
+
+    chunks = list(CopyChunks(io.BytesIO(data), binary=True, chunk_size=len(rows[0]) * 2))
+
+    assert sum(chunk.rows for chunk in chunks) == 5
+    assert b"".join(chunk.data[len(PGCOPY_HEADER) : -len(PGCOPY_TRAILER)] for chunk in chunks) == b"".join(rows)
+    assert all(chunk.data.startswith(PGCOPY_HEADER) and chunk.data.endswith(PGCOPY_TRAILER) for chunk in chunks)
+    assert chunks[-1].end == len(data) - len(PGCOPY_TRAILER)
+
+
+def test_incomplete_binary_data() -> None:
+    row = PGCopyEncoder(["int4"]).encode_row([1])
+
+    chunks = CopyChunks(io.BytesIO(PGCOPY_HEADER + row[:-1]), binary=True)
+
+    assert "Incomplete" in str(raised(ValueError, list, chunks))
@@ -0,0 +1,28 @@
+from data_population.data_config import data_configs, parse_overrides, scale_data_config
+from tests.helpers import raised
+
+
+def test_scale_data_config() -> None:
+    base = data_configs["benchmark"]
+    scaled = scale_data_config(base, 2.5, {"reward_updates": 7})
+
+    assert scaled.retailers == base.retailers
+    assert scaled.campaigns_per_retailer == base.campaigns_per_retailer
+    assert scaled.account_holders == round(base.account_holders * 2.5)
+    assert scaled.transactions == round(base.transactions * 2.5)
+    assert scaled.reward_updates == 7
+
+
+def test_scale_data_config_errors() -> None:
+    assert "positive" in str(raised(ValueError, scale_data_config, data_configs["benchmark"], 0))
+    assert "Inconsistent" in str(
+        raised(ValueError, scale_data_config, data_configs["benchmark"], 1, {"account_holders": 0})
+    )
+
+
+def test_parse_overrides() -> None:
+    assert parse_overrides([" transactions = 5", "retailers=2"]) == {"transactions": 5, "retailers": 2}
+    assert not parse_overrides([])
+
+    for override in ("transactions", "transactions=x", "unknown=1", "transactions=1.5"):
+        assert "Invalid data config override" in str(raised(ValueError, parse_overrides, [override]))
@@ -0,0 +1,31 @@
+import struct
+
+from datetime import datetime
+
+from data_population.tsv_creation.pgcopy_encoder import PGCopyEncoder
+from data_population.tsv_creation.tsv_encoder import NULL_TEXT, TSVEncoder
+
+
+def test_nullable_timestamp() -> None:
+    now = datetime(2000, 1, 1, 0, 0, 1)
+    encoder = PGCopyEncoder(["timestamp", "timestamp"])
+
+    assert encoder.encode_row([now, None]) == struct.pack(">hiqi", 2, 8, 1000000, -1)
+    assert encoder.encode_row([None, now]) == struct.pack(">hiiq", 2, -1, 8, 1000000)
+
+
+def test_text_null() -> None:
+    assert TSVEncoder().encode_row([1, None]) == f"1\t{NULL_TEXT}\n"
+
+
+def test_varchar_array() -> None:
+    encoder = PGCopyEncoder(["_varchar"])
+    elements = struct.pack(">i2si", 2, b"ab", -1)
+    header = struct.pack(">hiiiiii", 1, 20 + len(elements), 1, 1, 1043, 2, 1)
+
+    assert encoder.encode_row([("ab", None)]) == header + elements
+    assert encoder.encode_row([[]]) == struct.pack(">hiiii", 1, 12, 0, 0, 1043)
+
+
+def test_text_array() -> None:
+    assert TSVEncoder().encode_row([["a", 'b"\\', None]]) == '{"a","b\\\\"\\\\\\\\",NULL}\n'
@@ -0,0 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+from multiprocessing import get_context
+from typing import Callable, Iterable
+
+from data_population.data_config import DataConfig
+from data_population.tsv_creation.generators.task_generators import retry_task, retry_task_count
+from data_population.tsv_creation.sharding import Shard, split_into_shards
+
+DATA_CONFIG = DataConfig(
+    retailers=2,
+    account_holders=120,
+    campaigns_per_retailer=1,
+    earn_rule_per_campaign=1,
+    allocated_rewards=30,
+    pending_rewards=20,
+    spare_rewards=0,
+    transactions=90,
+    reward_updates=0,
+)
+TASK_TYPES = {"enrolment-callback": ["account_holders"], "reward-issuance": ["allocated_rewards", "transactions"]}
+
+
+def _rows(generate: Callable[[Shard], Iterable[list]], shard: Shard) -> list[list]:
+    """Rows of a shard, without their (generation time) timestamps."""
+    return [row[2:5] + row[6:] for row in generate(shard)]
+
+
+def test_split_into_shards() -> None:
+    shards = split_into_shards(250, shard_size=100, first_id=11)
+
+    assert [shard.index for shard in shards] == [0, 1, 2]
+    assert [retry_id for shard in shards for retry_id in shard.ids] == list(range(11, 261))
+    assert split_into_shards(0) == [Shard(index=0, start=1, stop=1)]
+
+
+def test_shards_same_across_process_counts() -> None:
+    total = retry_task_count(TASK_TYPES, DATA_CONFIG)
+    generate = partial(retry_task, {"enrolment-callback": 1, "reward-issuance": 2}, TASK_TYPES, DATA_CONFIG, 42)
+    shards = split_into_shards(total, shard_size=50)
+    serial = [_rows(generate, shard) for shard in shards]
+
+    assert [row[0] for rows in serial for row in rows] == list(range(1, total + 1))
+    assert [_rows(generate, shard) for shard in reversed(shards)] == serial[::-1]
+    for processes in (2, 3):
+        with ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn")) as executor:
+            assert list(executor.map(_rows, repeat(generate), shards)) == serial
@@ -0,0 +1,59 @@
+from typing import Callable
+
+from data_population.common.task_graph import run_task_graph
+from tests.helpers import raised
+
+
+def _recorder(started: list[str], name: str, fail: bool = False) -> Callable[[], None]:
+    def task() -> None:
+        started.append(name)
+        if fail:
+            raise RuntimeError(name)
+
+    return task
+
+
+def test_order() -> None:
+    started: list[str] = []
+    tasks = {name: _recorder(started, name) for name in ("a", "b", "c", "d")}
+
+    run_task_graph(tasks, {"a": ["c"], "b": ["d"]}, max_workers=1)
+
+    assert started == ["c", "a", "d", "b"]  # (ready tasks in the order of tasks)
+
+
+def test_prerequisites_complete_first() -> None:
+    started: list[str] = []
+    tasks = {name: _recorder(started, name) for name in ("a", "b", "c", "d", "e")}
+    prerequisites = {"a": ["b", "c"], "b": ["e"], "c": ["d"]}
+
+    run_task_graph(tasks, prerequisites, max_workers=3)
+
+    assert sorted(started) == sorted(tasks)
+    for name, names in prerequisites.items():
+        assert all(started.index(prerequisite) < started.index(name) for prerequisite in names)
+
+
+def test_failure_starts_no_further_tasks() -> None:
+    started: list[str] = []
+    tasks = {"a": _recorder(started, "a", fail=True), "b": _recorder(started, "b"), "c": _recorder(started, "c")}
+
+    assert str(raised(RuntimeError, run_task_graph, tasks, {}, max_workers=1)) == "a"
+
+    assert started == ["a"]
+
+
+def test_failure_skips_dependents() -> None:
+    started: list[str] = []
+    tasks = {"a": _recorder(started, "a", fail=True), "b": _recorder(started, "b")}
+
+    raised(RuntimeError, run_task_graph, tasks, {"b": ["a"]}, max_workers=2)
+
+    assert started == ["a"]
+
+
+def test_invalid_prerequisites() -> None:
+    tasks = {"a": lambda: None, "b": lambda: None}
+
+    assert "circular" in str(raised(ValueError, run_task_graph, tasks, {"a": ["b"], "b": ["a"]}, max_workers=2))
+    assert "Unknown" in str(raised(ValueError, run_task_graph, tasks, {"a": ["c"]}, max_workers=2))
@@ -0,0 +1,30 @@
+from enum import Enum
+
+from data_population.tsv_creation.tsv_encoder import NULL_TEXT, TSVEncoder, encode_rows
+
+
+class Status(str, Enum):
+    ACTIVE = "ACTIVE"
+
+
+def test_escaping() -> None:
+    row = ["tab\there", "new\nline", "carriage\rreturn", "back\\slash", 1]
+
+    assert TSVEncoder().encode_row(row) == "tab\\there\tnew\\nline\tcarriage\\rreturn\tback\\\\slash\t1\n"
+
+
+def test_escaping_of_repeated_cells() -> None:
+    encoder = TSVEncoder()
+    value = "a\tb"
+
+    assert encoder.encode_row([value, 1]) == "a\\tb\t1\n"
+    assert encoder.encode_row([value, 2]) == "a\\tb\t2\n"
+    assert encoder.encode_row(["c", 3]) == "c\t3\n"
+
+
+def test_cells() -> None:
+    assert TSVEncoder().encode_row([Status.ACTIVE, None, True, {"a": 1}]) == f"ACTIVE\t{NULL_TEXT}\tTrue\t{{'a': 1}}\n"
+
+
+def test_encode_rows() -> None:
+    assert b"".join(encode_rows([["a", 1], ["b\n", 2]])) == b"a\t1\nb\\n\t2\n"